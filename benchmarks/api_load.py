@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def timed_request(request: urllib.request.Request, timeout: float) -> float:
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+    except urllib.error.HTTPError as e:
+        e.read()
+    return time.perf_counter() - start
+
+
+def health_request(base_url: str) -> urllib.request.Request:
+    return urllib.request.Request(f"{base_url}/health")
+
+
+def query_request(base_url: str, question: str) -> urllib.request.Request:
+    body = json.dumps({"question": question, "top_k": 3}).encode()
+    return urllib.request.Request(
+        f"{base_url}/query",
+        data=body,
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+
+
+def upload_request(base_url: str, payload: bytes) -> urllib.request.Request:
+    boundary = uuid.uuid4().hex
+    filename = f"load-{uuid.uuid4().hex[:8]}.txt"
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: text/plain\r\n\r\n"
+    ).encode() + payload + f"\r\n--{boundary}--\r\n".encode()
+    return urllib.request.Request(
+        f"{base_url}/ingest",
+        data=body,
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        method="POST",
+    )
+
+
+def make_payload(size_mb: float) -> bytes:
+    paragraph = (
+        "The retrieval pipeline splits documents into overlapping chunks, embeds them "
+        "and stores them in the vector database for similarity search.\n\n"
+    )
+    repeats = int(size_mb * 1024 * 1024 / len(paragraph)) + 1
+    return "".join(f"{i}: {paragraph}" for i in range(repeats)).encode()
+
+
+def probe(base_url: str, duration: float, interval: float, timeout: float, query: bool) -> dict[str, list[float]]:
+    latencies: dict[str, list[float]] = {"health": [], "query": []}
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        latencies["health"].append(timed_request(health_request(base_url), timeout))
+        if query:
+            latencies["query"].append(timed_request(query_request(base_url, "What is this document about?"), timeout))
+        time.sleep(interval)
+    return latencies
+
+
+def summarize(latencies: list[float]) -> dict:
+    if not latencies:
+        return {"requests": 0}
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure /health and /query latency while uploads are in flight")
+    parser.add_argument("--url", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per phase")
+    parser.add_argument("--uploaders", type=int, default=4, help="Concurrent upload clients in the loaded phase")
+    parser.add_argument("--upload-mb", type=float, default=5.0, help="Size of each uploaded file")
+    parser.add_argument("--interval", type=float, default=0.05, help="Delay between probe requests")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout")
+    parser.add_argument("--no-query", action="store_true", help="Only probe /health (no Ollama required)")
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip("/")
+    probe_query = not args.no_query
+
+    idle = probe(base_url, args.duration, args.interval, args.timeout, probe_query)
+
+    payload = make_payload(args.upload_mb)
+    stop = threading.Event()
+    uploads: list[float] = []
+
+    def upload_loop():
+        while not stop.is_set():
+            uploads.append(timed_request(upload_request(base_url, payload), args.timeout))
+
+    with ThreadPoolExecutor(max_workers=args.uploaders) as pool:
+        for _ in range(args.uploaders):
+            pool.submit(upload_loop)
+        loaded = probe(base_url, args.duration, args.interval, args.timeout, probe_query)
+        stop.set()
+
+    report = {
+        "idle": {name: summarize(values) for name, values in idle.items()},
+        "under_upload": {name: summarize(values) for name, values in loaded.items()},
+        "uploads": summarize(uploads),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+import argparse
+import itertools
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from src.chunking.text_splitter import Chunk
+from src.vectorstore import MatrixStore
+from src.vectorstore.bm25 import BM25Index
+from src.retrieval import Retriever
+
+
+class ConstantEmbedder:
+    model_name = "constant"
+
+    def embed(self, text: str) -> list[float]:
+        return [1.0, 0.0, 0.0, 0.0]
+
+    def embed_batch(self, texts: list[str]) -> np.ndarray:
+        return np.tile(np.array([1.0, 0.0, 0.0, 0.0], dtype=np.float32), (len(texts), 1))
+
+
+def percentiles(latencies: list[float]) -> str:
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(0.99 * (len(latencies) - 1))] * 1000
+    return f"p50 {p50:.2f} ms, p99 {p99:.2f} ms"
+
+
+def make_vocabulary(size: int, rng: random.Random) -> list[str]:
+    syllables = ["get", "set", "user", "id", "load", "parse", "config", "error", "handler", "cache", "index", "node"]
+    words = set()
+    while len(words) < size:
+        word = "".join(rng.choice(syllables) for _ in range(rng.randint(1, 3)))
+        words.add(word + (str(rng.randint(0, 999)) if rng.random() < 0.2 else ""))
+    return sorted(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure BM25 and end-to-end lexical search latency")
+    parser.add_argument("--chunks", type=int, default=1_000_000, help="Number of synthetic chunks")
+    parser.add_argument("--tokens", type=int, default=60, help="Tokens per chunk")
+    parser.add_argument("--vocabulary", type=int, default=50_000, help="Vocabulary size")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries to time")
+    parser.add_argument("--top-k", type=int, default=20, help="Candidates per query")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = BM25Index(Path(tmp) / "bm25", snapshot_every=10**12)
+        store = MatrixStore(persist_directory=tmp, embedder=ConstantEmbedder(), lexical_index=index)
+
+        start = time.perf_counter()
+        batch = []
+        for i in range(args.chunks):
+            words = rng.choices(vocabulary, cum_weights=cum_weights, k=args.tokens)
+            batch.append(Chunk(content=" ".join(words), metadata={"group": i % 8}, chunk_index=i % 20, doc_id=f"doc{i // 20}"))
+            if len(batch) == 10_000:
+                store.add_chunks(batch)
+                batch = []
+        if batch:
+            store.add_chunks(batch)
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index.save()
+        save_seconds = time.perf_counter() - start
+        snapshot_bytes = (Path(tmp) / "bm25" / BM25Index.SNAPSHOT_FILE).stat().st_size
+
+        queries = [" ".join(rng.choices(vocabulary, k=rng.randint(2, 6))) for _ in range(args.queries)]
+        cold_latencies = []
+        warm_latencies = []
+        fusion_latencies = []
+        retriever = Retriever.__new__(Retriever)
+        retriever.rrf_k = 60
+        for query in queries:
+            start = time.perf_counter()
+            hits = index.search(query, n_results=args.top_k)
+            cold_latencies.append(time.perf_counter() - start)
+
+            lexical = [{"id": chunk_id, "content": "", "metadata": {}, "bm25_score": score} for chunk_id, score in hits]
+            dense = [{"id": f"doc{rng.randrange(args.chunks // 20)}_{j}", "content": "", "metadata": {}, "distance": j / 100, "score": 1 - j / 100} for j in range(args.top_k)]
+            start = time.perf_counter()
+            retriever._fuse(dense, lexical, args.top_k // 4)
+            fusion_latencies.append(time.perf_counter() - start)
+
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, n_results=args.top_k)
+            warm_latencies.append(time.perf_counter() - start)
+
+        search_latencies = []
+        filtered_latencies = []
+        filtered_hits = []
+        for query in queries:
+            start = time.perf_counter()
+            store.lexical_search(query, n_results=args.top_k)
+            search_latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            filtered_hits.append(len(store.lexical_search(query, n_results=args.top_k, where={"group": 0})))
+            filtered_latencies.append(time.perf_counter() - start)
+
+    print(f"chunks:                 {args.chunks}")
+    print(f"build:                  {build_seconds:.1f} s")
+    print(f"snapshot:               {save_seconds:.1f} s, {snapshot_bytes / 1e6:.1f} MB")
+    print(f"index cold query:       {percentiles(cold_latencies)}")
+    print(f"index warm query:       {percentiles(warm_latencies)}")
+    print(f"lexical_search:         {percentiles(search_latencies)} (BM25 + chunk fetch)")
+    print(f"lexical_search where:   {percentiles(filtered_latencies)}, mean hits {statistics.mean(filtered_hits):.1f}/{args.top_k}")
+    print(f"fusion mean:            {statistics.mean(fusion_latencies) * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import random
+from pathlib import Path
+
+WORDS = (
+    "retrieval pipeline chunk embedding vector index query answer document source context model "
+    "latency throughput cache batch token prompt stream server client request response error "
+    "config parser loader splitter store search filter score rank metadata manifest ingest "
+    "the a of to and in for with on by from that this is are was be as at it or an"
+).split()
+
+IDENTIFIERS = (
+    "load_config parse_document split_text embed_batch add_chunks search_index build_prompt "
+    "handle_request retry_backoff flush_buffer resolve_path read_header write_snapshot"
+).split()
+
+
+def sentence(rng: random.Random, min_words: int = 6, max_words: int = 18) -> str:
+    words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+    return " ".join(words).capitalize() + "."
+
+
+def paragraph(rng: random.Random, sentences: int = 5) -> str:
+    return " ".join(sentence(rng) for _ in range(sentences))
+
+
+def text_document(rng: random.Random, size: int) -> str:
+    parts, length = [], 0
+    while length < size:
+        part = paragraph(rng, rng.randint(3, 8))
+        parts.append(part)
+        length += len(part) + 2
+    return "\n\n".join(parts)
+
+
+def markdown_document(rng: random.Random, size: int) -> str:
+    parts, length, section = [], 0, 1
+    while length < size:
+        heading = f"## Section {section}: {' '.join(rng.choices(WORDS, k=3))}"
+        bullets = "\n".join(f"- {sentence(rng, 4, 10)}" for _ in range(rng.randint(2, 5)))
+        body = paragraph(rng, rng.randint(2, 6))
+        part = f"{heading}\n\n{body}\n\n{bullets}"
+        parts.append(part)
+        length += len(part) + 2
+        section += 1
+    return "# Synthetic document\n\n" + "\n\n".join(parts)
+
+
+def python_document(rng: random.Random, size: int) -> str:
+    parts, length, index = ["import os\nimport json\n"], 0, 0
+    while length < size:
+        name = f"{rng.choice(IDENTIFIERS)}_{index}"
+        body = "\n".join(
+            f"    {rng.choice(WORDS)}_{i} = {rng.choice(IDENTIFIERS)}({rng.choice(WORDS)!r}, {rng.randint(0, 99)})"
+            for i in range(rng.randint(3, 12))
+        )
+        if index % 4 == 0:
+            part = (
+                f"\n\nclass Handler{index}:\n"
+                f"    def __init__(self, path):\n        self.path = path\n\n"
+                f"    def run(self, value):\n    {body.replace(chr(10), chr(10) + '    ')}\n        return value\n"
+            )
+        else:
+            part = f"\n\ndef {name}(path, value=None):\n    \"\"\"{sentence(rng)}\"\"\"\n{body}\n    return value\n"
+        parts.append(part)
+        length += len(part)
+        index += 1
+    return "".join(parts)
+
+
+def javascript_document(rng: random.Random, size: int) -> str:
+    parts, length, index = [], 0, 0
+    while length < size:
+        name = f"{rng.choice(IDENTIFIERS)}{index}"
+        body = "\n".join(
+            f"  const {rng.choice(WORDS)}{i} = {rng.choice(IDENTIFIERS)}('{rng.choice(WORDS)}', {rng.randint(0, 99)});"
+            for i in range(rng.randint(3, 10))
+        )
+        part = f"function {name}(path, value) {{\n{body}\n  if (value) {{\n    return value;\n  }}\n  return null;\n}}\n\n"
+        parts.append(part)
+        length += len(part)
+        index += 1
+    return "".join(parts)
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: Path, pages: list[str], line_width: int = 90, lines_per_page: int = 55) -> None:
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for text in pages:
+        lines = []
+        for raw_line in text.splitlines() or [""]:
+            while len(raw_line) > line_width:
+                cut = raw_line.rfind(" ", 0, line_width)
+                cut = cut if cut > 0 else line_width
+                lines.append(raw_line[:cut])
+                raw_line = raw_line[cut:].lstrip()
+            lines.append(raw_line)
+        stream = "BT /F1 10 Tf 12 TL 50 780 Td " + " ".join(
+            f"({_pdf_escape(line)}) Tj T*" for line in lines[:lines_per_page]
+        ) + " ET"
+        stream_bytes = stream.encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream_bytes) + stream_bytes + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    path.write_bytes(bytes(output))
+
+
+def generate_corpus(directory: Path, files_per_type: int, size: int, pdf_pages: int, seed: int = 0) -> dict[str, list[Path]]:
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    corpus: dict[str, list[Path]] = {"text": [], "markdown": [], "code": [], "pdf": []}
+    for i in range(files_per_type):
+        path = directory / f"notes_{i}.txt"
+        path.write_text(text_document(rng, size))
+        corpus["text"].append(path)
+
+        path = directory / f"guide_{i}.md"
+        path.write_text(markdown_document(rng, size))
+        corpus["markdown"].append(path)
+
+        if i % 2 == 0:
+            path = directory / f"module_{i}.py"
+            path.write_text(python_document(rng, size))
+        else:
+            path = directory / f"module_{i}.js"
+            path.write_text(javascript_document(rng, size))
+        corpus["code"].append(path)
+
+        path = directory / f"report_{i}.pdf"
+        write_pdf(path, [text_document(rng, 2500) for _ in range(pdf_pages)])
+        corpus["pdf"].append(path)
+    return corpus
+
+
+def make_questions(n: int, seed: int = 1) -> list[str]:
+    rng = random.Random(seed)
+    return [f"How does the {' '.join(rng.choices(WORDS[:40], k=3))} work?" for _ in range(n)]
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.chunking.text_splitter import Chunk
+from src.vectorstore import MatrixStore
+
+
+class ArrayEmbedder:
+    model_name = "benchmark"
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+
+    def embed(self, text: str) -> list[float]:
+        return self.vectors[int(text)].tolist()
+
+    def embed_batch(self, texts: list[str], batch_size: int = 32) -> list[list[float]]:
+        return self.vectors[[int(text) for text in texts]]
+
+
+def make_corpus(n: int, dimension: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    assignments = rng.integers(0, clusters, size=n)
+    return centers[assignments] + 0.6 * rng.standard_normal((n, dimension)).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare recall@k and latency of quantized MatrixStore search")
+    parser.add_argument("--chunks", type=int, default=100_000, help="Number of synthetic embeddings")
+    parser.add_argument("--dimension", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--clusters", type=int, default=256, help="Topic clusters in the synthetic corpus")
+    parser.add_argument("--embeddings", help="Optional .npy file with real embeddings (overrides --chunks/--dimension)")
+    parser.add_argument("--queries", type=int, default=100, help="Number of queries")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--rescore-multiplier", type=int, nargs="+", default=[1, 4, 30])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    if args.embeddings:
+        corpus = np.load(args.embeddings).astype(np.float32)
+    else:
+        corpus = make_corpus(args.chunks, args.dimension, args.clusters, rng)
+    picks = rng.integers(0, len(corpus), size=args.queries)
+    queries = corpus[picks] + 0.3 * rng.standard_normal((args.queries, corpus.shape[1])).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MatrixStore(persist_directory=tmp, embedder=ArrayEmbedder(corpus))
+        for start in range(0, len(corpus), 10_000):
+            store.add_chunks([
+                Chunk(content=str(i), metadata={"doc_id": f"doc{i}"}, chunk_index=0, doc_id=f"doc{i}")
+                for i in range(start, min(start + 10_000, len(corpus)))
+            ])
+        del store
+
+        truth = [
+            [r["id"] for r in results]
+            for results in MatrixStore(persist_directory=tmp).search_many_by_embedding(queries, n_results=args.top_k)
+        ]
+
+        print(f"chunks: {len(corpus)}, dimension: {corpus.shape[1]}, queries: {args.queries}, k: {args.top_k}")
+        print(f"{'mode':<8} {'rescore':>7} {'bytes/vec':>10} {'recall@k':>9} {'p50 ms':>8}")
+        for quantization in ("none", "int8", "binary"):
+            multipliers = [1] if quantization == "none" else args.rescore_multiplier
+            for multiplier in multipliers:
+                store = MatrixStore(persist_directory=tmp, quantization=quantization, rescore_multiplier=multiplier)
+                latencies, recalls = [], []
+                for query, expected in zip(queries, truth):
+                    start = time.perf_counter()
+                    results = store.search_by_embedding(query.tolist(), n_results=args.top_k)
+                    latencies.append(time.perf_counter() - start)
+                    recalls.append(len({r["id"] for r in results} & set(expected)) / len(expected))
+
+                if quantization == "none":
+                    bytes_per_vector = corpus.shape[1] * 4
+                elif quantization == "int8":
+                    bytes_per_vector = corpus.shape[1] + 4
+                else:
+                    bytes_per_vector = (corpus.shape[1] + 7) // 8
+                print(
+                    f"{quantization:<8} {multiplier:>7} {bytes_per_vector:>10} "
+                    f"{statistics.mean(recalls):>9.3f} {statistics.median(latencies) * 1000:>8.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
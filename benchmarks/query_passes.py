@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.rag_pipeline import RAGPipeline
+
+
+class FakeModel:
+    def __init__(self, dimension: int = 384, delay: float = 0.0):
+        self.dimension = dimension
+        self.delay = delay
+
+    def encode(self, texts, batch_size: int = 32, show_progress_bar: bool = False, convert_to_numpy: bool = True):
+        time.sleep(self.delay)
+        if isinstance(texts, str):
+            return np.random.rand(self.dimension).astype(np.float32)
+        return np.random.rand(len(texts), self.dimension).astype(np.float32)
+
+
+class FakeCollection:
+    def __init__(self, n_chunks: int = 50, delay: float = 0.0):
+        self.n_chunks = n_chunks
+        self.delay = delay
+
+    def query(self, query_embeddings, n_results, where=None, include=None):
+        time.sleep(self.delay)
+        n = min(n_results, self.n_chunks)
+        return {
+            "ids": [[f"doc_{i}" for i in range(n)] for _ in query_embeddings],
+            "documents": [[f"chunk {i} content" for i in range(n)] for _ in query_embeddings],
+            "metadatas": [[{"filename": f"file_{i}.txt", "source": f"/tmp/file_{i}.txt"} for i in range(n)] for _ in query_embeddings],
+            "distances": [[i / n for i in range(n)] for _ in query_embeddings],
+        }
+
+    def count(self) -> int:
+        return self.n_chunks
+
+
+class FakeLLMClient:
+    def chat(self, model, messages, stream=False):
+        if stream:
+            return iter([{"message": {"content": "ok"}}])
+        return {"message": {"content": "ok"}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count embeddings and vector searches per RAG query")
+    parser.add_argument("-n", "--queries", type=int, default=100, help="Number of queries to run")
+    parser.add_argument("--embed-ms", type=float, default=5.0, help="Simulated embedding latency")
+    parser.add_argument("--search-ms", type=float, default=2.0, help="Simulated vector search latency")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline = RAGPipeline(persist_directory=tmp)
+        pipeline.embedder._model = FakeModel(delay=args.embed_ms / 1000)
+        pipeline.vector_store._collection = FakeCollection(delay=args.search_ms / 1000)
+        pipeline.llm._client = FakeLLMClient()
+
+        start = time.perf_counter()
+        for i in range(args.queries):
+            pipeline.query(f"question {i}")
+        elapsed = time.perf_counter() - start
+
+        embed_calls = pipeline.embedder.embed_calls
+        search_calls = pipeline.vector_store.search_calls
+
+    print(f"queries:              {args.queries}")
+    print(f"embeddings per query: {embed_calls / args.queries:.2f}")
+    print(f"searches per query:   {search_calls / args.queries:.2f}")
+    print(f"mean query latency:   {elapsed / args.queries * 1000:.2f} ms")
+
+    if embed_calls != args.queries or search_calls != args.queries:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
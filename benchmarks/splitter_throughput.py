@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Iterator
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from corpus import text_document
+from src.chunking.text_splitter import TextSplitter
+
+
+class LegacyTextSplitter(TextSplitter):
+    def _split_text(self, text: str) -> list[str]:
+        return self._recursive_split(text, self.separators)
+
+    def _recursive_split(self, text: str, separators: list[str]) -> list[str]:
+        if not text:
+            return []
+
+        if len(text) <= self.chunk_size:
+            return [text.strip()] if text.strip() else []
+
+        separator = separators[0] if separators else ""
+        remaining_separators = separators[1:] if len(separators) > 1 else []
+
+        if separator:
+            splits = text.split(separator)
+        else:
+            splits = list(text)
+
+        chunks = []
+        current_chunk = ""
+
+        for split in splits:
+            piece = split if not separator else split + separator
+
+            if len(current_chunk) + len(piece) <= self.chunk_size:
+                current_chunk += piece
+            else:
+                if current_chunk:
+                    if len(current_chunk) > self.chunk_size and remaining_separators:
+                        chunks.extend(self._recursive_split(current_chunk, remaining_separators))
+                    else:
+                        chunks.append(current_chunk.strip())
+
+                if len(piece) > self.chunk_size and remaining_separators:
+                    chunks.extend(self._recursive_split(piece, remaining_separators))
+                    current_chunk = ""
+                else:
+                    current_chunk = piece
+
+        if current_chunk.strip():
+            if len(current_chunk) > self.chunk_size and remaining_separators:
+                chunks.extend(self._recursive_split(current_chunk, remaining_separators))
+            else:
+                chunks.append(current_chunk.strip())
+
+        return self._legacy_overlap(chunks)
+
+    def _legacy_overlap(self, chunks: list[str]) -> list[str]:
+        if self.chunk_overlap == 0 or len(chunks) <= 1:
+            return chunks
+
+        overlapped = []
+        for i, chunk in enumerate(chunks):
+            if i > 0 and self.chunk_overlap > 0:
+                overlap_text = chunks[i - 1][-self.chunk_overlap:]
+                if overlap_text and not chunk.startswith(overlap_text):
+                    chunk = overlap_text + " " + chunk
+            overlapped.append(chunk)
+        return overlapped
+
+
+def make_inputs(size: int, seed: int) -> dict[str, str]:
+    prose = text_document(random.Random(seed), size)
+    return {
+        "prose": prose,
+        "single_line": prose.replace("\n", " "),
+        "no_whitespace": "".join(prose.split()),
+    }
+
+
+def random_text(rng: random.Random) -> str:
+    alphabet = ["a", "bc", " ", "  ", "\n", "\n\n", "\n\n\n", ". ", ".", "x" * 40, "word ", "\t"]
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 600)))
+
+
+def random_segments(rng: random.Random, text: str) -> list[str]:
+    segments, start = [], 0
+    while start < len(text):
+        size = rng.randint(1, 200)
+        segments.append(text[start:start + size])
+        start += size
+    return segments
+
+
+def segments_of(text: str, size: int = 1 << 16) -> Iterator[str]:
+    for start in range(0, len(text), size):
+        yield text[start:start + size]
+
+
+def verify(cases: int, seed: int) -> int:
+    rng = random.Random(seed)
+    mismatches = 0
+    for _ in range(cases):
+        text = random_text(rng)
+        chunk_size = rng.choice([1, 3, 10, 37, 100, 512])
+        chunk_overlap = rng.choice([0, 1, 10, 50])
+        separators = rng.choice([None, ["\n\n", " "], ["\n\n\n", "\n\n", ""]])
+        expected = LegacyTextSplitter(chunk_size, chunk_overlap, separators)._split_text(text)
+        splitter = TextSplitter(chunk_size, chunk_overlap, separators)
+        actual = splitter._split_text(text)
+        streamed = list(splitter.iter_split_segments(random_segments(rng, text)))
+        if expected != actual or expected != streamed:
+            mismatches += 1
+            print(f"MISMATCH chunk_size={chunk_size} overlap={chunk_overlap} separators={separators!r}: {text!r}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure TextSplitter throughput on large single documents")
+    parser.add_argument("--size-mb", type=float, default=100.0, help="Size of each input document")
+    parser.add_argument("--chunk-size", type=int, default=512)
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    parser.add_argument("--legacy", action="store_true", help="Also time the previous recursive splitter and compare output")
+    parser.add_argument("--stream", action="store_true", help="Also time splitting the input as a stream of 64K segments")
+    parser.add_argument("--verify", type=int, default=2000, help="Random small inputs checked against the previous splitter")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.verify:
+        mismatches = verify(args.verify, args.seed)
+        print(f"verified {args.verify} random inputs against the previous and streaming splitters: {mismatches} mismatches")
+        if mismatches:
+            sys.exit(1)
+
+    splitter = TextSplitter(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+    legacy = LegacyTextSplitter(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+    print(
+        f"{'input':<14} {'MB':>8} {'chunks':>9} {'seconds':>9} {'MB/s':>8} {'legacy s':>9} {'stream s':>9} {'match':>6}"
+    )
+    for name, text in make_inputs(int(args.size_mb * 1_000_000), args.seed).items():
+        start = time.perf_counter()
+        chunks = list(splitter.iter_split_text(text))
+        seconds = time.perf_counter() - start
+
+        legacy_seconds, stream_seconds, matches = "", "", []
+        if args.legacy:
+            start = time.perf_counter()
+            expected = legacy._split_text(text)
+            legacy_seconds = f"{time.perf_counter() - start:.2f}"
+            matches.append(expected == chunks)
+            del expected
+        if args.stream:
+            start = time.perf_counter()
+            streamed = list(splitter.iter_split_segments(segments_of(text)))
+            stream_seconds = f"{time.perf_counter() - start:.2f}"
+            matches.append(streamed == chunks)
+            del streamed
+        match = ("yes" if all(matches) else "NO") if matches else ""
+
+        size = len(text) / 1e6
+        print(
+            f"{name:<14} {size:>8.1f} {len(chunks):>9} {seconds:>9.2f} {size / seconds:>8.1f} "
+            f"{legacy_seconds:>9} {stream_seconds:>9} {match:>6}"
+        )
+        del chunks
+
+
+if __name__ == "__main__":
+    main()
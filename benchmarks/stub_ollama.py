@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubOllama:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        model: str = "llama3.2",
+        tokens: int = 32,
+        first_token_delay: float = 0.0,
+        token_delay: float = 0.0,
+    ):
+        self.model = model
+        self.tokens = tokens
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.requests = 0
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubOllama":
+        self._thread = threading.Thread(target=self.server.serve_forever, name="stub-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "StubOllama":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.rstrip("/") in ("", "/api/version"):
+                    self._send_json({"version": "0.0.0-stub"})
+                elif self.path == "/api/tags":
+                    self._send_json({"models": [{
+                        "name": stub.model,
+                        "model": stub.model,
+                        "modified_at": datetime.now(timezone.utc).isoformat(),
+                        "size": 0,
+                        "digest": "stub",
+                        "details": {},
+                    }]})
+                else:
+                    self._send_json({"error": "not found"}, status=404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if self.path not in ("/api/chat", "/api/generate"):
+                    self._send_json({"error": "not found"}, status=404)
+                    return
+
+                stub.requests += 1
+                chat = self.path == "/api/chat"
+                words = [f"token{i} " for i in range(stub.tokens)]
+                if not body.get("stream", True):
+                    time.sleep(stub.first_token_delay + stub.token_delay * stub.tokens)
+                    self._send_json(self._message("".join(words), chat, done=True))
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                time.sleep(stub.first_token_delay)
+                for word in words:
+                    self._write_chunk(self._message(word, chat, done=False))
+                    time.sleep(stub.token_delay)
+                self._write_chunk(self._message("", chat, done=True))
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _message(self, text: str, chat: bool, done: bool) -> dict:
+                message = {"model": stub.model, "created_at": datetime.now(timezone.utc).isoformat(), "done": done}
+                if chat:
+                    message["message"] = {"role": "assistant", "content": text}
+                else:
+                    message["response"] = text
+                if done:
+                    message["done_reason"] = "stop"
+                    message["eval_count"] = stub.tokens
+                return message
+
+            def _write_chunk(self, payload: dict) -> None:
+                data = json.dumps(payload).encode() + b"\n"
+                self.wfile.write(b"%x\r\n" % len(data) + data + b"\r\n")
+                self.wfile.flush()
+
+            def _send_json(self, payload: dict, status: int = 200) -> None:
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a minimal Ollama-compatible API for offline benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--model", default="llama3.2")
+    parser.add_argument("--tokens", type=int, default=32, help="Tokens per answer")
+    parser.add_argument("--first-token-ms", type=float, default=0.0, help="Simulated time to first token")
+    parser.add_argument("--token-ms", type=float, default=0.0, help="Simulated time per generated token")
+    args = parser.parse_args()
+
+    stub = StubOllama(
+        host=args.host,
+        port=args.port,
+        model=args.model,
+        tokens=args.tokens,
+        first_token_delay=args.first_token_ms / 1000,
+        token_delay=args.token_ms / 1000,
+    )
+    print(f"Stub Ollama listening on {stub.url}")
+    stub.server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
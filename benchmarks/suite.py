@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+import argparse
+import hashlib
+import json
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from corpus import generate_corpus, make_questions
+from stub_ollama import StubOllama
+from src.rag_pipeline import RAGPipeline
+
+LOWER_IS_BETTER = ("p50_ms",)
+HIGHER_IS_BETTER = ("items_per_second",)
+
+
+class HashingModel:
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            digest = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=4).digest(), "little")
+            vector[digest % self.dimension] += 1.0 if digest & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, texts, batch_size: int = 32, show_progress_bar: bool = False, convert_to_numpy: bool = True):
+        if isinstance(texts, str):
+            return self._vector(texts)
+        return np.stack([self._vector(text) for text in texts]) if texts else np.zeros((0, self.dimension), np.float32)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def throughput(seconds: float, items: int, nbytes: int = 0) -> dict:
+    metrics = {
+        "seconds": round(seconds, 4),
+        "items": items,
+        "items_per_second": round(items / seconds, 2) if seconds else None,
+    }
+    if nbytes:
+        metrics["mb_per_second"] = round(nbytes / 1e6 / seconds, 3) if seconds else None
+    return metrics
+
+
+def latency(samples: list[float]) -> dict:
+    return {
+        "items": len(samples),
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "mean_ms": round(statistics.mean(samples) * 1000, 3),
+    }
+
+
+def run_suite(args: argparse.Namespace) -> dict:
+    stages: dict[str, dict] = {}
+    with tempfile.TemporaryDirectory() as tmp, StubOllama(
+        first_token_delay=args.llm_first_token_ms / 1000,
+        token_delay=args.llm_token_ms / 1000,
+    ) as stub:
+        tmp_path = Path(tmp)
+        corpus = generate_corpus(tmp_path / "corpus", args.files, args.file_size, args.pdf_pages, seed=args.seed)
+
+        pipeline = RAGPipeline(
+            persist_directory=str(tmp_path / "store"),
+            vector_backend=args.backend,
+            embedding_cache_dir=str(tmp_path / "embedding_cache"),
+            query_cache_size=0,
+            answer_cache_size=0,
+            ollama_base_url=stub.url,
+            ingest_workers=1,
+            retrieval_mode=args.retrieval_mode,
+        )
+        if args.embedder == "hashing":
+            pipeline.embedder._model = HashingModel()
+
+        documents = {}
+        for kind, paths in corpus.items():
+            nbytes = sum(path.stat().st_size for path in paths)
+            start = time.perf_counter()
+            documents[kind] = [pipeline.loader.load(path) for path in paths]
+            stages[f"load.{kind}"] = throughput(time.perf_counter() - start, len(paths), nbytes)
+
+        chunks = []
+        for name, splitter, kinds in (
+            ("split.text", pipeline.text_splitter, ("text", "markdown", "pdf")),
+            ("split.code", pipeline.code_splitter, ("code",)),
+        ):
+            docs = [doc for kind in kinds for doc in documents[kind]]
+            start = time.perf_counter()
+            split = [chunk for doc in docs for chunk in splitter.split_document(doc)]
+            stages[name] = throughput(time.perf_counter() - start, len(split), sum(len(doc.content.encode()) for doc in docs))
+            chunks.extend(split)
+
+        texts = [chunk.content for chunk in chunks]
+        start = time.perf_counter()
+        pipeline.embedder.embed_batch(texts)
+        stages["embed.batch"] = throughput(time.perf_counter() - start, len(texts))
+
+        start = time.perf_counter()
+        for i in range(0, len(chunks), args.batch_size):
+            pipeline.vector_store.add_chunks(chunks[i:i + args.batch_size])
+        stages["store.add"] = throughput(time.perf_counter() - start, len(chunks))
+
+        samples = []
+        for question in make_questions(args.queries, seed=args.seed + 1):
+            start = time.perf_counter()
+            pipeline.vector_store.search(question, n_results=args.top_k)
+            samples.append(time.perf_counter() - start)
+        stages["store.search"] = latency(samples)
+
+        samples = []
+        for question in make_questions(args.queries, seed=args.seed + 4):
+            start = time.perf_counter()
+            results = pipeline.retriever.retrieve(question, top_k=args.top_k)
+            samples.append(time.perf_counter() - start)
+            if len(results) > args.top_k:
+                raise RuntimeError(f"retrieve returned {len(results)} results for top_k={args.top_k}")
+        stages["retriever.retrieve"] = latency(samples)
+
+        pipeline.llm.check_connection()
+        samples = []
+        for question in make_questions(args.queries, seed=args.seed + 2):
+            start = time.perf_counter()
+            pipeline.query(question, top_k=args.top_k)
+            samples.append(time.perf_counter() - start)
+        stages["pipeline.query"] = latency(samples)
+
+        samples = []
+        for question in make_questions(args.queries, seed=args.seed + 3):
+            start = time.perf_counter()
+            stream = pipeline.query(question, top_k=args.top_k, stream=True)
+            next(stream)
+            samples.append(time.perf_counter() - start)
+            for _ in stream:
+                pass
+        stages["pipeline.query_first_token"] = latency(samples)
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": args.backend,
+            "retrieval_mode": args.retrieval_mode,
+            "embedder": args.embedder,
+            "files_per_type": args.files,
+            "file_size": args.file_size,
+            "pdf_pages": args.pdf_pages,
+            "queries": args.queries,
+        },
+        "stages": stages,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[dict]:
+    rows = []
+    for stage, metrics in results["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if base is None:
+            continue
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            current, previous = metrics.get(metric), base.get(metric)
+            if not current or not previous:
+                continue
+            change = current / previous - 1
+            worse = change > threshold if metric in LOWER_IS_BETTER else change < -threshold
+            rows.append({
+                "stage": stage,
+                "metric": metric,
+                "baseline": previous,
+                "current": current,
+                "change": round(change, 4),
+                "regression": worse,
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time each ingest and query stage on a synthetic corpus")
+    parser.add_argument("--files", type=int, default=20, help="Files per document type")
+    parser.add_argument("--file-size", type=int, default=20_000, help="Approximate characters per text/code file")
+    parser.add_argument("--pdf-pages", type=int, default=10, help="Pages per synthetic PDF")
+    parser.add_argument("--queries", type=int, default=50, help="Queries per search/query stage")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=256, help="Chunks per add_chunks call")
+    parser.add_argument("--backend", choices=["chroma", "matrix"], default="chroma")
+    parser.add_argument("--retrieval-mode", choices=["dense", "hybrid"], default="dense")
+    parser.add_argument(
+        "--embedder", choices=["model", "hashing"], default="model",
+        help="Use the configured sentence-transformers model or a deterministic hashing stand-in",
+    )
+    parser.add_argument("--llm-first-token-ms", type=float, default=0.0, help="Stub Ollama time to first token")
+    parser.add_argument("--llm-token-ms", type=float, default=0.0, help="Stub Ollama time per token")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results JSON to this file instead of stdout")
+    parser.add_argument("--baseline", help="Compare against a previously saved results JSON")
+    parser.add_argument("--save-baseline", help="Also write the results to this baseline file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative change counted as a regression")
+    args = parser.parse_args()
+
+    results = run_suite(args)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        results["comparison"] = compare(results, baseline, args.threshold)
+
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload + "\n")
+    else:
+        print(payload)
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(payload + "\n")
+
+    regressions = [row for row in results.get("comparison", []) if row["regression"]]
+    for row in regressions:
+        print(
+            f"REGRESSION {row['stage']} {row['metric']}: {row['baseline']} -> {row['current']} "
+            f"({row['change']:+.1%})",
+            file=sys.stderr,
+        )
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from corpus import markdown_document, text_document
+from src.chunking import TextSplitter, TokenTextSplitter
+from src.embeddings import Embedder
+from src.ingestion import DocumentLoader
+
+
+def load_texts(args: argparse.Namespace) -> list[str]:
+    if args.directory:
+        loader = DocumentLoader()
+        return [loader.load(path).content for path in loader.iter_files(args.directory)]
+    rng = random.Random(args.seed)
+    return [
+        (text_document if i % 2 == 0 else markdown_document)(rng, args.file_size)
+        for i in range(args.files)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare character and token chunking against the embedding window")
+    parser.add_argument("--directory", help="Chunk the documents in this directory instead of a synthetic corpus")
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--file-size", type=int, default=50_000)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--chunk-size", type=int, default=512, help="Character chunk size")
+    parser.add_argument("--chunk-overlap", type=int, default=50, help="Character chunk overlap")
+    parser.add_argument("--token-overlap", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    embedder = Embedder(model_name=args.model)
+    window = embedder.max_seq_length
+    texts = load_texts(args)
+    splitters = {
+        "characters": TextSplitter(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap),
+        "tokens": TokenTextSplitter(
+            model_name=args.model,
+            chunk_overlap=args.token_overlap,
+            max_seq_length=window,
+            tokenizer=embedder.tokenizer,
+        ),
+    }
+
+    print(f"model: {args.model}, window: {window} tokens, documents: {len(texts)}, chars: {sum(map(len, texts))}")
+    print(f"{'mode':<12} {'chunks':>8} {'split s':>8} {'mean tok':>9} {'fill':>6} {'truncated':>10} {'lost tok':>9}")
+    for name, splitter in splitters.items():
+        start = time.perf_counter()
+        chunks = [chunk for text in texts for chunk in splitter.iter_split_text(text)]
+        seconds = time.perf_counter() - start
+        counts = embedder.count_tokens(chunks)
+        truncated = [count for count in counts if count > window]
+        print(
+            f"{name:<12} {len(chunks):>8} {seconds:>8.2f} {statistics.mean(counts):>9.1f} "
+            f"{statistics.mean(min(count, window) for count in counts) / window:>6.1%} "
+            f"{len(truncated) / len(counts):>10.1%} {sum(count - window for count in truncated):>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
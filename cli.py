@@ -1,9 +1,45 @@
 #!/usr/bin/env python3
 import argparse
+import atexit
+from collections import Counter
+import json
 import sys
 from pathlib import Path
 
 
+def print_stats(stats):
+    print(f"Documents indexed: {stats['vector_store']['count']} chunks")
+    cache_stats = stats["embedder"].get("cache")
+    if cache_stats:
+        print(f"Embedding cache: {cache_stats['entries']} entries, {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    query_cache_stats = stats["retrieval_cache"]
+    if query_cache_stats:
+        print(f"Query cache: {query_cache_stats['entries']} entries, hit rate {query_cache_stats['hit_rate']:.1%}")
+    answer_cache_stats = stats["answer_cache"]
+    if answer_cache_stats:
+        print(f"Answer cache: {answer_cache_stats['entries']} entries, hit rate {answer_cache_stats['hit_rate']:.1%}")
+    reranker_stats = stats["reranker"]
+    if reranker_stats:
+        print(
+            f"Reranker: {reranker_stats['model_name']}, {reranker_stats['reranked']} reranked, "
+            f"{reranker_stats['fallbacks']} fallbacks, last {reranker_stats['last_latency_ms']} ms"
+        )
+    ollama_stats = stats["ollama"]
+    print(
+        f"Ollama: {'connected' if ollama_stats['connected'] else 'disconnected'}, "
+        f"{ollama_stats['in_flight']}/{ollama_stats['num_parallel']} generating, "
+        f"{ollama_stats['queue_depth']} queued, max wait {ollama_stats['queue_wait_seconds_max']:.2f}s"
+    )
+    latency_stats = stats.get("latency")
+    if latency_stats:
+        print(f"{'Stage':<20} {'calls':>8} {'avg ms':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+        for stage, latency in latency_stats.items():
+            print(
+                f"{stage:<20} {latency['count']:>8} {latency['avg_ms']:>10.2f} {latency['p50_ms']:>10.2f} "
+                f"{latency['p95_ms']:>10.2f} {latency['p99_ms']:>10.2f}"
+            )
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="RAG Document Assistant CLI",
@@ -11,12 +47,21 @@ def main():
     )
     subparsers = parser.add_subparsers(dest="command", help="Command to run")
     ingest_parser = subparsers.add_parser("ingest", help="Ingest documents")
-    ingest_parser.add_argument("path", help="File or directory path")
+    ingest_parser.add_argument("paths", nargs="+", help="File or directory paths")
     ingest_parser.add_argument("-d", "--directory", action="store_true", help="Treat path as directory")
     query_parser = subparsers.add_parser("query", help="Query the RAG system")
-    query_parser.add_argument("question", help="Question to ask")
+    query_parser.add_argument("question", nargs="?", help="Question to ask")
+    query_parser.add_argument("-f", "--file", help="File with one question per line, answered as a batch")
     query_parser.add_argument("-k", "--top-k", type=int, default=5, help="Number of documents to retrieve")
-    subparsers.add_parser("stats", help="Show system statistics")
+    search_parser = subparsers.add_parser("search", help="Retrieve matching chunks without generating an answer")
+    search_parser.add_argument("question", help="Search query")
+    search_parser.add_argument("-k", "--top-k", type=int, default=5, help="Number of chunks to retrieve")
+    search_parser.add_argument(
+        "--filter", action="append", default=[], metavar="KEY=VALUE", help="Metadata filter (repeatable)"
+    )
+    search_parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    stats_parser = subparsers.add_parser("stats", help="Show system statistics")
+    stats_parser.add_argument("--server", metavar="URL", help="Read statistics from a running API server")
     serve_parser = subparsers.add_parser("serve", help="Start a server")
     serve_group = serve_parser.add_mutually_exclusive_group(required=True)
     serve_group.add_argument("--api", action="store_true", help="Start FastAPI server")
@@ -26,30 +71,56 @@ def main():
     if not args.command:
         parser.print_help()
         return
+    if args.command == "stats" and args.server:
+        from urllib.request import urlopen
+        with urlopen(f"{args.server.rstrip('/')}/stats") as response:
+            print_stats(json.load(response))
+        return
     from src.rag_pipeline import RAGPipeline
     from src.config import settings
-    pipeline = RAGPipeline(
-        collection_name=settings.chroma_collection,
-        persist_directory=settings.chroma_persist_dir,
-        model=settings.ollama_model,
-        chunk_size=settings.chunk_size,
-        chunk_overlap=settings.chunk_overlap,
-        top_k=settings.top_k,
-    )
+    pipeline = RAGPipeline.from_settings(settings)
+    atexit.register(pipeline.close)
     if args.command == "ingest":
-        path = Path(args.path)
-        if args.directory:
-            results = pipeline.ingest_directory(str(path))
-            print(f"Ingested {len(results)} files")
-        else:
-            result = pipeline.ingest_file(str(path))
-            print(f"Ingested: {result['filename']}")
+        with pipeline.make_sink() as sink:
+            for path in map(Path, args.paths):
+                if args.directory:
+                    counts = Counter(result["status"] for result in pipeline.iter_ingest_directory(str(path)))
+                    print(f"{path}: processed {sum(counts.values())} files: " + ", ".join(f"{n} {status}" for status, n in sorted(counts.items())))
+                else:
+                    result = pipeline.ingest_file(str(path), sink=sink)
+                    print(f"Ingested: {result['filename']} ({result['status']}, {result['chunks_written']} chunks written)")
     elif args.command == "query":
-        result = pipeline.query(args.question, top_k=args.top_k)
-        print(result["answer"])
+        if args.file:
+            questions = [line.strip() for line in Path(args.file).read_text().splitlines() if line.strip()]
+            for result in pipeline.query_many(questions, top_k=args.top_k):
+                print(f"Q: {result['question']}\nA: {result['answer']}\n")
+        elif args.question:
+            result = pipeline.query(args.question, top_k=args.top_k)
+            print(result["answer"])
+        else:
+            query_parser.error("a question or --file is required")
+    elif args.command == "search":
+        filters = {}
+        for condition in args.filter:
+            key, sep, value = condition.partition("=")
+            if not sep:
+                search_parser.error(f"invalid filter {condition!r}, expected KEY=VALUE")
+            try:
+                filters[key] = json.loads(value)
+            except ValueError:
+                filters[key] = value
+        results = pipeline.retriever.retrieve(args.question, top_k=args.top_k, filter_metadata=filters)
+        if args.json:
+            print(json.dumps([
+                {"id": r["id"], "score": r.get("score"), "metadata": r["metadata"], "content": r["content"]}
+                for r in results
+            ], indent=2))
+        else:
+            for i, r in enumerate(results, 1):
+                snippet = " ".join(r["content"].split())[:160]
+                print(f"{i}. [{r.get('score', 0):.3f}] {r['id']} ({r['metadata'].get('filename', 'Unknown')})\n   {snippet}")
     elif args.command == "stats":
-        stats = pipeline.get_stats()
-        print(f"Documents indexed: {stats['vector_store']['count']} chunks")
+        print_stats(pipeline.get_stats())
     elif args.command == "serve":
         if args.api:
             import uvicorn
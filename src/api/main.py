@@ -1,27 +1,66 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from functools import partial
+from pathlib import Path
+from pydantic import BaseModel, Field
 from typing import Optional
-import tempfile
+import anyio
 import os
 import json
 
 from src.rag_pipeline import RAGPipeline
+from src.ingestion import IngestJobQueue
+from src.llm import OllamaUnavailableError
 from src.config import settings
+from src.metrics import metrics, start_trace
+
+pipeline = RAGPipeline.from_settings(settings)
+
+job_queue = IngestJobQueue(
+    pipeline,
+    db_path=settings.ingest_job_db or Path(settings.chroma_persist_dir) / "ingest_jobs.sqlite3",
+    spool_dir=settings.ingest_spool_dir or Path(settings.chroma_persist_dir) / "spool",
+    workers=settings.ingest_job_workers,
+    max_queued=settings.ingest_job_max_queued,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    job_queue.start()
+    await anyio.to_thread.run_sync(pipeline.llm.check_connection)
+    yield
+    job_queue.shutdown(wait=False)
+    pipeline.close()
+
 
 app = FastAPI(
     title="RAG Document Assistant",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
-pipeline = RAGPipeline(
-    collection_name=settings.chroma_collection,
-    persist_directory=settings.chroma_persist_dir,
-    model=settings.ollama_model,
-    chunk_size=settings.chunk_size,
-    chunk_overlap=settings.chunk_overlap,
-    top_k=settings.top_k,
-)
+query_limiter = anyio.CapacityLimiter(settings.api_query_concurrency)
+ingest_limiter = anyio.CapacityLimiter(settings.api_ingest_concurrency)
+admin_limiter = anyio.CapacityLimiter(settings.api_admin_concurrency)
+
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    if not settings.api_trace_header:
+        return await call_next(request)
+    with start_trace(request.headers.get(settings.api_trace_header)) as trace:
+        response = await call_next(request)
+        response.headers[settings.api_trace_header] = trace.trace_id
+        if trace.stages:
+            response.headers["Server-Timing"] = trace.server_timing()
+    return response
+
+
+async def run_blocking(limiter: anyio.CapacityLimiter, func, *args, **kwargs):
+    return await anyio.to_thread.run_sync(partial(func, *args, **kwargs), limiter=limiter)
 
 
 class QueryRequest(BaseModel):
@@ -30,9 +69,41 @@ class QueryRequest(BaseModel):
     stream: bool = False
 
 
+class RetrieveRequest(BaseModel):
+    question: str
+    top_k: Optional[int] = None
+    filter: Optional[dict] = None
+    include_content: bool = True
+
+
+class RetrieveBatchRequest(BaseModel):
+    questions: list[str] = Field(min_length=1, max_length=settings.api_max_batch_size)
+    top_k: Optional[int] = None
+    filter: Optional[dict] = None
+    include_content: bool = True
+
+
+class RetrievedChunk(BaseModel):
+    id: str
+    content: Optional[str] = None
+    metadata: dict
+    score: Optional[float] = None
+
+
+class RetrieveResponse(BaseModel):
+    query: str
+    chunks: list[RetrievedChunk]
+
+
+class RetrieveBatchResponse(BaseModel):
+    results: list[RetrieveResponse]
+
+
 class QueryResponse(BaseModel):
     answer: str
     sources: list[str]
+    cached: bool = False
+    prompt_tokens: int = 0
 
 
 class IngestResponse(BaseModel):
@@ -40,13 +111,35 @@ class IngestResponse(BaseModel):
     doc_id: str
     chunks: int
     type: str
+    status: str = "added"
+    chunks_written: int = 0
+
+
+class IngestJobResponse(BaseModel):
+    job_id: str
+    filename: str
+    source: str
+    status: str
+    pages_parsed: int
+    chunks_written: int
+    chunks_embedded: int
+    result: Optional[IngestResponse] = None
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
 
 
 class StatsResponse(BaseModel):
     vector_store: dict
+    embedder: dict = {}
+    retrieval_cache: dict = {}
+    answer_cache: dict = {}
+    reranker: dict = {}
+    latency: dict = {}
     ollama_connected: bool
     available_models: list[str]
     current_model: str
+    ollama: dict = {}
 
 
 @app.get("/health")
@@ -56,12 +149,39 @@ async def health_check():
 
 @app.get("/stats", response_model=StatsResponse)
 async def get_stats():
-    return pipeline.get_stats()
+    return await run_blocking(admin_limiter, pipeline.get_stats)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/ingest", response_model=IngestJobResponse, status_code=202)
+async def ingest_file(file: UploadFile = File(...), source: Optional[str] = Form(None)):
+    check_supported(file.filename)
+    return await submit_upload(file, source)
+
 
+@app.post("/ingest/batch", response_model=list[IngestJobResponse], status_code=202)
+async def ingest_batch(files: list[UploadFile] = File(...)):
+    for file in files:
+        check_supported(file.filename)
+    return [await submit_upload(file) for file in files]
 
-@app.post("/ingest", response_model=IngestResponse)
-async def ingest_file(file: UploadFile = File(...)):
-    suffix = os.path.splitext(file.filename)[1].lower()
+
+@app.get("/ingest/{job_id}", response_model=IngestJobResponse)
+async def ingest_status(job_id: str):
+    job = await run_blocking(admin_limiter, job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown ingest job: {job_id}")
+    return asdict(job)
+
+
+def check_supported(filename: Optional[str]) -> None:
+    if not filename:
+        raise HTTPException(status_code=400, detail="Uploaded file has no filename")
+    suffix = os.path.splitext(filename)[1].lower()
 
     if suffix not in pipeline.loader.SUPPORTED_EXTENSIONS:
         raise HTTPException(
@@ -69,24 +189,18 @@ async def ingest_file(file: UploadFile = File(...)):
             detail=f"Unsupported file type: {suffix}. Supported: {pipeline.loader.SUPPORTED_EXTENSIONS}"
         )
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
 
+async def submit_upload(file: UploadFile, source: Optional[str] = None) -> dict:
     try:
-        result = pipeline.ingest_file(tmp_path)
-        result["filename"] = file.filename
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        os.unlink(tmp_path)
+        job = await run_blocking(ingest_limiter, job_queue.submit, file.file, file.filename, source)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return asdict(job)
 
 
 @app.post("/query")
 async def query(request: QueryRequest):
-    if not pipeline.llm.check_connection():
+    if not pipeline.llm.is_available():
         raise HTTPException(
             status_code=503,
             detail="Ollama is not running. Start it with 'ollama serve'"
@@ -99,23 +213,83 @@ async def query(request: QueryRequest):
         )
 
     try:
-        result = pipeline.query(request.question, top_k=request.top_k, stream=False)
-        return QueryResponse(answer=result["answer"], sources=result["sources"])
+        result = await run_blocking(query_limiter, pipeline.query, request.question, top_k=request.top_k, stream=False)
+        return QueryResponse(
+            answer=result["answer"],
+            sources=result["sources"],
+            cached=result["cached"],
+            prompt_tokens=result["prompt_tokens"],
+        )
+    except OllamaUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def json_response(payload: dict) -> Response:
+    return Response(content=json.dumps(payload, separators=(",", ":")), media_type="application/json")
+
+
+def serialize_chunks(chunks: list[dict], include_content: bool) -> list[dict]:
+    return [
+        {
+            "id": chunk["id"],
+            "score": chunk.get("score"),
+            "metadata": chunk["metadata"],
+            **({"content": chunk["content"]} if include_content else {}),
+        }
+        for chunk in chunks
+    ]
+
+
+@app.post("/retrieve", response_model=RetrieveResponse)
+async def retrieve(request: RetrieveRequest):
+    try:
+        chunks = await run_blocking(
+            query_limiter,
+            pipeline.retriever.retrieve,
+            request.question,
+            top_k=request.top_k,
+            filter_metadata=request.filter,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_response({"query": request.question, "chunks": serialize_chunks(chunks, request.include_content)})
+
+
+@app.post("/retrieve/batch", response_model=RetrieveBatchResponse)
+async def retrieve_batch(request: RetrieveBatchRequest):
+    try:
+        batches = await run_blocking(
+            query_limiter,
+            pipeline.retriever.retrieve_many,
+            request.questions,
+            top_k=request.top_k,
+            filter_metadata=request.filter,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_response({
+        "results": [
+            {"query": question, "chunks": serialize_chunks(chunks, request.include_content)}
+            for question, chunks in zip(request.questions, batches)
+        ]
+    })
+
+
 async def stream_response(question: str, top_k: Optional[int]):
     try:
-        for chunk in pipeline.query(question, top_k=top_k, stream=True):
-            yield f"data: {json.dumps(chunk)}\n\n"
+        async with query_limiter:
+            chunks = await anyio.to_thread.run_sync(partial(pipeline.query, question, top_k=top_k, stream=True))
+            while (chunk := await anyio.to_thread.run_sync(next, chunks, None)) is not None:
+                yield f"data: {json.dumps(chunk)}\n\n"
     except Exception as e:
         yield f"data: {json.dumps({'error': str(e)})}\n\n"
 
 
 @app.delete("/documents")
 async def clear_documents():
-    pipeline.clear()
+    await run_blocking(admin_limiter, pipeline.clear)
     return {"status": "cleared"}
 
 
@@ -1,3 +1,4 @@
-from .text_splitter import TextSplitter
+from .code_splitter import CodeSplitter
+from .text_splitter import TextSplitter, TokenTextSplitter
 
-__all__ = ["TextSplitter"]
+__all__ = ["CodeSplitter", "TextSplitter", "TokenTextSplitter"]
@@ -0,0 +1,285 @@
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+import ast
+import re
+
+from src.ingestion import Document, StreamingDocument
+from .text_splitter import Chunk, TextSplitter
+
+BRACE_LANGUAGES = {"javascript", "typescript", "java", "c", "cpp", "go", "rust", "php", "swift", "kotlin", "css"}
+
+_STRINGS = r'"""[\s\S]*?(?:"""|\Z)|"(?:\\.|[^"\\\n])*"?|`(?:\\.|[^`\\])*`?'
+BRACE_TOKENS = re.compile(
+    rf"//[^\n]*|/\*[\s\S]*?(?:\*/|\Z)|{_STRINGS}|'(?:\\.|[^'\\\n])*'?|[{{}}()\[\];\n]"
+)
+RUST_TOKENS = re.compile(
+    rf"//[^\n]*|/\*[\s\S]*?(?:\*/|\Z)|{_STRINGS}|'(?:\\.[^'\n]*|[^'\\\n])'|[{{}}()\[\];\n]"
+)
+BLANK_LINE = re.compile(r"[ \t]*\r?\n")
+UNIT_TAIL = re.compile(r"[ \t;,]*\r?\n?")
+COMMENTS = re.compile(r"//[^\n]*|/\*[\s\S]*?\*/")
+ANNOTATIONS = re.compile(r"#\[[^\]]*\]|@\w+(?:\([^)]*\))?")
+
+CONTAINER_PATTERN = re.compile(
+    r"\b(?:class|interface|struct|enum|trait|namespace|module|object|protocol|extension)\s+([A-Za-z_$][\w$]*)"
+)
+IMPL_PATTERN = re.compile(r"\bimpl\b(?:\s*<[^>{]*>)?\s+([\w:]+)(?:\s*<[^>{]*>)?(?:\s+for\s+([\w:]+))?")
+GO_TYPE_PATTERN = re.compile(r"\btype\s+([A-Za-z_]\w*)\s+(?:struct|interface)\b")
+GO_METHOD_PATTERN = re.compile(r"\bfunc\s*\(\s*\w*\s*\*?\s*([A-Za-z_]\w*)[^)]*\)\s*([A-Za-z_]\w*)")
+FUNCTION_PATTERN = re.compile(r"\b(?:function\s*\*?|func|fn|fun)\s+(?:<[^>]*>\s*)?(?:[\w.]+\.)?&?([A-Za-z_$][\w$]*)")
+ASSIGNMENT_PATTERN = re.compile(r"\b(?:const|let|var|type)\s+([A-Za-z_$][\w$]*)\s*(?::[^=;{]+)?=")
+CALLABLE_PATTERN = re.compile(r"([A-Za-z_~$][\w:~$]*)\s*(?:<[^<>(]*>)?\s*\(")
+NON_SYMBOLS = {
+    "if", "for", "while", "switch", "return", "catch", "sizeof", "typeof", "new", "function", "super", "this",
+    "else", "do", "try", "with", "await", "yield", "match", "when", "defined",
+}
+
+
+@dataclass
+class CodeUnit:
+    start: int
+    end: int
+    symbols: list[str] = field(default_factory=list)
+    children: list["CodeUnit"] = field(default_factory=list)
+
+
+class CodeSplitter(TextSplitter):
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 100,
+    ):
+        code_separators = [
+            "\nclass ",
+            "\ndef ",
+            "\n\ndef ",
+            "\n\n",
+            "\n",
+            " ",
+            "",
+        ]
+        super().__init__(chunk_size, chunk_overlap, code_separators)
+        self.line_splitter = TextSplitter(chunk_size, chunk_overlap, ["\n\n", "\n", " ", ""])
+
+    def iter_split_document(self, document: Document | StreamingDocument) -> Iterator[Chunk]:
+        language = document.metadata.get("language")
+        if language != "python" and language not in BRACE_LANGUAGES:
+            yield from super().iter_split_document(document)
+            return
+
+        if isinstance(document, StreamingDocument):
+            document = Document(content=document.content, metadata=document.metadata, doc_id=document.doc_id)
+        text = document.content
+        units = self.python_units(text) if language == "python" else self.brace_units(text, language)
+        if not units:
+            yield from super().iter_split_document(document)
+            return
+
+        chunk_index = 0
+        line, line_pos = 1, 0
+        for group in self._pack(self._flatten(units)):
+            start, end = group[0].start, group[-1].end
+            content = self._clean(text[start:end])
+            if not content:
+                continue
+            content_start = text.index(content, start)
+            line += text.count("\n", line_pos, content_start)
+            line_pos = content_start
+            symbols = list(dict.fromkeys(symbol for unit in group for symbol in unit.symbols))
+            metadata = {"symbols": ", ".join(symbols)} if symbols else {}
+
+            if len(content) <= self.chunk_size:
+                parts = [(content, line, line + content.count("\n"))]
+            else:
+                parts = self._part_lines(content, line)
+            for part, start_line, end_line in parts:
+                yield Chunk(
+                    content=part,
+                    metadata={
+                        **document.metadata,
+                        "doc_id": document.doc_id,
+                        "chunk_index": chunk_index,
+                        "start_line": start_line,
+                        "end_line": end_line,
+                        **metadata,
+                    },
+                    chunk_index=chunk_index,
+                    doc_id=document.doc_id,
+                )
+                chunk_index += 1
+
+    def _part_lines(self, content: str, line: int) -> Iterator[tuple[str, int, int]]:
+        cursor = line_pos = 0
+        for part in self.line_splitter.iter_split_text(content):
+            core, pos = part, content.find(part, cursor)
+            space = part.find(" ")
+            while pos < 0 and space >= 0:
+                core = part[space + 1:]
+                pos = content.find(core, cursor)
+                space = part.find(" ", space + 1)
+            if pos < 0:
+                core, pos = "", cursor
+            line += content.count("\n", line_pos, pos)
+            line_pos = pos
+            cursor = pos + len(core)
+            yield part, line, line + core.count("\n")
+
+    def _flatten(self, units: list[CodeUnit]) -> Iterator[CodeUnit]:
+        for unit in units:
+            if unit.children and unit.end - unit.start > self.chunk_size:
+                yield from self._flatten(unit.children)
+            else:
+                yield unit
+
+    def _pack(self, units: Iterator[CodeUnit]) -> Iterator[list[CodeUnit]]:
+        group, size = [], 0
+        for unit in units:
+            length = unit.end - unit.start
+            if group and size + length > self.chunk_size:
+                yield group
+                group, size = [], 0
+            group.append(unit)
+            size += length
+        if group:
+            yield group
+
+    @staticmethod
+    def _clean(text: str) -> str:
+        lines = text.split("\n")
+        while lines and not lines[0].strip():
+            lines.pop(0)
+        return "\n".join(lines).rstrip()
+
+    def python_units(self, text: str) -> Optional[list[CodeUnit]]:
+        try:
+            tree = ast.parse(text)
+        except (SyntaxError, ValueError):
+            return None
+        line_starts = [0] + [match.end() for match in re.finditer("\n", text)]
+        return self._python_body(tree.body, line_starts, 0, len(text), None)
+
+    def _python_body(
+        self,
+        body: list[ast.stmt],
+        line_starts: list[int],
+        start: int,
+        end: int,
+        parent: Optional[str],
+    ) -> list[CodeUnit]:
+        units = []
+        for i, node in enumerate(body):
+            if i == len(body) - 1 or node.end_lineno >= len(line_starts):
+                node_end = end
+            else:
+                node_end = max(line_starts[node.end_lineno], start)
+            unit = CodeUnit(start, node_end)
+            if parent and i == 0:
+                unit.symbols.append(parent)
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                name = f"{parent}.{node.name}" if parent else node.name
+                unit.symbols.append(name)
+                if isinstance(node, ast.ClassDef) and node.body:
+                    unit.children = self._python_body(node.body, line_starts, start, node_end, name)
+            units.append(unit)
+            start = node_end
+        return units
+
+    def brace_units(self, text: str, language: str) -> list[CodeUnit]:
+        return self._brace_body(text, 0, len(text), language, None)
+
+    def _brace_body(self, text: str, start: int, end: int, language: str, parent: Optional[str]) -> list[CodeUnit]:
+        tokens = RUST_TOKENS if language == "rust" else BRACE_TOKENS
+        spans = []
+        unit_start = start
+        depth = paren = 0
+        body = None
+        pos = start
+        while True:
+            match = tokens.search(text, pos, end)
+            if match is None:
+                break
+            token = match.group()
+            pos = match.end()
+            closed = None
+            if token == "\n":
+                if (
+                    depth == 0 and paren == 0
+                    and BLANK_LINE.match(text, pos, end)
+                    and text[unit_start:match.start()].strip()
+                ):
+                    closed = pos
+            elif token in "([":
+                paren += 1
+            elif token in ")]":
+                paren = max(paren - 1, 0)
+            elif token == "{":
+                if depth == 0 and paren == 0 and body is None:
+                    body = [match.start(), None]
+                depth += 1
+            elif token == "}":
+                depth = max(depth - 1, 0)
+                if depth == 0 and paren == 0:
+                    if body is not None and body[1] is None:
+                        body[1] = match.start()
+                    closed = UNIT_TAIL.match(text, pos, end).end()
+            elif token == ";" and depth == 0 and paren == 0:
+                closed = UNIT_TAIL.match(text, pos, end).end()
+            if closed is not None:
+                spans.append((unit_start, closed, body))
+                unit_start = pos = closed
+                depth = paren = 0
+                body = None
+
+        if text[unit_start:end].strip():
+            spans.append((unit_start, end, body if body is not None and body[1] is not None else None))
+        elif spans:
+            spans[-1] = (spans[-1][0], end, spans[-1][2])
+
+        units = []
+        for i, (unit_start, unit_end, body) in enumerate(spans):
+            header = text[unit_start:body[0]] if body is not None else text[unit_start:unit_end]
+            symbol, container = self._brace_symbol(header, language)
+            unit = CodeUnit(unit_start, unit_end)
+            if parent and i == 0:
+                unit.symbols.append(parent)
+            if symbol:
+                symbol = f"{parent}.{symbol}" if parent else symbol
+                unit.symbols.append(symbol)
+            if container and body is not None:
+                children = self._brace_body(text, body[0] + 1, body[1], language, symbol or parent)
+                if children:
+                    children[0].start = unit_start
+                    children[-1].end = unit_end
+                    unit.children = children
+            units.append(unit)
+        return units
+
+    @staticmethod
+    def _brace_symbol(header: str, language: str) -> tuple[Optional[str], bool]:
+        if language == "css":
+            selector = " ".join(COMMENTS.sub("", header).split())
+            return selector[:80] or None, selector.startswith("@")
+
+        header = ANNOTATIONS.sub("", COMMENTS.sub("", header))
+        match = IMPL_PATTERN.search(header)
+        if match and language == "rust":
+            return match.group(2) or match.group(1), True
+        match = GO_TYPE_PATTERN.search(header) if language == "go" else None
+        if match:
+            return match.group(1), True
+        match = GO_METHOD_PATTERN.search(header) if language == "go" else None
+        if match:
+            return f"{match.group(1)}.{match.group(2)}", False
+        match = FUNCTION_PATTERN.search(header)
+        if match:
+            return match.group(1), False
+        match = CONTAINER_PATTERN.search(header)
+        if match:
+            return match.group(1), True
+        match = ASSIGNMENT_PATTERN.search(header)
+        if match:
+            return match.group(1), False
+        for match in CALLABLE_PATTERN.finditer(header):
+            if match.group(1) not in NON_SYMBOLS:
+                return match.group(1), False
+        return None, False
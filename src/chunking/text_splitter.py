@@ -1,8 +1,12 @@
 from dataclasses import dataclass
-from typing import Optional
+from itertools import islice
+from typing import Iterable, Iterator, Optional
 import re
 
-from src.ingestion import Document
+import numpy as np
+
+from src.ingestion import Document, StreamingDocument
+from src.tokenization import load_tokenizer
 
 
 @dataclass
@@ -12,6 +16,10 @@ class Chunk:
     chunk_index: int
     doc_id: str
 
+    @property
+    def chunk_id(self) -> str:
+        return f"{self.doc_id}_{self.chunk_index}"
+
 
 class TextSplitter:
     def __init__(
@@ -25,18 +33,20 @@ class TextSplitter:
         self.separators = separators or ["\n\n", "\n", ". ", " ", ""]
 
     def split_document(self, document: Document) -> list[Chunk]:
-        text = document.content
-        chunks = self._split_text(text)
+        return list(self.iter_split_document(document))
 
-        return [
-            Chunk(
+    def iter_split_document(self, document: Document | StreamingDocument) -> Iterator[Chunk]:
+        if isinstance(document, StreamingDocument):
+            chunks = self.iter_split_segments(document.iter_segments())
+        else:
+            chunks = self.iter_split_text(document.content)
+        for i, chunk in enumerate(chunks):
+            yield Chunk(
                 content=chunk,
-                metadata={**document.metadata, "chunk_index": i},
+                metadata={**document.metadata, "doc_id": document.doc_id, "chunk_index": i},
                 chunk_index=i,
                 doc_id=document.doc_id,
             )
-            for i, chunk in enumerate(chunks)
-        ]
 
     def split_documents(self, documents: list[Document]) -> list[Chunk]:
         all_chunks = []
@@ -44,86 +54,421 @@ class TextSplitter:
             all_chunks.extend(self.split_document(doc))
         return all_chunks
 
+    def iter_split_text(self, text: str) -> Iterator[str]:
+        return self._split_segment(_Segment(text, 0, len(text)), self.separators)
+
+    def iter_split_segments(self, segments: Iterable[str]) -> Iterator[str]:
+        return self._stream_segment(_TextStream(iter(segments)), self.separators)
+
     def _split_text(self, text: str) -> list[str]:
-        return self._recursive_split(text, self.separators)
+        return list(self.iter_split_text(text))
 
-    def _recursive_split(self, text: str, separators: list[str]) -> list[str]:
-        if not text:
-            return []
+    def _split_segment(self, segment: "_Segment", separators: list[str]) -> Iterator[str]:
+        length = len(segment)
+        if not length:
+            return
 
-        if len(text) <= self.chunk_size:
-            return [text.strip()] if text.strip() else []
+        if length <= self.chunk_size:
+            text = segment.slice(0, length).strip()
+            if text:
+                yield text
+            return
 
         separator = separators[0] if separators else ""
         remaining_separators = separators[1:] if len(separators) > 1 else []
-
         if separator:
-            splits = text.split(separator)
+            chunks = self._split_on(segment, length, separator, remaining_separators)
         else:
-            splits = list(text)
+            chunks = self._split_characters(segment, length)
+        yield from self._overlap(chunks)
 
-        chunks = []
-        current_chunk = ""
+    def _overlap(self, chunks: Iterator[str]) -> Iterator[str]:
+        if self.chunk_overlap <= 0:
+            yield from chunks
+            return
 
-        for split in splits:
-            piece = split if not separator else split + separator
+        overlap = self.chunk_overlap
+        prev_chunk = None
+        for chunk in chunks:
+            output = chunk
+            if prev_chunk is not None:
+                overlap_text = prev_chunk[-overlap:]
+                if overlap_text and not chunk.startswith(overlap_text):
+                    output = overlap_text + " " + chunk
+            prev_chunk = chunk
+            yield output
+
+    def _split_characters(self, segment: "_Segment", length: int) -> Iterator[str]:
+        step = max(self.chunk_size, 1)
+        for start in range(0, length, step):
+            chunk = segment.slice(start, min(start + step, length)).strip()
+            if chunk or start + step < length:
+                yield chunk
+
+    def _split_on(
+        self,
+        segment: "_Segment",
+        length: int,
+        separator: str,
+        remaining_separators: list[str],
+    ) -> Iterator[str]:
+        chunk_size = self.chunk_size
+        sep_len = len(separator)
+        overlapping = any(separator[:k] == separator[-k:] for k in range(1, sep_len))
+        pos = 0
+        while True:
+            if length - pos + sep_len <= chunk_size:
+                chunk = (segment.slice(pos, length) + separator).strip()
+                if chunk:
+                    yield chunk
+                return
 
-            if len(current_chunk) + len(piece) <= self.chunk_size:
-                current_chunk += piece
+            limit = min(pos + chunk_size, length)
+            last = segment.rfind(separator, pos, limit)
+            if overlapping and last > pos and segment.find(separator, max(pos, last - sep_len + 1), last + sep_len - 1) >= 0:
+                last = -1
+                found = segment.find(separator, pos, limit)
+                while found >= 0:
+                    last = found
+                    found = segment.find(separator, found + sep_len, limit)
+            if last >= 0:
+                yield segment.slice(pos, last + sep_len).strip()
+                pos = last + sep_len
+                continue
+
+            end = segment.find(separator, pos)
+            piece = segment.sub(pos, length if end < 0 else end, separator)
+            if remaining_separators:
+                yield from self._split_segment(piece, remaining_separators)
             else:
-                if current_chunk:
-                    if len(current_chunk) > self.chunk_size and remaining_separators:
-                        sub_chunks = self._recursive_split(current_chunk, remaining_separators)
-                        chunks.extend(sub_chunks)
-                    else:
-                        chunks.append(current_chunk.strip())
-
-                if len(piece) > self.chunk_size and remaining_separators:
-                    sub_chunks = self._recursive_split(piece, remaining_separators)
-                    chunks.extend(sub_chunks)
-                    current_chunk = ""
-                else:
-                    current_chunk = piece
+                chunk = piece.slice(0, len(piece)).strip()
+                if chunk or end >= 0:
+                    yield chunk
+            if end < 0:
+                return
+            pos = end + sep_len
+
+    def _stream_segment(self, stream: "_TextStream", separators: list[str]) -> Iterator[str]:
+        if not stream.fill(self.chunk_size + 1):
+            text = stream.read_all().strip()
+            if text:
+                yield text
+            return
 
-        if current_chunk.strip():
-            if len(current_chunk) > self.chunk_size and remaining_separators:
-                sub_chunks = self._recursive_split(current_chunk, remaining_separators)
-                chunks.extend(sub_chunks)
+        separator = separators[0] if separators else ""
+        remaining_separators = separators[1:] if len(separators) > 1 else []
+        if separator:
+            chunks = self._stream_on(stream, separator, remaining_separators)
+        else:
+            chunks = self._stream_characters(stream)
+        yield from self._overlap(chunks)
+
+    def _stream_characters(self, stream: "_TextStream") -> Iterator[str]:
+        step = max(self.chunk_size, 1)
+        while stream.fill(1):
+            chunk = stream.take(step).strip()
+            if chunk or stream.fill(1):
+                yield chunk
+
+    def _stream_on(self, stream: "_TextStream", separator: str, remaining_separators: list[str]) -> Iterator[str]:
+        chunk_size = self.chunk_size
+        sep_len = len(separator)
+        overlapping = any(separator[:k] == separator[-k:] for k in range(1, sep_len))
+        while True:
+            if not stream.fill(chunk_size + sep_len) and stream.available() + sep_len <= chunk_size:
+                chunk = (stream.read_all() + separator).strip()
+                if chunk:
+                    yield chunk
+                return
+
+            text, pos = stream.buffer, stream.pos
+            limit = pos + min(chunk_size, stream.available())
+            last = text.rfind(separator, pos, limit)
+            if overlapping and last > pos and text.find(separator, max(pos, last - sep_len + 1), last + sep_len - 1) >= 0:
+                last = -1
+                found = text.find(separator, pos, limit)
+                while found >= 0:
+                    last = found
+                    found = text.find(separator, found + sep_len, limit)
+            if last >= 0:
+                yield text[pos:last + sep_len].strip()
+                stream.pos = last + sep_len
+                continue
+
+            piece = _TextStream(stream.until(separator))
+            if remaining_separators:
+                yield from self._stream_segment(piece, remaining_separators)
             else:
-                chunks.append(current_chunk.strip())
+                chunk = piece.read_all().strip()
+                if chunk or stream.found:
+                    yield chunk
+            if not stream.found:
+                return
 
-        return self._add_overlap(chunks)
 
-    def _add_overlap(self, chunks: list[str]) -> list[str]:
-        if self.chunk_overlap == 0 or len(chunks) <= 1:
-            return chunks
+class _Segment:
+    __slots__ = ("text", "start", "end", "tail")
 
-        overlapped = []
-        for i, chunk in enumerate(chunks):
-            if i > 0 and self.chunk_overlap > 0:
-                prev_chunk = chunks[i - 1]
-                overlap_text = prev_chunk[-self.chunk_overlap:]
-                if overlap_text and not chunk.startswith(overlap_text):
-                    chunk = overlap_text + " " + chunk
+    def __init__(self, text: str, start: int, end: int, tail: str = ""):
+        self.text = text
+        self.start = start
+        self.end = end
+        self.tail = tail
+
+    def __len__(self) -> int:
+        return self.end - self.start + len(self.tail)
+
+    def slice(self, lo: int, hi: int) -> str:
+        body = self.end - self.start
+        if hi <= body:
+            return self.text[self.start + lo:self.start + hi]
+        if lo >= body:
+            return self.tail[lo - body:hi - body]
+        return self.text[self.start + lo:self.end] + self.tail[:hi - body]
+
+    def sub(self, lo: int, hi: int, tail: str) -> "_Segment":
+        body = self.end - self.start
+        if hi <= body:
+            return _Segment(self.text, self.start + lo, self.start + hi, tail)
+        if lo >= body:
+            return _Segment(self.text, self.end, self.end, self.tail[lo - body:hi - body] + tail)
+        return _Segment(self.text, self.start + lo, self.end, self.tail[:hi - body] + tail)
+
+    def find(self, separator: str, lo: int, hi: Optional[int] = None) -> int:
+        hi = len(self) if hi is None else hi
+        body = self.end - self.start
+        if lo < body:
+            found = self.text.find(separator, self.start + lo, self.start + min(hi, body))
+            if found >= 0:
+                return found - self.start
+        if not self.tail or hi <= body:
+            return -1
+        zone_start = max(lo, body - len(separator) + 1, 0)
+        found = self.slice(zone_start, hi).find(separator)
+        return zone_start + found if found >= 0 else -1
 
-            overlapped.append(chunk)
+    def rfind(self, separator: str, lo: int, hi: int) -> int:
+        body = self.end - self.start
+        if self.tail and hi > body:
+            zone_start = max(lo, body - len(separator) + 1, 0)
+            found = self.slice(zone_start, hi).rfind(separator)
+            if found >= 0:
+                return zone_start + found
+        if lo >= body:
+            return -1
+        found = self.text.rfind(separator, self.start + lo, self.start + min(hi, body))
+        return found - self.start if found >= 0 else -1
 
-        return overlapped
 
+class _TextStream:
+    def __init__(self, segments: Iterator[str]):
+        self.segments = segments
+        self.buffer = ""
+        self.pos = 0
+        self.exhausted = False
+        self.found = False
 
-class CodeSplitter(TextSplitter):
+    def available(self) -> int:
+        return len(self.buffer) - self.pos
+
+    def fill(self, size: int) -> bool:
+        available = len(self.buffer) - self.pos
+        if available < size and not self.exhausted:
+            parts = [self.buffer[self.pos:]]
+            while available < size:
+                segment = next(self.segments, None)
+                if segment is None:
+                    self.exhausted = True
+                    break
+                parts.append(segment)
+                available += len(segment)
+            self.buffer = "".join(parts)
+            self.pos = 0
+        return available >= size
+
+    def take(self, size: int) -> str:
+        self.fill(size)
+        text = self.buffer[self.pos:self.pos + size]
+        self.pos += len(text)
+        return text
+
+    def read_all(self) -> str:
+        text = "".join([self.buffer[self.pos:], *self.segments])
+        self.buffer, self.pos, self.exhausted = "", 0, True
+        return text
+
+    def until(self, separator: str) -> Iterator[str]:
+        self.found = False
+        keep = len(separator) - 1
+        while True:
+            end = self.buffer.find(separator, self.pos)
+            if end >= 0:
+                if end > self.pos:
+                    yield self.buffer[self.pos:end]
+                self.pos = end + len(separator)
+                self.found = True
+                break
+            if self.exhausted:
+                if self.available():
+                    yield self.buffer[self.pos:]
+                self.pos = len(self.buffer)
+                break
+            safe = len(self.buffer) - keep
+            if safe > self.pos:
+                yield self.buffer[self.pos:safe]
+                self.pos = safe
+            self.fill(self.available() + 1)
+        yield separator
+
+
+class TokenTextSplitter(TextSplitter):
     def __init__(
         self,
-        chunk_size: int = 1000,
-        chunk_overlap: int = 100,
+        model_name: str = "all-MiniLM-L6-v2",
+        chunk_size: Optional[int] = None,
+        chunk_overlap: int = 16,
+        separators: Optional[list[str]] = None,
+        max_seq_length: int = 256,
+        min_fill: float = 0.9,
+        tokenizer=None,
+        block_chars: int = 20_000,
+        batch_size: int = 32,
     ):
-        code_separators = [
-            "\nclass ",
-            "\ndef ",
-            "\n\ndef ",
-            "\n\n",
-            "\n",
-            " ",
-            "",
-        ]
-        super().__init__(chunk_size, chunk_overlap, code_separators)
+        super().__init__(chunk_size, chunk_overlap, separators)
+        self.model_name = model_name
+        self.max_seq_length = max_seq_length
+        self.min_fill = min_fill
+        self.block_chars = block_chars
+        self.batch_size = batch_size
+        self._tokenizer = tokenizer
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            self._tokenizer = load_tokenizer(self.model_name)
+        return self._tokenizer
+
+    @property
+    def token_limit(self) -> int:
+        if self.chunk_size is not None:
+            return self.chunk_size
+        return self.max_seq_length - self.tokenizer.num_special_tokens_to_add(pair=False)
+
+    def iter_split_document(self, document: Document | StreamingDocument) -> Iterator[Chunk]:
+        segments = document.iter_segments() if isinstance(document, StreamingDocument) else [document.content]
+        for i, (chunk, tokens) in enumerate(self._token_chunks(segments)):
+            yield Chunk(
+                content=chunk,
+                metadata={**document.metadata, "doc_id": document.doc_id, "chunk_index": i, "token_count": tokens},
+                chunk_index=i,
+                doc_id=document.doc_id,
+            )
+
+    def iter_split_text(self, text: str) -> Iterator[str]:
+        for chunk, _ in self.iter_token_chunks(text):
+            yield chunk
+
+    def iter_split_segments(self, segments: Iterable[str]) -> Iterator[str]:
+        for chunk, _ in self._token_chunks(segments):
+            yield chunk
+
+    def iter_token_chunks(self, text: str) -> Iterator[tuple[str, int]]:
+        return self._token_chunks([text])
+
+    def _token_chunks(self, segments: Iterable[str]) -> Iterator[tuple[str, int]]:
+        limit = self.token_limit
+        min_tokens = min(limit, max(1, int(limit * self.min_fill)))
+        overlap = min(max(self.chunk_overlap, 0), limit // 2)
+        separators = [separator for separator in self.separators if separator]
+        offset_stream = self._iter_offsets(segments)
+        offsets = np.zeros((0, 2), dtype=np.int64)
+        window, base = "", 0
+        exhausted = False
+
+        while True:
+            while not exhausted and len(offsets) <= limit:
+                batch = next(offset_stream, None)
+                if batch is None:
+                    exhausted = True
+                else:
+                    window += batch[0]
+                    offsets = np.concatenate([offsets, batch[1]])
+            if not len(offsets):
+                return
+            start = int(offsets[0, 0])
+            if start - base > len(window) // 2:
+                window, base = window[start - base:], start
+            if len(offsets) <= limit:
+                chunk = window[start - base:int(offsets[-1, 1]) - base].strip()
+                if chunk:
+                    yield chunk, len(offsets)
+                return
+
+            lo, hi = int(offsets[min_tokens, 0]), int(offsets[limit, 0])
+            end = hi
+            for separator in separators:
+                found = window.rfind(separator, lo - base, hi - base)
+                if found >= 0:
+                    end = found + base + len(separator)
+                    break
+            count = int(np.searchsorted(offsets[:, 1], end, side="right"))
+            chunk = window[start - base:end - base].strip()
+            if chunk:
+                yield chunk, count
+
+            next_start = max(count - overlap, 1)
+            for i in range(next_start, count):
+                if offsets[i, 0] > offsets[i - 1, 1]:
+                    next_start = i
+                    break
+            offsets = offsets[next_start:]
+
+    def _iter_offsets(self, segments: Iterable[str]) -> Iterator[tuple[str, np.ndarray]]:
+        segments = iter(segments)
+        buffer, pos, base = "", 0, 0
+        exhausted = False
+        while True:
+            pending, size = [buffer[pos:]], len(buffer) - pos
+            while not exhausted and size <= self.block_chars * self.batch_size:
+                segment = next(segments, None)
+                if segment is None:
+                    exhausted = True
+                else:
+                    pending.append(segment)
+                    size += len(segment)
+            if len(pending) > 1:
+                buffer = "".join(pending)
+                base += pos
+                pos = 0
+
+            blocks, end = [], pos
+            while end < len(buffer) and len(blocks) < self.batch_size and (exhausted or end + self.block_chars < len(buffer)):
+                block_end = self._block_end(buffer, end)
+                blocks.append((end, block_end))
+                end = block_end
+            if not blocks:
+                return
+            encoded = self.tokenizer(
+                [buffer[start:stop] for start, stop in blocks],
+                add_special_tokens=False,
+                return_offsets_mapping=True,
+                return_attention_mask=False,
+                return_token_type_ids=False,
+                verbose=False,
+            )
+            parts = [
+                np.asarray(offsets, dtype=np.int64).reshape(-1, 2) + base + start
+                for (start, _), offsets in zip(blocks, encoded["offset_mapping"])
+            ]
+            yield buffer[pos:end], np.concatenate(parts)
+            pos = end
+
+    def _block_end(self, text: str, start: int) -> int:
+        end = min(start + self.block_chars, len(text))
+        if end < len(text):
+            cut = max(text.rfind(" ", start + 1, end), text.rfind("\n", start + 1, end))
+            if cut < 0:
+                cut = next((i for i in range(end - 1, max(start, end - 1000), -1) if not text[i].isalnum()), -1)
+            if cut > start:
+                end = cut
+        return end
@@ -1,16 +1,62 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field
+from typing import Optional
 
 class Settings(BaseSettings):
     ollama_model: str = Field(default="llama3.2")
     ollama_base_url: str = Field(default="http://localhost:11434")
+    ollama_health_interval: float = Field(default=30.0)
+    ollama_recovery_timeout: float = Field(default=15.0)
+    ollama_num_parallel: int = Field(default=4)
+    ollama_queue_timeout: Optional[float] = Field(default=30.0)
+    ollama_max_connections: int = Field(default=16)
+    vector_backend: str = Field(default="chroma")
+    matrix_dtype: str = Field(default="float32")
+    matrix_quantization: str = Field(default="none")
+    matrix_rescore_multiplier: Optional[int] = Field(default=None)
     chroma_collection: str = Field(default="documents")
     chroma_persist_dir: str = Field(default="./chroma_db")
     chunk_size: int = Field(default=512)
     chunk_overlap: int = Field(default=50)
+    chunk_unit: str = Field(default="characters")
+    chunk_tokens: Optional[int] = Field(default=None)
+    chunk_token_overlap: int = Field(default=16)
     top_k: int = Field(default=5)
+    retrieval_mode: str = Field(default="dense")
+    lexical_index_dir: Optional[str] = Field(default=None)
+    retrieval_candidate_multiplier: int = Field(default=4)
+    context_max_tokens: Optional[int] = Field(default=2048)
+    context_duplicate_threshold: float = Field(default=0.9)
+    reranker_model: Optional[str] = Field(default=None)
+    reranker_budget: Optional[float] = Field(default=0.5)
+    reranker_cache_size: int = Field(default=10_000)
+    embedding_cache_dir: Optional[str] = Field(default="./embedding_cache")
+    embedding_cache_size: int = Field(default=100_000)
+    embedding_cache_flush_interval: Optional[float] = Field(default=30.0)
+    query_cache_size: int = Field(default=1024)
+    query_cache_ttl: Optional[float] = Field(default=300.0)
+    answer_cache_size: int = Field(default=512)
+    answer_cache_threshold: float = Field(default=0.95)
+    ingest_manifest_path: Optional[str] = Field(default=None)
+    ingest_workers: Optional[int] = Field(default=None)
+    ingest_batch_size: int = Field(default=256)
+    ingest_max_tokens: Optional[int] = Field(default=65_536)
+    ingest_flush_interval: Optional[float] = Field(default=5.0)
+    ingest_pdf_workers: Optional[int] = Field(default=None)
+    ingest_pdf_batch_pages: int = Field(default=16)
+    ingest_stream_min_bytes: Optional[int] = Field(default=32 * 1024 * 1024)
+    ingest_job_db: Optional[str] = Field(default=None)
+    ingest_spool_dir: Optional[str] = Field(default=None)
+    ingest_job_workers: int = Field(default=2)
+    ingest_job_max_queued: int = Field(default=1000)
     api_host: str = Field(default="0.0.0.0")
     api_port: int = Field(default=8000)
+    api_query_concurrency: int = Field(default=8)
+    api_ingest_concurrency: int = Field(default=2)
+    api_admin_concurrency: int = Field(default=4)
+    api_max_batch_size: int = Field(default=256)
+    api_trace_header: Optional[str] = Field(default="X-Trace-Id")
+    metrics_enabled: bool = Field(default=True)
     class Config:
         env_file = ".env"
         env_prefix = "RAG_"
@@ -1,3 +1,4 @@
 from .embedder import Embedder
+from .cache import EmbeddingCache
 
-__all__ = ["Embedder"]
+__all__ = ["Embedder", "EmbeddingCache"]
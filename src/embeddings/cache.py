@@ -0,0 +1,179 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+import hashlib
+import json
+import re
+import threading
+import time
+
+import numpy as np
+
+
+class EmbeddingCache:
+    INDEX_DTYPE = np.dtype([("key", "<u8"), ("tick", "<u8")])
+
+    def __init__(
+        self,
+        cache_dir: str | Path,
+        model_name: str,
+        max_entries: int = 100_000,
+        flush_interval: Optional[float] = 30.0,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self.hits = 0
+        self.misses = 0
+
+        prefix = re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+        self.header_path = self.cache_dir / f"{prefix}.json"
+        self.matrix_path = self.cache_dir / f"{prefix}.f32"
+        self.index_path = self.cache_dir / f"{prefix}.idx"
+
+        self.dimension: Optional[int] = None
+        self._matrix = None
+        self._index = None
+        self._slots: OrderedDict[int, int] = OrderedDict()
+        self._tick = 0
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._open_existing()
+
+    def _key(self, text: str) -> int:
+        digest = hashlib.blake2b(
+            f"{self.model_name}\0{text}".encode("utf-8", "surrogatepass"),
+            digest_size=8,
+        ).digest()
+        return int.from_bytes(digest, "little") or 1
+
+    def _open_existing(self) -> None:
+        if not (self.header_path.exists() and self.matrix_path.exists() and self.index_path.exists()):
+            return
+
+        try:
+            header = json.loads(self.header_path.read_text())
+        except (OSError, ValueError):
+            return
+
+        if header.get("model_name") != self.model_name or header.get("max_entries") != self.max_entries:
+            return
+
+        dimension = header["dimension"]
+        expected_size = self.max_entries * dimension * 4
+        if self.matrix_path.stat().st_size != expected_size:
+            return
+
+        self.dimension = dimension
+        self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r+", shape=(self.max_entries, dimension))
+        self._index = np.memmap(self.index_path, dtype=self.INDEX_DTYPE, mode="r+", shape=(self.max_entries,))
+
+        used = np.flatnonzero(self._index["key"])
+        order = used[np.argsort(self._index["tick"][used], kind="stable")]
+        for slot in order.tolist():
+            self._slots[int(self._index["key"][slot])] = slot
+        if len(used):
+            self._tick = int(self._index["tick"][used].max())
+
+    def _create(self, dimension: int) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.dimension = dimension
+        self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="w+", shape=(self.max_entries, dimension))
+        self._index = np.memmap(self.index_path, dtype=self.INDEX_DTYPE, mode="w+", shape=(self.max_entries,))
+        self._slots.clear()
+        self._tick = 0
+        self.header_path.write_text(json.dumps({
+            "model_name": self.model_name,
+            "dimension": dimension,
+            "max_entries": self.max_entries,
+        }))
+
+    def _touch(self, slot: int) -> None:
+        self._tick += 1
+        self._index["tick"][slot] = self._tick
+
+    def get_many(self, texts: list[str]) -> list[Optional[np.ndarray]]:
+        keys = [self._key(text) for text in texts]
+        output: list[Optional[np.ndarray]] = []
+        with self._lock:
+            for key in keys:
+                slot = self._slots.get(key) if self._matrix is not None else None
+                if slot is None:
+                    self.misses += 1
+                    output.append(None)
+                    continue
+                self.hits += 1
+                self._slots.move_to_end(key)
+                self._touch(slot)
+                self._dirty = True
+                output.append(np.array(self._matrix[slot]))
+            self._maybe_flush()
+        return output
+
+    def put_many(self, texts: list[str], embeddings: np.ndarray) -> None:
+        if not texts:
+            return
+
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        keys = [self._key(text) for text in texts]
+        with self._lock:
+            if self._matrix is None or self.dimension != embeddings.shape[1]:
+                self._create(embeddings.shape[1])
+
+            for key, vector in zip(keys, embeddings):
+                slot = self._slots.get(key)
+                if slot is None:
+                    if len(self._slots) < self.max_entries:
+                        slot = len(self._slots)
+                    else:
+                        _, slot = self._slots.popitem(last=False)
+                self._slots[key] = slot
+                self._slots.move_to_end(key)
+
+                self._index["key"][slot] = 0
+                self._matrix[slot] = vector
+                self._index["key"][slot] = key
+                self._touch(slot)
+            self._dirty = True
+            self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        if self.flush_interval is not None and time.monotonic() - self._last_flush >= self.flush_interval:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._matrix is not None and self._dirty:
+            self._matrix.flush()
+            self._index.flush()
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def close(self) -> None:
+        self.flush()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._slots.clear()
+            self._tick = 0
+            if self._index is not None:
+                self._index[:] = 0
+                self._dirty = True
+            self._flush()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            entries = len(self._slots)
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,11 +1,30 @@
+from pathlib import Path
 from typing import Optional
 import numpy as np
 
+from src.metrics import metrics
+from src.tokenization import load_tokenizer
+from .cache import EmbeddingCache
+
 
 class Embedder:
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        cache_dir: Optional[str | Path] = None,
+        cache_size: int = 100_000,
+        cache_flush_interval: Optional[float] = 30.0,
+    ):
         self.model_name = model_name
         self._model = None
+        self._tokenizer = None
+        self.cache = (
+            EmbeddingCache(cache_dir, model_name, max_entries=cache_size, flush_interval=cache_flush_interval)
+            if cache_dir
+            else None
+        )
+        self.embed_calls = 0
+        self.embedded_texts = 0
 
     @property
     def model(self):
@@ -19,18 +38,75 @@ class Embedder:
             self._model = SentenceTransformer(self.model_name)
         return self._model
 
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            self._tokenizer = self._model.tokenizer if self._model is not None else load_tokenizer(self.model_name)
+        return self._tokenizer
+
+    def count_tokens(self, texts: list[str], batch_size: int = 256) -> list[int]:
+        counts = []
+        for i in range(0, len(texts), batch_size):
+            encoded = self.tokenizer(
+                texts[i:i + batch_size],
+                add_special_tokens=True,
+                return_attention_mask=False,
+                return_token_type_ids=False,
+                verbose=False,
+            )
+            counts.extend(len(ids) for ids in encoded["input_ids"])
+        return counts
+
     def embed(self, text: str) -> list[float]:
+        with metrics.timer("embed"):
+            return self._embed(text)
+
+    def embed_batch(self, texts: list[str], batch_size: int = 32) -> list[list[float]]:
+        with metrics.timer("embed_batch"):
+            return self._embed_batch(texts, batch_size)
+
+    def _embed(self, text: str) -> list[float]:
+        if self.cache is not None:
+            cached = self.cache.get_many([text])[0]
+            if cached is not None:
+                return cached.tolist()
+
+        self.embed_calls += 1
+        self.embedded_texts += 1
         embedding = self.model.encode(text, convert_to_numpy=True)
+        if self.cache is not None:
+            self.cache.put_many([text], embedding[np.newaxis, :])
         return embedding.tolist()
 
-    def embed_batch(self, texts: list[str], batch_size: int = 32) -> list[list[float]]:
-        embeddings = self.model.encode(
+    def _embed_batch(self, texts: list[str], batch_size: int) -> list[list[float]]:
+        if self.cache is None:
+            return self._encode(texts, batch_size).tolist()
+
+        cached = self.cache.get_many(texts)
+        miss_indices = [i for i, vector in enumerate(cached) if vector is None]
+        if not miss_indices:
+            return [vector.tolist() for vector in cached]
+
+        miss_texts = [texts[i] for i in miss_indices]
+        encoded = self._encode(miss_texts, batch_size)
+        self.cache.put_many(miss_texts, encoded)
+
+        embeddings = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+        for i, vector in enumerate(cached):
+            if vector is not None:
+                embeddings[i] = vector
+        embeddings[miss_indices] = encoded
+        return embeddings.tolist()
+
+    def _encode(self, texts: list[str], batch_size: int) -> np.ndarray:
+        self.embed_calls += 1
+        self.embedded_texts += len(texts)
+        return self.model.encode(
             texts,
             batch_size=batch_size,
             show_progress_bar=len(texts) > 100,
             convert_to_numpy=True
         )
-        return embeddings.tolist()
 
     @property
     def dimension(self) -> int:
@@ -40,3 +116,28 @@ class Embedder:
             "all-MiniLM-L12-v2": 384,
         }
         return dim_map.get(self.model_name, 384)
+
+    @property
+    def max_seq_length(self) -> int:
+        length_map = {
+            "all-MiniLM-L6-v2": 256,
+            "all-mpnet-base-v2": 384,
+            "all-MiniLM-L12-v2": 256,
+        }
+        if self.model_name in length_map:
+            return length_map[self.model_name]
+        return self.model.max_seq_length
+
+    def get_stats(self) -> dict:
+        stats = {
+            "model_name": self.model_name,
+            "embed_calls": self.embed_calls,
+            "embedded_texts": self.embedded_texts,
+        }
+        if self.cache is not None:
+            stats["cache"] = self.cache.get_stats()
+        return stats
+
+    def close(self) -> None:
+        if self.cache is not None:
+            self.cache.close()
@@ -0,0 +1,329 @@
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+import hashlib
+import os
+
+from src.ingestion import Document, DocumentLoader, IngestManifest, ManifestEntry, StreamingDocument
+from src.ingestion.loaders import process_context
+from src.chunking import TextSplitter
+from src.chunking.text_splitter import Chunk
+from src.vectorstore import ChunkSink, VectorStore
+
+
+@dataclass
+class PlannedFile:
+    path: Path
+    source: str
+    mtime: float
+    size: int
+    entry: Optional[ManifestEntry]
+
+
+@dataclass
+class ParsedDocument:
+    doc_id: str
+    doc_type: str
+    content_hash: str
+    chunks: list[Chunk]
+    chunk_hashes: list[str]
+
+    def __iter__(self) -> Iterator[tuple[Chunk, str]]:
+        return zip(self.chunks, self.chunk_hashes)
+
+
+class DocumentStream:
+    def __init__(
+        self,
+        doc_id: str,
+        pages: Iterator[Document | StreamingDocument],
+        text_splitter: TextSplitter,
+        code_splitter: TextSplitter,
+    ):
+        self.doc_id = doc_id
+        self.doc_type = "unknown"
+        self.content_hash: Optional[str] = None
+        self.pages = pages
+        self.text_splitter = text_splitter
+        self.code_splitter = code_splitter
+
+    def __iter__(self) -> Iterator[tuple[Chunk, str]]:
+        page_hashes = []
+        chunk_index = 0
+        for page in self.pages:
+            self.doc_type = page.metadata.get("type", "unknown")
+            splitter = self.code_splitter if self.doc_type == "code" else self.text_splitter
+            for chunk in splitter.iter_split_document(page):
+                chunk.chunk_index = chunk_index
+                chunk.metadata["chunk_index"] = chunk_index
+                chunk_index += 1
+                yield chunk, hashlib.md5(chunk.content.encode()).hexdigest()
+            page_hashes.append(page.content_hash)
+        if len(page_hashes) == 1:
+            self.content_hash = page_hashes[0]
+        else:
+            self.content_hash = hashlib.md5("".join(page_hashes).encode()).hexdigest()
+
+
+_worker_state: dict = {}
+
+
+def _init_worker(loader: DocumentLoader, text_splitter: TextSplitter, code_splitter: TextSplitter) -> None:
+    loader.pdf_workers = 1
+    _worker_state["loader"] = loader
+    _worker_state["text_splitter"] = text_splitter
+    _worker_state["code_splitter"] = code_splitter
+
+
+def _parse_in_worker(path: Path, source: str) -> ParsedDocument:
+    return parse_document(
+        path,
+        source,
+        _worker_state["loader"],
+        _worker_state["text_splitter"],
+        _worker_state["code_splitter"],
+    )
+
+
+def stream_document(
+    path: Path,
+    source: str,
+    loader: DocumentLoader,
+    text_splitter: TextSplitter,
+    code_splitter: TextSplitter,
+    progress: Optional[Callable[[str, int], None]] = None,
+) -> DocumentStream:
+    pages = loader.iter_pages(path, source=source, progress=progress)
+    return DocumentStream(loader.source_id(source), pages, text_splitter, code_splitter)
+
+
+def parse_document(
+    path: Path,
+    source: str,
+    loader: DocumentLoader,
+    text_splitter: TextSplitter,
+    code_splitter: TextSplitter,
+    progress: Optional[Callable[[str, int], None]] = None,
+) -> ParsedDocument:
+    stream = stream_document(path, source, loader, text_splitter, code_splitter, progress)
+    pairs = list(stream)
+    return ParsedDocument(
+        doc_id=stream.doc_id,
+        doc_type=stream.doc_type,
+        content_hash=stream.content_hash,
+        chunks=[chunk for chunk, _ in pairs],
+        chunk_hashes=[chunk_hash for _, chunk_hash in pairs],
+    )
+
+
+def ingest_result(entry: ManifestEntry, status: str, chunks_written: int = 0) -> dict:
+    return {
+        "filename": Path(entry.source).name,
+        "doc_id": entry.doc_id,
+        "chunks": len(entry.chunk_ids),
+        "type": entry.doc_type,
+        "status": status,
+        "chunks_written": chunks_written,
+    }
+
+
+class IngestPipeline:
+    def __init__(
+        self,
+        loader: DocumentLoader,
+        text_splitter: TextSplitter,
+        code_splitter: TextSplitter,
+        vector_store: VectorStore,
+        manifest: IngestManifest,
+        workers: Optional[int] = None,
+        batch_size: int = 256,
+        max_tokens: Optional[int] = 65_536,
+        max_interval: Optional[float] = 5.0,
+        max_pending: Optional[int] = None,
+        stream_min_bytes: Optional[int] = 32 * 1024 * 1024,
+    ):
+        self.loader = loader
+        self.text_splitter = text_splitter
+        self.code_splitter = code_splitter
+        self.vector_store = vector_store
+        self.manifest = manifest
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
+        self.max_interval = max_interval
+        self.max_pending = max_pending or self.workers * 4
+        self.stream_min_bytes = stream_min_bytes
+
+    def run(
+        self,
+        files: Iterable[tuple[Path, str]],
+        parallel: bool = True,
+        raise_errors: bool = False,
+        sink: Optional[ChunkSink] = None,
+        progress: Optional[Callable[[str, int], None]] = None,
+    ) -> Iterator[dict]:
+        if sink is None:
+            with self.make_sink() as own_sink:
+                yield from self.run(files, parallel=parallel, raise_errors=raise_errors, sink=own_sink, progress=progress)
+            return
+
+        planned = self._plan(files, raise_errors)
+        if parallel and self.workers > 1:
+            parsed_stream = self._parse_parallel(planned, raise_errors)
+        else:
+            parsed_stream = self._parse_serial(planned, raise_errors, progress)
+
+        for item in parsed_stream:
+            if isinstance(item, dict):
+                yield item
+                continue
+
+            planned_file, parsed = item
+            entry = planned_file.entry
+            if entry is not None and entry.content_hash == parsed.content_hash:
+                yield self._unchanged(planned_file)
+                continue
+
+            try:
+                yield self._write(planned_file, parsed, sink, progress)
+            except Exception as e:
+                if raise_errors:
+                    raise
+                print(f"Warning: Failed to ingest {planned_file.path}: {e}")
+
+    def _unchanged(self, planned_file: PlannedFile) -> dict:
+        entry = planned_file.entry
+        entry.mtime = planned_file.mtime
+        entry.size = planned_file.size
+        self.manifest.put(entry)
+        return ingest_result(entry, "unchanged")
+
+    def _write(
+        self,
+        planned_file: PlannedFile,
+        parsed: ParsedDocument | DocumentStream,
+        sink: ChunkSink,
+        progress: Optional[Callable[[str, int], None]] = None,
+    ) -> dict:
+        entry = planned_file.entry
+        previous_ids = entry.chunk_ids if entry is not None else []
+        previous_hashes = dict(zip(previous_ids, entry.chunk_hashes)) if entry is not None else {}
+        chunk_ids, chunk_hashes, written = [], [], []
+        try:
+            for chunk, chunk_hash in parsed:
+                chunk_ids.append(chunk.chunk_id)
+                chunk_hashes.append(chunk_hash)
+                if previous_hashes.get(chunk.chunk_id) != chunk_hash:
+                    sink.add([chunk])
+                    written.append(chunk.chunk_id)
+                    if progress is not None:
+                        progress("chunks_written", len(written))
+        except Exception:
+            sink.delete([chunk_id for chunk_id in written if chunk_id not in previous_hashes])
+            raise
+
+        if entry is not None and entry.content_hash == parsed.content_hash and not written:
+            return self._unchanged(planned_file)
+
+        if progress is not None:
+            progress("chunks_written", len(written))
+        new_entry = ManifestEntry(
+            source=planned_file.source,
+            mtime=planned_file.mtime,
+            size=planned_file.size,
+            content_hash=parsed.content_hash,
+            doc_id=parsed.doc_id,
+            doc_type=parsed.doc_type,
+            chunk_ids=chunk_ids,
+            chunk_hashes=chunk_hashes,
+        )
+
+        sink.delete(sorted(set(previous_ids) - set(chunk_ids)), on_flush=partial(self.manifest.put, new_entry))
+        return ingest_result(new_entry, "updated" if previous_ids else "added", len(written))
+
+    def make_sink(self, on_write: Optional[Callable[[int], None]] = None) -> ChunkSink:
+        return ChunkSink(
+            self.vector_store,
+            max_chunks=self.batch_size,
+            max_tokens=self.max_tokens,
+            max_interval=self.max_interval,
+            on_write=on_write,
+        )
+
+    def _plan(self, files: Iterable[tuple[Path, str]], raise_errors: bool) -> Iterator[PlannedFile | dict]:
+        for path, source in files:
+            try:
+                stat = path.stat()
+            except OSError as e:
+                if raise_errors:
+                    raise
+                print(f"Warning: Failed to ingest {path}: {e}")
+                continue
+
+            entry = self.manifest.get(source)
+            if entry is not None and entry.mtime == stat.st_mtime and entry.size == stat.st_size:
+                yield ingest_result(entry, "unchanged")
+                continue
+
+            yield PlannedFile(path=path, source=source, mtime=stat.st_mtime, size=stat.st_size, entry=entry)
+
+    def _parse_serial(
+        self,
+        planned: Iterator[PlannedFile | dict],
+        raise_errors: bool,
+        progress: Optional[Callable[[str, int], None]] = None,
+    ) -> Iterator[tuple[PlannedFile, DocumentStream] | dict]:
+        for item in planned:
+            if isinstance(item, dict):
+                yield item
+                continue
+            yield item, stream_document(
+                item.path, item.source, self.loader, self.text_splitter, self.code_splitter, progress
+            )
+
+    def _parse_parallel(
+        self,
+        planned: Iterator[PlannedFile | dict],
+        raise_errors: bool,
+    ) -> Iterator[tuple[PlannedFile, ParsedDocument | DocumentStream] | dict]:
+        in_flight: deque[tuple[PlannedFile, Future]] = deque()
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=process_context(),
+            initializer=_init_worker,
+            initargs=(self.loader, self.text_splitter, self.code_splitter),
+        ) as pool:
+            for item in planned:
+                if isinstance(item, dict):
+                    yield item
+                    continue
+                if self.stream_min_bytes is not None and item.size >= self.stream_min_bytes:
+                    yield item, stream_document(
+                        item.path, item.source, self.loader, self.text_splitter, self.code_splitter
+                    )
+                    continue
+                in_flight.append((item, pool.submit(_parse_in_worker, item.path, item.source)))
+                if len(in_flight) >= self.max_pending:
+                    yield from self._collect(in_flight.popleft(), raise_errors)
+
+            while in_flight:
+                yield from self._collect(in_flight.popleft(), raise_errors)
+
+    def _collect(
+        self,
+        item: tuple[PlannedFile, Future],
+        raise_errors: bool,
+    ) -> Iterator[tuple[PlannedFile, ParsedDocument]]:
+        planned_file, future = item
+        try:
+            parsed = future.result()
+        except Exception as e:
+            if raise_errors:
+                raise
+            print(f"Warning: Failed to ingest {planned_file.path}: {e}")
+            return
+        yield planned_file, parsed
@@ -1,3 +1,14 @@
-from .loaders import DocumentLoader, Document
+from .loaders import DocumentLoader, Document, StreamingDocument
+from .manifest import IngestManifest, ManifestEntry
+from .jobs import IngestJob, IngestJobQueue, JobStore
 
-__all__ = ["DocumentLoader", "Document"]
+__all__ = [
+    "DocumentLoader",
+    "Document",
+    "StreamingDocument",
+    "IngestManifest",
+    "ManifestEntry",
+    "IngestJob",
+    "IngestJobQueue",
+    "JobStore",
+]
@@ -0,0 +1,207 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Optional
+import json
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+
+
+@dataclass
+class IngestJob:
+    job_id: str
+    filename: str
+    spool_path: str
+    source: str = ""
+    status: str = "queued"
+    pages_parsed: int = 0
+    chunks_written: int = 0
+    chunks_embedded: int = 0
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+
+class JobStore:
+    COLUMNS = (
+        "job_id", "filename", "spool_path", "source", "status", "pages_parsed", "chunks_written",
+        "chunks_embedded", "result", "error", "created_at", "updated_at",
+    )
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                spool_path TEXT NOT NULL,
+                source TEXT NOT NULL,
+                status TEXT NOT NULL,
+                pages_parsed INTEGER NOT NULL,
+                chunks_written INTEGER NOT NULL,
+                chunks_embedded INTEGER NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        self._conn.commit()
+
+    def save(self, job: IngestJob) -> None:
+        job.updated_at = time.time()
+        row = asdict(job)
+        row["result"] = json.dumps(job.result) if job.result is not None else None
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(self.COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in self.COLUMNS)})",
+                tuple(row[column] for column in self.COLUMNS),
+            )
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+        return self._from_row(row) if row else None
+
+    def with_status(self, *statuses: str) -> list[IngestJob]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs "
+                f"WHERE status IN ({', '.join('?' for _ in statuses)}) ORDER BY created_at",
+                statuses,
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def count(self, status: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def _from_row(self, row: tuple) -> IngestJob:
+        values = dict(zip(self.COLUMNS, row))
+        values["result"] = json.loads(values["result"]) if values["result"] else None
+        return IngestJob(**values)
+
+
+class IngestJobQueue:
+    def __init__(
+        self,
+        pipeline,
+        db_path: str | Path,
+        spool_dir: str | Path,
+        workers: int = 2,
+        max_queued: int = 1000,
+        progress_interval: float = 1.0,
+    ):
+        self.pipeline = pipeline
+        self.store = JobStore(db_path)
+        self.spool_dir = Path(spool_dir)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self.workers = workers
+        self.max_queued = max_queued
+        self.progress_interval = progress_interval
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._active: dict[str, IngestJob] = {}
+        self._source_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        if self._executor is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingest-job")
+        for job in self.store.with_status("queued", "running"):
+            job.status = "queued"
+            self.store.save(job)
+            self._executor.submit(self._run, job.job_id)
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    def submit(self, upload: BinaryIO, filename: str, source: Optional[str] = None) -> IngestJob:
+        if self.store.count("queued") >= self.max_queued:
+            raise RuntimeError(f"Ingest queue is full ({self.max_queued} jobs queued)")
+
+        job_id = uuid.uuid4().hex
+        spool_path = self.spool_dir / f"{job_id}{Path(filename).suffix.lower()}"
+        with open(spool_path, "wb") as spool:
+            shutil.copyfileobj(upload, spool)
+
+        job = IngestJob(
+            job_id=job_id,
+            filename=filename,
+            spool_path=str(spool_path),
+            source=source or Path(filename).name,
+        )
+        self.store.save(job)
+        if self._executor is None:
+            self.start()
+        else:
+            self._executor.submit(self._run, job_id)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            active = self._active.get(job_id)
+        return active if active is not None else self.store.get(job_id)
+
+    def _run(self, job_id: str) -> None:
+        job = self.store.get(job_id)
+        if job is None or job.status not in ("queued", "running"):
+            return
+
+        job.status = "running"
+        job.pages_parsed = job.chunks_written = job.chunks_embedded = 0
+        self.store.save(job)
+        with self._lock:
+            self._active[job_id] = job
+
+        last_saved = time.monotonic()
+
+        def progress(field_name: str, value: int) -> None:
+            nonlocal last_saved
+            setattr(job, field_name, value)
+            if time.monotonic() - last_saved >= self.progress_interval:
+                self.store.save(job)
+                last_saved = time.monotonic()
+
+        def on_write(count: int) -> None:
+            progress("chunks_embedded", job.chunks_embedded + count)
+
+        with self._lock:
+            source_lock = self._source_locks.setdefault(job.source, threading.Lock())
+        try:
+            with source_lock, self.pipeline.make_sink(on_write=on_write) as sink:
+                job.result = self.pipeline.ingest_file(
+                    job.spool_path, source=job.source, sink=sink, progress=progress
+                )
+            job.status = "completed"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            self.store.save(job)
+            with self._lock:
+                self._active.pop(job_id, None)
+            Path(job.spool_path).unlink(missing_ok=True)
+
+    def get_stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queued": self.store.count("queued"),
+            "running": self.store.count("running"),
+        }
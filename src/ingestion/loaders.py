@@ -1,7 +1,14 @@
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from dataclasses import dataclass, field
+from functools import partial
+from multiprocessing import get_all_start_methods, get_context
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterable, Iterator, Optional
+import codecs
 import hashlib
+import os
+import threading
 
 
 @dataclass
@@ -12,7 +19,66 @@ class Document:
 
     def __post_init__(self):
         if self.doc_id is None:
-            self.doc_id = hashlib.md5(self.content.encode()).hexdigest()[:12]
+            self.doc_id = self.content_hash[:12]
+
+    @property
+    def content_hash(self) -> str:
+        return hashlib.md5(self.content.encode()).hexdigest()
+
+
+@dataclass
+class StreamingDocument:
+    open_segments: Callable[[], Iterable[str]]
+    metadata: dict = field(default_factory=dict)
+    doc_id: Optional[str] = None
+    _content_hash: Optional[str] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        if self.doc_id is None:
+            self.doc_id = self.content_hash[:12]
+
+    def iter_segments(self) -> Iterator[str]:
+        digest = hashlib.md5()
+        for segment in self.open_segments():
+            digest.update(segment.encode())
+            yield segment
+        self._content_hash = digest.hexdigest()
+
+    @property
+    def content(self) -> str:
+        return "".join(self.iter_segments())
+
+    @property
+    def content_hash(self) -> str:
+        if self._content_hash is None:
+            for _ in self.iter_segments():
+                pass
+        return self._content_hash
+
+
+def _open_pdf(path: str | Path):
+    try:
+        from PyPDF2 import PdfReader
+    except ImportError:
+        raise ImportError("PyPDF2 is required for PDF support. Install with: pip install pypdf2")
+
+    return PdfReader(path)
+
+
+def process_context():
+    return get_context("forkserver" if "forkserver" in get_all_start_methods() else "spawn")
+
+
+_pdf_reader_cache: dict[tuple[str, float], object] = {}
+
+
+def extract_pdf_pages(path: str | Path, start: int, stop: int) -> list[tuple[int, str]]:
+    key = (str(path), os.stat(path).st_mtime)
+    reader = _pdf_reader_cache.get(key)
+    if reader is None:
+        _pdf_reader_cache.clear()
+        reader = _pdf_reader_cache[key] = _open_pdf(path)
+    return [(index + 1, reader.pages[index].extract_text() or "") for index in range(start, stop)]
 
 
 class DocumentLoader:
@@ -29,76 +95,186 @@ class DocumentLoader:
         ".json", ".yaml", ".yml", ".xml", ".html", ".css"
     }
 
-    def load(self, file_path: str | Path) -> Document:
-        path = Path(file_path)
+    ENCODINGS = ["utf-8", "utf-16", "latin-1", "cp1252"]
 
-        if not path.exists():
-            raise FileNotFoundError(f"File not found: {path}")
+    def __init__(
+        self,
+        pdf_workers: Optional[int] = None,
+        pdf_batch_pages: int = 16,
+        segment_chars: int = 1 << 16,
+        encoding_sample_bytes: int = 1 << 16,
+    ):
+        self.pdf_workers = pdf_workers if pdf_workers is not None else (os.cpu_count() or 1)
+        self.pdf_batch_pages = pdf_batch_pages
+        self.segment_chars = segment_chars
+        self.encoding_sample_bytes = encoding_sample_bytes
+        self._pdf_pool: Optional[ProcessPoolExecutor] = None
+        self._pdf_pool_lock = threading.Lock()
 
-        ext = path.suffix.lower()
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_pdf_pool"] = None
+        del state["_pdf_pool_lock"]
+        return state
 
-        if ext not in self.SUPPORTED_EXTENSIONS:
-            raise ValueError(f"Unsupported file type: {ext}")
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._pdf_pool_lock = threading.Lock()
 
-        metadata = {
-            "source": str(path.absolute()),
-            "filename": path.name,
-            "extension": ext,
-        }
+    def load(
+        self,
+        file_path: str | Path,
+        source: Optional[str] = None,
+        progress: Optional[Callable[[str, int], None]] = None,
+    ) -> Document:
+        path = Path(file_path)
+        metadata = self._metadata(path, source)
+        ext = metadata["extension"]
+        source = metadata["source"]
 
         if ext == ".pdf":
-            content = self._load_pdf(path)
+            content = self._load_pdf(path, progress)
             metadata["type"] = "pdf"
         elif ext == ".docx":
             content = self._load_docx(path)
             metadata["type"] = "docx"
-        elif ext in {".md", ".markdown"}:
-            content = self._load_text(path)
-            metadata["type"] = "markdown"
-        elif ext in self.CODE_EXTENSIONS:
-            content = self._load_text(path)
-            metadata["type"] = "code"
-            metadata["language"] = self._get_language(ext)
         else:
             content = self._load_text(path)
-            metadata["type"] = "text"
+            metadata.update(self._text_type(ext))
 
-        return Document(content=content, metadata=metadata)
+        return Document(content=content, metadata=metadata, doc_id=self.source_id(source))
 
-    def load_directory(self, dir_path: str | Path, recursive: bool = True) -> list[Document]:
+    def load_stream(self, file_path: str | Path, source: Optional[str] = None) -> StreamingDocument:
+        path = Path(file_path)
+        metadata = self._metadata(path, source)
+        ext = metadata["extension"]
+        if ext in {".pdf", ".docx"}:
+            raise ValueError(f"Streaming is not supported for {ext} files")
+
+        metadata.update(self._text_type(ext))
+        encoding = self._detect_encoding(path)
+        return StreamingDocument(
+            partial(self._iter_text, path, encoding),
+            metadata=metadata,
+            doc_id=self.source_id(metadata["source"]),
+        )
+
+    def iter_pages(
+        self,
+        file_path: str | Path,
+        source: Optional[str] = None,
+        progress: Optional[Callable[[str, int], None]] = None,
+    ) -> Iterator[Document | StreamingDocument]:
+        path = Path(file_path)
+        ext = path.suffix.lower()
+        if ext == ".docx":
+            yield self.load(path, source=source, progress=progress)
+            return
+        if ext != ".pdf":
+            yield self.load_stream(path, source=source)
+            return
+
+        metadata = self._metadata(path, source)
+        metadata["type"] = "pdf"
+        doc_id = self.source_id(metadata["source"])
+        for page_num, text in self.iter_pdf_pages(path, progress):
+            if text:
+                yield Document(content=text, metadata={**metadata, "page": page_num}, doc_id=doc_id)
+
+    def iter_pdf_pages(
+        self,
+        path: str | Path,
+        progress: Optional[Callable[[str, int], None]] = None,
+    ) -> Iterator[tuple[int, str]]:
+        reader = _open_pdf(path)
+        total = len(reader.pages)
+        if self.pdf_workers > 1 and total > self.pdf_batch_pages:
+            del reader
+            pages = self._iter_pdf_parallel(path, total)
+        else:
+            pages = ((page_num, page.extract_text() or "") for page_num, page in enumerate(reader.pages, 1))
+
+        for page_num, text in pages:
+            if progress is not None:
+                progress("pages_parsed", page_num)
+            yield page_num, text
+
+    def _iter_pdf_parallel(self, path: str | Path, total: int) -> Iterator[tuple[int, str]]:
+        batches = range(0, total, self.pdf_batch_pages)
+        workers = min(self.pdf_workers, len(batches))
+        in_flight: deque[Future] = deque()
+        pool = self._pdf_executor()
+        try:
+            for start in batches:
+                stop = min(start + self.pdf_batch_pages, total)
+                in_flight.append(pool.submit(extract_pdf_pages, str(path), start, stop))
+                if len(in_flight) >= workers * 2:
+                    yield from in_flight.popleft().result()
+
+            while in_flight:
+                yield from in_flight.popleft().result()
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def _pdf_executor(self) -> ProcessPoolExecutor:
+        with self._pdf_pool_lock:
+            if self._pdf_pool is None:
+                self._pdf_pool = ProcessPoolExecutor(max_workers=self.pdf_workers, mp_context=process_context())
+            return self._pdf_pool
+
+    def close(self) -> None:
+        with self._pdf_pool_lock:
+            if self._pdf_pool is not None:
+                self._pdf_pool.shutdown(cancel_futures=True)
+                self._pdf_pool = None
+
+    def _metadata(self, path: Path, source: Optional[str]) -> dict:
+        if not path.exists():
+            raise FileNotFoundError(f"File not found: {path}")
+
+        ext = path.suffix.lower()
+
+        if ext not in self.SUPPORTED_EXTENSIONS:
+            raise ValueError(f"Unsupported file type: {ext}")
+
+        source = source or str(path.absolute())
+        return {
+            "source": source,
+            "filename": Path(source).name,
+            "extension": ext,
+        }
+
+    @staticmethod
+    def source_id(source: str) -> str:
+        return hashlib.md5(source.encode()).hexdigest()[:12]
+
+    def iter_files(self, dir_path: str | Path, recursive: bool = True) -> Iterator[Path]:
         path = Path(dir_path)
 
         if not path.is_dir():
             raise NotADirectoryError(f"Not a directory: {path}")
 
-        documents = []
         pattern = "**/*" if recursive else "*"
 
         for file_path in path.glob(pattern):
             if file_path.is_file() and file_path.suffix.lower() in self.SUPPORTED_EXTENSIONS:
-                try:
-                    doc = self.load(file_path)
-                    documents.append(doc)
-                except Exception as e:
-                    print(f"Warning: Failed to load {file_path}: {e}")
-
-        return documents
+                yield file_path
 
-    def _load_pdf(self, path: Path) -> str:
-        try:
-            from PyPDF2 import PdfReader
-        except ImportError:
-            raise ImportError("PyPDF2 is required for PDF support. Install with: pip install pypdf2")
+    def load_directory(self, dir_path: str | Path, recursive: bool = True) -> list[Document]:
+        documents = []
 
-        reader = PdfReader(path)
-        text_parts = []
+        for file_path in self.iter_files(dir_path, recursive=recursive):
+            try:
+                doc = self.load(file_path)
+                documents.append(doc)
+            except Exception as e:
+                print(f"Warning: Failed to load {file_path}: {e}")
 
-        for page_num, page in enumerate(reader.pages, 1):
-            text = page.extract_text()
-            if text:
-                text_parts.append(f"[Page {page_num}]\n{text}")
+        return documents
 
-        return "\n\n".join(text_parts)
+    def _load_pdf(self, path: Path, progress: Optional[Callable[[str, int], None]] = None) -> str:
+        return "\n\n".join(text for _, text in self.iter_pdf_pages(path, progress) if text)
 
     def _load_docx(self, path: Path) -> str:
         try:
@@ -111,16 +287,43 @@ class DocumentLoader:
         return "\n\n".join(paragraphs)
 
     def _load_text(self, path: Path) -> str:
-        encodings = ["utf-8", "utf-16", "latin-1", "cp1252"]
+        return "".join(self._iter_text(path, self._detect_encoding(path)))
 
-        for encoding in encodings:
-            try:
-                return path.read_text(encoding=encoding)
-            except UnicodeDecodeError:
+    def _iter_text(self, path: Path, encoding: str) -> Iterator[str]:
+        with open(path, encoding=encoding) as f:
+            while segment := f.read(self.segment_chars):
+                yield segment
+
+    def _detect_encoding(self, path: Path) -> str:
+        with open(path, "rb") as f:
+            bom = f.read(2)
+
+        for encoding in self.ENCODINGS:
+            if encoding == "utf-16" and bom not in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE):
                 continue
+            if self._decodes(path, encoding):
+                return encoding
 
         raise ValueError(f"Could not decode file: {path}")
 
+    def _decodes(self, path: Path, encoding: str) -> bool:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            with open(path, "rb") as f:
+                while block := f.read(self.encoding_sample_bytes):
+                    decoder.decode(block)
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return False
+        return True
+
+    def _text_type(self, ext: str) -> dict:
+        if ext in {".md", ".markdown"}:
+            return {"type": "markdown"}
+        if ext in self.CODE_EXTENSIONS:
+            return {"type": "code", "language": self._get_language(ext)}
+        return {"type": "text"}
+
     def _get_language(self, ext: str) -> str:
         lang_map = {
             ".py": "python",
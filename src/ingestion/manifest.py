@@ -0,0 +1,102 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+import json
+import sqlite3
+import threading
+
+
+@dataclass
+class ManifestEntry:
+    source: str
+    mtime: float
+    size: int
+    content_hash: str
+    doc_id: str
+    doc_type: str = "unknown"
+    chunk_ids: list[str] = field(default_factory=list)
+    chunk_hashes: list[str] = field(default_factory=list)
+
+
+class IngestManifest:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS manifest (
+                source TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                doc_type TEXT NOT NULL,
+                chunk_ids TEXT NOT NULL,
+                chunk_hashes TEXT NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def get(self, source: str) -> Optional[ManifestEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT source, mtime, size, content_hash, doc_id, doc_type, chunk_ids, chunk_hashes "
+                "FROM manifest WHERE source = ?",
+                (source,),
+            ).fetchone()
+        if row is None:
+            return None
+        return ManifestEntry(
+            source=row[0],
+            mtime=row[1],
+            size=row[2],
+            content_hash=row[3],
+            doc_id=row[4],
+            doc_type=row[5],
+            chunk_ids=json.loads(row[6]),
+            chunk_hashes=json.loads(row[7]),
+        )
+
+    def put(self, entry: ManifestEntry) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO manifest VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry.source,
+                    entry.mtime,
+                    entry.size,
+                    entry.content_hash,
+                    entry.doc_id,
+                    entry.doc_type,
+                    json.dumps(entry.chunk_ids),
+                    json.dumps(entry.chunk_hashes),
+                ),
+            )
+            self._conn.commit()
+
+    def delete(self, source: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM manifest WHERE source = ?", (source,))
+            self._conn.commit()
+
+    def sources_under(self, directory: str | Path) -> list[str]:
+        prefix = str(Path(directory).absolute()).rstrip("/") + "/"
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source FROM manifest WHERE source LIKE ? ESCAPE '\\'",
+                (escaped + "%",),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM manifest")
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM manifest").fetchone()[0]
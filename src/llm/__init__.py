@@ -1,3 +1,4 @@
-from .ollama_client import OllamaClient
+from .ollama_client import OllamaClient, OllamaUnavailableError, OllamaBusyError
+from .answer_cache import AnswerCache
 
-__all__ = ["OllamaClient"]
+__all__ = ["OllamaClient", "OllamaUnavailableError", "OllamaBusyError", "AnswerCache"]
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+import itertools
+import threading
+
+import numpy as np
+
+
+@dataclass
+class CachedAnswer:
+    bucket: tuple
+    embedding: np.ndarray
+    answer: str
+
+
+class AnswerCache:
+    def __init__(self, max_entries: int = 512, similarity_threshold: float = 0.95):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[int, CachedAnswer] = OrderedDict()
+        self._buckets: dict[tuple, list[int]] = {}
+        self._ids = itertools.count()
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_bucket(chunk_ids: list[str], model: str, prompt_hash: str) -> tuple:
+        return frozenset(chunk_ids), model, prompt_hash
+
+    def lookup(self, query_embedding: list[float], bucket: tuple, version: int) -> Optional[str]:
+        with self._lock:
+            self._check_version(version)
+            entry_ids = self._buckets.get(bucket)
+            if not entry_ids:
+                self.misses += 1
+                return None
+
+            query = self._normalize(query_embedding)
+            candidates = np.stack([self._entries[entry_id].embedding for entry_id in entry_ids])
+            similarities = candidates @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            entry_id = entry_ids[best]
+            self._entries.move_to_end(entry_id)
+            return self._entries[entry_id].answer
+
+    def store(self, query_embedding: list[float], bucket: tuple, version: int, answer: str) -> None:
+        with self._lock:
+            self._check_version(version)
+            entry_id = next(self._ids)
+            self._entries[entry_id] = CachedAnswer(bucket=bucket, embedding=self._normalize(query_embedding), answer=answer)
+            self._buckets.setdefault(bucket, []).append(entry_id)
+            while len(self._entries) > self.max_entries:
+                evicted_id, evicted = self._entries.popitem(last=False)
+                bucket_ids = self._buckets[evicted.bucket]
+                bucket_ids.remove(evicted_id)
+                if not bucket_ids:
+                    del self._buckets[evicted.bucket]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def _check_version(self, version: int) -> None:
+        if version != self._version:
+            self._entries.clear()
+            self._buckets.clear()
+            self._version = version
+
+    @staticmethod
+    def _normalize(embedding: list[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "similarity_threshold": self.similarity_threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
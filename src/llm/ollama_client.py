@@ -1,4 +1,18 @@
-from typing import Generator, Optional
+from contextlib import contextmanager
+from typing import Generator, Iterator, Optional
+import hashlib
+import threading
+import time
+
+from src.metrics import metrics
+
+
+class OllamaUnavailableError(RuntimeError):
+    pass
+
+
+class OllamaBusyError(OllamaUnavailableError):
+    pass
 
 
 class OllamaClient:
@@ -12,11 +26,45 @@ Be concise and accurate."""
         model: str = "llama3.2",
         base_url: str = "http://localhost:11434",
         system_prompt: Optional[str] = None,
+        health_interval: float = 30.0,
+        failure_threshold: int = 3,
+        recovery_timeout: float = 15.0,
+        num_parallel: int = 4,
+        queue_timeout: Optional[float] = 30.0,
+        request_timeout: Optional[float] = 300.0,
+        max_connections: int = 16,
+        max_keepalive_connections: int = 8,
+        keepalive_expiry: float = 60.0,
     ):
         self.model = model
         self.base_url = base_url
         self.system_prompt = system_prompt or self.DEFAULT_SYSTEM_PROMPT
+        self.health_interval = health_interval
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
         self._client = None
+        self._connected: Optional[bool] = None
+        self._models: list[str] = []
+        self._last_checked: Optional[float] = None
+        self._failures = 0
+        self._circuit_open_until = 0.0
+        self._state_lock = threading.Lock()
+        self._refresh_event = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+        self.num_parallel = num_parallel
+        self.queue_timeout = queue_timeout
+        self.request_timeout = request_timeout
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self._slots = threading.BoundedSemaphore(num_parallel)
+        self._queue_lock = threading.Lock()
+        self._queue_depth = 0
+        self._in_flight = 0
+        self._queued_total = 0
+        self._queue_timeouts = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
 
     @property
     def client(self):
@@ -25,7 +73,16 @@ Be concise and accurate."""
                 import ollama
             except ImportError:
                 raise ImportError("ollama is required. Install with: pip install ollama")
-            self._client = ollama.Client(host=self.base_url)
+            import httpx
+            self._client = ollama.Client(
+                host=self.base_url,
+                timeout=self.request_timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+            )
         return self._client
 
     def generate(
@@ -34,7 +91,9 @@ Be concise and accurate."""
         context: str,
         stream: bool = False,
     ) -> str | Generator[str, None, None]:
-        prompt = self._build_prompt(query, context)
+        self._ensure_available()
+        with metrics.timer("prompt_build"):
+            prompt = self._build_prompt(query, context)
         if stream:
             return self._stream_response(prompt)
         else:
@@ -48,39 +107,166 @@ Question: {query}
 
 Answer based on the context above. Cite sources using [Source X] notation."""
 
+    def prompt_text(self, query: str, context: str) -> str:
+        return f"{self.system_prompt}\n\n{self._build_prompt(query, context)}"
+
+    def prompt_hash(self) -> str:
+        template = self._build_prompt("", "")
+        return hashlib.sha256(f"{self.system_prompt}\0{template}".encode()).hexdigest()[:16]
+
     def _generate_response(self, prompt: str) -> str:
-        response = self.client.chat(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": prompt},
-            ],
-        )
+        with self._generation_slot():
+            try:
+                with metrics.timer("llm_generate"):
+                    response = self.client.chat(
+                        model=self.model,
+                        messages=[
+                            {"role": "system", "content": self.system_prompt},
+                            {"role": "user", "content": prompt},
+                        ],
+                    )
+            except Exception:
+                self._record_failure()
+                raise
+        self._record_success()
         return response["message"]["content"]
 
     def _stream_response(self, prompt: str) -> Generator[str, None, None]:
-        stream = self.client.chat(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": prompt},
-            ],
-            stream=True,
-        )
-        for chunk in stream:
-            if "message" in chunk and "content" in chunk["message"]:
-                yield chunk["message"]["content"]
+        with self._generation_slot():
+            start = time.perf_counter()
+            first_token = True
+            try:
+                stream = self.client.chat(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": self.system_prompt},
+                        {"role": "user", "content": prompt},
+                    ],
+                    stream=True,
+                )
+                for chunk in stream:
+                    if first_token:
+                        metrics.observe("llm_first_token", time.perf_counter() - start)
+                        first_token = False
+                    if "message" in chunk and "content" in chunk["message"]:
+                        yield chunk["message"]["content"]
+                metrics.observe("llm_generate", time.perf_counter() - start)
+            except Exception:
+                self._record_failure()
+                raise
+        self._record_success()
 
-    def list_models(self) -> list[str]:
+    @contextmanager
+    def _generation_slot(self) -> Iterator[None]:
+        start = time.monotonic()
+        with self._queue_lock:
+            self._queue_depth += 1
+            self._queued_total += 1
+        acquired = self._slots.acquire(timeout=self.queue_timeout)
+        waited = time.monotonic() - start
+        metrics.observe("llm_queue_wait", waited)
+        with self._queue_lock:
+            self._queue_depth -= 1
+            self._wait_seconds_total += waited
+            self._wait_seconds_max = max(self._wait_seconds_max, waited)
+            if not acquired:
+                self._queue_timeouts += 1
+            else:
+                self._in_flight += 1
+        if not acquired:
+            raise OllamaBusyError(
+                f"Timed out after {waited:.1f}s waiting for one of {self.num_parallel} generation slots"
+            )
         try:
-            models = self.client.list()
-            return [m["name"] for m in models.get("models", [])]
-        except Exception:
-            return []
+            yield
+        finally:
+            with self._queue_lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    def list_models(self) -> list[str]:
+        self.check_connection()
+        return list(self._models)
 
     def check_connection(self) -> bool:
+        if self._last_checked is None:
+            self.refresh()
+        self._start_monitor()
+        return bool(self._connected)
+
+    def is_available(self) -> bool:
+        return self.check_connection() and not self.circuit_open
+
+    @property
+    def circuit_open(self) -> bool:
+        return time.monotonic() < self._circuit_open_until
+
+    def refresh(self) -> bool:
         try:
-            self.client.list()
-            return True
+            models = self.client.list()
         except Exception:
+            with self._state_lock:
+                self._connected = False
+                self._last_checked = time.monotonic()
+                self._circuit_open_until = time.monotonic() + self.recovery_timeout
             return False
+
+        with self._state_lock:
+            self._models = [m.get("name") or m.get("model") for m in models.get("models", [])]
+            self._connected = True
+            self._last_checked = time.monotonic()
+            self._failures = 0
+            self._circuit_open_until = 0.0
+        return True
+
+    def _ensure_available(self) -> None:
+        if self.circuit_open:
+            raise OllamaUnavailableError(
+                f"Ollama at {self.base_url} is unavailable; retrying in "
+                f"{self._circuit_open_until - time.monotonic():.1f}s"
+            )
+
+    def _record_success(self) -> None:
+        with self._state_lock:
+            self._connected = True
+            self._failures = 0
+            self._circuit_open_until = 0.0
+
+    def _record_failure(self) -> None:
+        with self._state_lock:
+            self._connected = False
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._circuit_open_until = time.monotonic() + self.recovery_timeout
+        self._refresh_event.set()
+
+    def _start_monitor(self) -> None:
+        if self._monitor is not None:
+            return
+        with self._state_lock:
+            if self._monitor is not None:
+                return
+            self._monitor = threading.Thread(target=self._monitor_loop, name="ollama-health", daemon=True)
+            self._monitor.start()
+
+    def _monitor_loop(self) -> None:
+        while True:
+            interval = self.health_interval if self._connected else min(self.health_interval, self.recovery_timeout)
+            self._refresh_event.wait(interval)
+            self._refresh_event.clear()
+            self.refresh()
+
+    def get_stats(self) -> dict:
+        return {
+            "connected": bool(self._connected),
+            "circuit_open": self.circuit_open,
+            "consecutive_failures": self._failures,
+            "last_checked_seconds_ago": time.monotonic() - self._last_checked if self._last_checked else None,
+            "num_parallel": self.num_parallel,
+            "in_flight": self._in_flight,
+            "queue_depth": self._queue_depth,
+            "queued_total": self._queued_total,
+            "queue_timeouts": self._queue_timeouts,
+            "queue_wait_seconds_avg": self._wait_seconds_total / self._queued_total if self._queued_total else 0.0,
+            "queue_wait_seconds_max": self._wait_seconds_max,
+        }
@@ -0,0 +1,167 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+import re
+import threading
+import time
+import uuid
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+TRACE_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+@dataclass
+class Trace:
+    trace_id: str
+    stages: list[tuple[str, float]] = field(default_factory=list)
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.stages.append((stage, seconds))
+
+    def server_timing(self) -> str:
+        totals: dict[str, float] = {}
+        for stage, seconds in self.stages:
+            totals[stage] = totals.get(stage, 0.0) + seconds
+        return ", ".join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in totals.items())
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def start_trace(trace_id: Optional[str] = None) -> Iterator[Trace]:
+    if not trace_id or not TRACE_ID_PATTERN.match(trace_id):
+        trace_id = uuid.uuid4().hex
+    trace = Trace(trace_id)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> tuple[list[int], float, int]:
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        counts, _, count = self.snapshot()
+        if not count:
+            return None
+        rank = q * count
+        cumulative = 0
+        for index, bucket_count in enumerate(counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+
+class Timer:
+    __slots__ = ("registry", "stage", "start")
+
+    def __init__(self, registry: "MetricsRegistry", stage: str):
+        self.registry = registry
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.registry.observe(self.stage, time.perf_counter() - self.start)
+
+
+class MetricsRegistry:
+    def __init__(self, namespace: str = "rag", buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.namespace = namespace
+        self.buckets = buckets
+        self.enabled = True
+        self._histograms: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage: str) -> Histogram:
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, Histogram(self.buckets))
+        return histogram
+
+    def observe(self, stage: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        self.histogram(stage).observe(seconds)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.record(stage, seconds)
+
+    def timer(self, stage: str) -> "Timer":
+        return Timer(self, stage)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    def _sorted(self) -> list[tuple[str, Histogram]]:
+        with self._lock:
+            return sorted(self._histograms.items())
+
+    def get_stats(self) -> dict:
+        stats = {}
+        for stage, histogram in self._sorted():
+            _, total, count = histogram.snapshot()
+            if not count:
+                continue
+            stats[stage] = {
+                "count": count,
+                "avg_ms": round(total / count * 1000, 3),
+                "p50_ms": round(histogram.quantile(0.5) * 1000, 3),
+                "p95_ms": round(histogram.quantile(0.95) * 1000, 3),
+                "p99_ms": round(histogram.quantile(0.99) * 1000, 3),
+            }
+        return stats
+
+    def render_prometheus(self) -> str:
+        name = f"{self.namespace}_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Time spent in each query and ingest stage.",
+            f"# TYPE {name} histogram",
+        ]
+        for stage, histogram in self._sorted():
+            counts, total, count = histogram.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total!r}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
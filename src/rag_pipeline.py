@@ -1,13 +1,15 @@
 from pathlib import Path
-from typing import Optional, Generator
+import time
+from typing import Callable, Optional, Generator, Iterator
 
-from src.ingestion import DocumentLoader
-from src.chunking import TextSplitter
-from src.chunking.text_splitter import CodeSplitter
+from src.ingestion import DocumentLoader, IngestManifest
+from src.chunking import CodeSplitter, TextSplitter, TokenTextSplitter
 from src.embeddings import Embedder
-from src.vectorstore import ChromaStore
-from src.retrieval import Retriever
-from src.llm import OllamaClient
+from src.vectorstore import ChromaStore, MatrixStore, ChunkSink, BM25Index
+from src.retrieval import Retriever, RetrievalResult, QueryCache, Reranker, ContextBuilder
+from src.llm import OllamaClient, AnswerCache
+from src.ingest_pipeline import IngestPipeline, ingest_result
+from src.metrics import metrics
 
 
 class RAGPipeline:
@@ -15,53 +17,225 @@ class RAGPipeline:
         self,
         collection_name: str = "documents",
         persist_directory: str = "./chroma_db",
+        vector_backend: str = "chroma",
+        matrix_dtype: str = "float32",
+        matrix_quantization: str = "none",
+        matrix_rescore_multiplier: Optional[int] = None,
         model: str = "llama3.2",
         chunk_size: int = 512,
         chunk_overlap: int = 50,
+        chunk_unit: str = "characters",
+        chunk_tokens: Optional[int] = None,
+        chunk_token_overlap: int = 16,
         top_k: int = 5,
+        embedding_cache_dir: Optional[str] = None,
+        embedding_cache_size: int = 100_000,
+        embedding_cache_flush_interval: Optional[float] = 30.0,
+        query_cache_size: int = 1024,
+        query_cache_ttl: Optional[float] = 300.0,
+        manifest_path: Optional[str] = None,
+        ingest_workers: Optional[int] = None,
+        ingest_batch_size: int = 256,
+        ingest_max_tokens: Optional[int] = 65_536,
+        ingest_flush_interval: Optional[float] = 5.0,
+        ingest_pdf_workers: Optional[int] = None,
+        ingest_pdf_batch_pages: int = 16,
+        ingest_stream_min_bytes: Optional[int] = 32 * 1024 * 1024,
+        ollama_base_url: str = "http://localhost:11434",
+        ollama_health_interval: float = 30.0,
+        ollama_recovery_timeout: float = 15.0,
+        ollama_num_parallel: int = 4,
+        ollama_queue_timeout: Optional[float] = 30.0,
+        ollama_max_connections: int = 16,
+        answer_cache_size: int = 512,
+        answer_cache_threshold: float = 0.95,
+        retrieval_mode: str = "dense",
+        lexical_index_dir: Optional[str] = None,
+        candidate_multiplier: int = 4,
+        reranker_model: Optional[str] = None,
+        reranker_budget: Optional[float] = 0.5,
+        reranker_cache_size: int = 10_000,
+        context_max_tokens: Optional[int] = 2048,
+        context_duplicate_threshold: float = 0.9,
+        metrics_enabled: bool = True,
     ):
-        self.loader = DocumentLoader()
-        self.text_splitter = TextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        metrics.enabled = metrics_enabled
+        self.loader = DocumentLoader(pdf_workers=ingest_pdf_workers, pdf_batch_pages=ingest_pdf_batch_pages)
+        self.manifest = IngestManifest(manifest_path or Path(persist_directory) / "ingest_manifest.sqlite3")
+        self.embedder = Embedder(
+            cache_dir=embedding_cache_dir,
+            cache_size=embedding_cache_size,
+            cache_flush_interval=embedding_cache_flush_interval,
+        )
+        if chunk_unit == "characters":
+            self.text_splitter = TextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        elif chunk_unit == "tokens":
+            self.text_splitter = TokenTextSplitter(
+                model_name=self.embedder.model_name,
+                chunk_size=chunk_tokens,
+                chunk_overlap=chunk_token_overlap,
+                max_seq_length=self.embedder.max_seq_length,
+            )
+        else:
+            raise ValueError(f"Unknown chunk unit: {chunk_unit}")
         self.code_splitter = CodeSplitter(chunk_size=1000, chunk_overlap=100)
-        self.embedder = Embedder()
-        self.vector_store = ChromaStore(
-            collection_name=collection_name,
-            persist_directory=persist_directory,
-            embedder=self.embedder,
+        lexical_index = None
+        if retrieval_mode == "hybrid":
+            lexical_index = BM25Index(lexical_index_dir or Path(persist_directory) / "bm25")
+        if vector_backend == "chroma":
+            self.vector_store = ChromaStore(
+                collection_name=collection_name,
+                persist_directory=persist_directory,
+                embedder=self.embedder,
+                lexical_index=lexical_index,
+            )
+        elif vector_backend == "matrix":
+            self.vector_store = MatrixStore(
+                collection_name=collection_name,
+                persist_directory=persist_directory,
+                embedder=self.embedder,
+                lexical_index=lexical_index,
+                dtype=matrix_dtype,
+                quantization=matrix_quantization,
+                rescore_multiplier=matrix_rescore_multiplier,
+            )
+        else:
+            raise ValueError(f"Unknown vector backend: {vector_backend}")
+        if lexical_index is not None and len(lexical_index) == 0 and self.vector_store.count() > 0:
+            self.vector_store.rebuild_lexical_index()
+        query_cache = QueryCache(max_entries=query_cache_size, ttl_seconds=query_cache_ttl) if query_cache_size else None
+        self.reranker = (
+            Reranker(model_name=reranker_model, cache_size=reranker_cache_size, budget_seconds=reranker_budget)
+            if reranker_model else None
+        )
+        self.retriever = Retriever(
+            vector_store=self.vector_store,
+            top_k=top_k,
+            cache=query_cache,
+            mode=retrieval_mode,
+            candidate_multiplier=candidate_multiplier,
+            reranker=self.reranker,
+            context_builder=ContextBuilder(
+                max_tokens=context_max_tokens,
+                duplicate_threshold=context_duplicate_threshold,
+            ),
+        )
+        self.llm = OllamaClient(
+            model=model,
+            base_url=ollama_base_url,
+            health_interval=ollama_health_interval,
+            recovery_timeout=ollama_recovery_timeout,
+            num_parallel=ollama_num_parallel,
+            queue_timeout=ollama_queue_timeout,
+            max_connections=ollama_max_connections,
+        )
+        self.answer_cache = (
+            AnswerCache(max_entries=answer_cache_size, similarity_threshold=answer_cache_threshold)
+            if answer_cache_size else None
+        )
+        self.ingest_pipeline = IngestPipeline(
+            loader=self.loader,
+            text_splitter=self.text_splitter,
+            code_splitter=self.code_splitter,
+            vector_store=self.vector_store,
+            manifest=self.manifest,
+            workers=ingest_workers,
+            batch_size=ingest_batch_size,
+            max_tokens=ingest_max_tokens,
+            max_interval=ingest_flush_interval,
+            stream_min_bytes=ingest_stream_min_bytes,
         )
-        self.retriever = Retriever(vector_store=self.vector_store, top_k=top_k)
-        self.llm = OllamaClient(model=model)
 
-    def ingest_file(self, file_path: str) -> dict:
-        doc = self.loader.load(file_path)
-        if doc.metadata.get("type") == "code":
-            chunks = self.code_splitter.split_document(doc)
-        else:
-            chunks = self.text_splitter.split_document(doc)
-        self.vector_store.add_chunks(chunks)
-        return {
-            "filename": doc.metadata["filename"],
-            "doc_id": doc.doc_id,
-            "chunks": len(chunks),
-            "type": doc.metadata.get("type", "unknown"),
-        }
+    @classmethod
+    def from_settings(cls, settings) -> "RAGPipeline":
+        return cls(
+            collection_name=settings.chroma_collection,
+            persist_directory=settings.chroma_persist_dir,
+            vector_backend=settings.vector_backend,
+            matrix_dtype=settings.matrix_dtype,
+            matrix_quantization=settings.matrix_quantization,
+            matrix_rescore_multiplier=settings.matrix_rescore_multiplier,
+            model=settings.ollama_model,
+            chunk_size=settings.chunk_size,
+            chunk_overlap=settings.chunk_overlap,
+            chunk_unit=settings.chunk_unit,
+            chunk_tokens=settings.chunk_tokens,
+            chunk_token_overlap=settings.chunk_token_overlap,
+            top_k=settings.top_k,
+            embedding_cache_dir=settings.embedding_cache_dir,
+            embedding_cache_size=settings.embedding_cache_size,
+            embedding_cache_flush_interval=settings.embedding_cache_flush_interval,
+            query_cache_size=settings.query_cache_size,
+            query_cache_ttl=settings.query_cache_ttl,
+            manifest_path=settings.ingest_manifest_path,
+            ingest_workers=settings.ingest_workers,
+            ingest_batch_size=settings.ingest_batch_size,
+            ingest_max_tokens=settings.ingest_max_tokens,
+            ingest_flush_interval=settings.ingest_flush_interval,
+            ingest_pdf_workers=settings.ingest_pdf_workers,
+            ingest_pdf_batch_pages=settings.ingest_pdf_batch_pages,
+            ingest_stream_min_bytes=settings.ingest_stream_min_bytes,
+            ollama_base_url=settings.ollama_base_url,
+            ollama_health_interval=settings.ollama_health_interval,
+            ollama_recovery_timeout=settings.ollama_recovery_timeout,
+            ollama_num_parallel=settings.ollama_num_parallel,
+            ollama_queue_timeout=settings.ollama_queue_timeout,
+            ollama_max_connections=settings.ollama_max_connections,
+            answer_cache_size=settings.answer_cache_size,
+            answer_cache_threshold=settings.answer_cache_threshold,
+            retrieval_mode=settings.retrieval_mode,
+            lexical_index_dir=settings.lexical_index_dir,
+            candidate_multiplier=settings.retrieval_candidate_multiplier,
+            reranker_model=settings.reranker_model,
+            reranker_budget=settings.reranker_budget,
+            reranker_cache_size=settings.reranker_cache_size,
+            context_max_tokens=settings.context_max_tokens,
+            context_duplicate_threshold=settings.context_duplicate_threshold,
+            metrics_enabled=settings.metrics_enabled,
+        )
+
+    def ingest_file(
+        self,
+        file_path: str,
+        source: Optional[str] = None,
+        sink: Optional[ChunkSink] = None,
+        progress: Optional[Callable[[str, int], None]] = None,
+    ) -> dict:
+        path = Path(file_path)
+        source = source or str(path.absolute())
+        results = list(self.ingest_pipeline.run(
+            [(path, source)], parallel=False, raise_errors=True, sink=sink, progress=progress
+        ))
+        return results[0]
+
+    def make_sink(self, on_write: Optional[Callable[[int], None]] = None) -> ChunkSink:
+        return self.ingest_pipeline.make_sink(on_write=on_write)
+
+    def iter_ingest_directory(self, dir_path: str, recursive: bool = True) -> Iterator[dict]:
+        files = (
+            (file_path, str(file_path.absolute()))
+            for file_path in self.loader.iter_files(dir_path, recursive=recursive)
+        )
+        yield from self.ingest_pipeline.run(files)
+
+        root = Path(dir_path).absolute()
+        for source in self.manifest.sources_under(root):
+            source_path = Path(source)
+            if not recursive and source_path.parent != root:
+                continue
+            if not source_path.exists():
+                yield self.remove_source(source)
 
     def ingest_directory(self, dir_path: str, recursive: bool = True) -> list[dict]:
-        documents = self.loader.load_directory(dir_path, recursive=recursive)
-        results = []
-        for doc in documents:
-            if doc.metadata.get("type") == "code":
-                chunks = self.code_splitter.split_document(doc)
-            else:
-                chunks = self.text_splitter.split_document(doc)
-            self.vector_store.add_chunks(chunks)
-            results.append({
-                "filename": doc.metadata["filename"],
-                "doc_id": doc.doc_id,
-                "chunks": len(chunks),
-                "type": doc.metadata.get("type", "unknown"),
-            })
-        return results
+        return list(self.iter_ingest_directory(dir_path, recursive=recursive))
+
+    def remove_source(self, source: str) -> dict:
+        entry = self.manifest.get(source)
+        if entry is None:
+            raise KeyError(f"Source not in manifest: {source}")
+        self.vector_store.delete_chunks(entry.chunk_ids)
+        self.manifest.delete(source)
+        return ingest_result(entry, "deleted")
 
     def query(
         self,
@@ -69,27 +243,100 @@ class RAGPipeline:
         top_k: Optional[int] = None,
         stream: bool = False,
     ) -> dict | Generator[dict, None, None]:
-        results = self.retriever.retrieve(question, top_k=top_k)
-        context = self.retriever.retrieve_with_context(question, top_k=top_k)
-        sources = self.retriever.get_sources(results)
+        start = time.perf_counter()
+        retrieval = self.retriever.retrieve_result(question, top_k=top_k)
+        cached_answer = self._cached_answer(retrieval)
         if stream:
-            return self._stream_query(question, context, sources, results)
+            return self._stream_query(question, retrieval, cached_answer, start)
+        elif cached_answer is not None:
+            result = {
+                "answer": cached_answer,
+                "sources": retrieval.sources,
+                "context_chunks": retrieval.chunks,
+                "cached": True,
+                "prompt_tokens": self._prompt_tokens(question, retrieval),
+            }
         else:
-            answer = self.llm.generate(question, context, stream=False)
-            return {"answer": answer, "sources": sources, "context_chunks": results}
+            answer = self.llm.generate(question, retrieval.context, stream=False)
+            self._store_answer(retrieval, answer)
+            result = {
+                "answer": answer,
+                "sources": retrieval.sources,
+                "context_chunks": retrieval.chunks,
+                "cached": False,
+                "prompt_tokens": self._prompt_tokens(question, retrieval),
+            }
+        metrics.observe("query", time.perf_counter() - start)
+        return result
+
+    def query_many(self, questions: list[str], top_k: Optional[int] = None) -> list[dict]:
+        start = time.perf_counter()
+        results = []
+        for question, retrieval in zip(questions, self.retriever.retrieve_many_results(questions, top_k=top_k)):
+            answer = self._cached_answer(retrieval)
+            cached = answer is not None
+            if not cached:
+                answer = self.llm.generate(question, retrieval.context, stream=False)
+                self._store_answer(retrieval, answer)
+            results.append({
+                "question": question,
+                "answer": answer,
+                "sources": retrieval.sources,
+                "context_chunks": retrieval.chunks,
+                "cached": cached,
+                "prompt_tokens": self._prompt_tokens(question, retrieval),
+            })
+        metrics.observe("query_batch", time.perf_counter() - start)
+        return results
 
     def _stream_query(
         self,
         question: str,
-        context: str,
-        sources: list[str],
-        results: list[dict],
+        retrieval: RetrievalResult,
+        cached_answer: Optional[str] = None,
+        start: Optional[float] = None,
     ) -> Generator[dict, None, None]:
+        start = start or time.perf_counter()
+        sources = retrieval.sources
+        if cached_answer is not None:
+            tokens = iter([cached_answer])
+        else:
+            tokens = self.llm.generate(question, retrieval.context, stream=True)
         full_answer = ""
-        for token in self.llm.generate(question, context, stream=True):
+        for token in tokens:
+            if not full_answer and token:
+                metrics.observe("query_first_token", time.perf_counter() - start)
             full_answer += token
             yield {"token": token, "partial_answer": full_answer, "sources": sources, "done": False}
-        yield {"token": "", "partial_answer": full_answer, "answer": full_answer, "sources": sources, "context_chunks": results, "done": True}
+        if cached_answer is None:
+            self._store_answer(retrieval, full_answer)
+        yield {
+            "token": "",
+            "partial_answer": full_answer,
+            "answer": full_answer,
+            "sources": sources,
+            "context_chunks": retrieval.chunks,
+            "cached": cached_answer is not None,
+            "prompt_tokens": self._prompt_tokens(question, retrieval),
+            "done": True,
+        }
+        metrics.observe("query", time.perf_counter() - start)
+
+    def _prompt_tokens(self, question: str, retrieval: RetrievalResult) -> int:
+        return self.retriever.context_builder.count_tokens(self.llm.prompt_text(question, retrieval.context))
+
+    def _answer_bucket(self, retrieval: RetrievalResult) -> tuple:
+        return AnswerCache.make_bucket([chunk["id"] for chunk in retrieval.chunks], self.llm.model, self.llm.prompt_hash())
+
+    def _cached_answer(self, retrieval: RetrievalResult) -> Optional[str]:
+        if self.answer_cache is None or not retrieval.chunks or retrieval.query_embedding is None:
+            return None
+        return self.answer_cache.lookup(retrieval.query_embedding, self._answer_bucket(retrieval), self.vector_store.version)
+
+    def _store_answer(self, retrieval: RetrievalResult, answer: str) -> None:
+        if self.answer_cache is None or not retrieval.chunks or retrieval.query_embedding is None:
+            return
+        self.answer_cache.store(retrieval.query_embedding, self._answer_bucket(retrieval), self.vector_store.version, answer)
 
     def get_stats(self) -> dict:
         store_stats = self.vector_store.get_stats()
@@ -97,10 +344,23 @@ class RAGPipeline:
         available_models = self.llm.list_models() if ollama_connected else []
         return {
             "vector_store": store_stats,
+            "embedder": self.embedder.get_stats(),
+            "retrieval_cache": self.retriever.cache.get_stats() if self.retriever.cache else {},
+            "answer_cache": self.answer_cache.get_stats() if self.answer_cache else {},
+            "reranker": self.reranker.get_stats() if self.reranker else {},
+            "latency": metrics.get_stats(),
             "ollama_connected": ollama_connected,
             "available_models": available_models,
             "current_model": self.llm.model,
+            "ollama": self.llm.get_stats(),
         }
 
     def clear(self) -> None:
         self.vector_store.clear()
+        if self.answer_cache is not None:
+            self.answer_cache.clear()
+        self.manifest.clear()
+
+    def close(self) -> None:
+        self.loader.close()
+        self.embedder.close()
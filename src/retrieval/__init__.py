@@ -1,3 +1,6 @@
-from .retriever import Retriever
+from .retriever import Retriever, RetrievalResult
+from .cache import QueryCache
+from .reranker import Reranker
+from .context import ContextBuilder, BuiltContext
 
-__all__ = ["Retriever"]
+__all__ = ["Retriever", "RetrievalResult", "QueryCache", "Reranker", "ContextBuilder", "BuiltContext"]
@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from typing import Optional
+import json
+import threading
+import time
+
+
+class QueryCache:
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, tuple[float, list[dict], list[float]]] = OrderedDict()
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(query: str, top_k: int, where: Optional[dict] = None) -> tuple:
+        normalized = " ".join(query.split())
+        where_key = json.dumps(where, sort_keys=True, default=str) if where else None
+        return normalized, top_k, where_key
+
+    def get(self, key: tuple, version: int) -> Optional[tuple[list[dict], list[float]]]:
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds is not None and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._copy(entry[1]), entry[2]
+
+    def put(self, key: tuple, version: int, results: list[dict], query_embedding: list[float]) -> None:
+        with self._lock:
+            if self._version is not None and version < self._version:
+                return
+            self._check_version(version)
+            self._entries[key] = (time.monotonic(), self._copy(results), query_embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _check_version(self, version: int) -> None:
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    @staticmethod
+    def _copy(results: list[dict]) -> list[dict]:
+        return [{**r, "metadata": dict(r["metadata"])} for r in results]
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,159 @@
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+import re
+
+from src.vectorstore.sink import estimate_tokens
+
+WORD_RE = re.compile(r"\w+")
+
+
+@dataclass
+class BuiltContext:
+    context: str
+    chunks: list[dict] = field(default_factory=list)
+    tokens: int = 0
+    merged: int = 0
+    duplicates: int = 0
+    over_budget: int = 0
+
+
+class ContextBuilder:
+    def __init__(
+        self,
+        max_tokens: Optional[int] = 2048,
+        token_counter: Callable[[str], int] = estimate_tokens,
+        duplicate_threshold: float = 0.9,
+        shingle_size: int = 3,
+        max_overlap: int = 1000,
+    ):
+        self.max_tokens = max_tokens
+        self.token_counter = token_counter
+        self.duplicate_threshold = duplicate_threshold
+        self.shingle_size = shingle_size
+        self.max_overlap = max_overlap
+
+    def count_tokens(self, text: str) -> int:
+        return self.token_counter(text)
+
+    def build(self, results: list[dict]) -> BuiltContext:
+        if not results:
+            return BuiltContext(context="No relevant documents found.")
+
+        selected: list[dict] = []
+        shingles: list[set] = []
+        duplicates = over_budget = 0
+        context, sections, tokens = "", [], 0
+
+        for result in results:
+            result_shingles = self._shingles(result["content"])
+            if any(self._similarity(result_shingles, other) >= self.duplicate_threshold for other in shingles):
+                duplicates += 1
+                continue
+
+            candidate_sections = self._merge(selected + [result])
+            candidate_context = self._render(candidate_sections)
+            candidate_tokens = self.token_counter(candidate_context)
+            if self.max_tokens is not None and candidate_tokens > self.max_tokens:
+                over_budget += 1
+                continue
+
+            selected.append(result)
+            shingles.append(result_shingles)
+            context, sections, tokens = candidate_context, candidate_sections, candidate_tokens
+
+        if not selected:
+            first = results[0]
+            sections = [(first, self._fit(first["content"]))]
+            context = self._render(sections)
+            tokens = self.token_counter(context)
+            selected = [first]
+
+        return BuiltContext(
+            context=context,
+            chunks=selected,
+            tokens=tokens,
+            merged=len(selected) - len(sections),
+            duplicates=duplicates,
+            over_budget=over_budget,
+        )
+
+    def _merge(self, results: list[dict]) -> list[tuple[dict, str]]:
+        positioned = []
+        for rank, result in enumerate(results):
+            metadata = result.get("metadata") or {}
+            doc_id = metadata.get("doc_id")
+            chunk_index = metadata.get("chunk_index")
+            position = (rank,) if doc_id is None or chunk_index is None else (doc_id, chunk_index)
+            positioned.append((rank, position, result, result["content"]))
+
+        runs: list[list] = []
+        for rank, position, result, content in sorted(positioned, key=lambda item: self._order(item[1])):
+            previous = runs[-1] if runs else None
+            if (
+                previous is not None
+                and len(position) == 2
+                and len(previous[1]) == 2
+                and previous[1][0] == position[0]
+                and previous[1][1] + 1 == position[1]
+            ):
+                previous[1] = position
+                previous[3] = self._join(previous[3], content)
+                if rank < previous[0]:
+                    previous[0], previous[2] = rank, result
+                continue
+            runs.append([rank, position, result, content])
+
+        runs.sort(key=lambda run: run[0])
+        return [(result, content) for _, _, result, content in runs]
+
+    @staticmethod
+    def _order(position: tuple) -> tuple:
+        if len(position) == 1:
+            return (1, "", position[0])
+        return (0, str(position[0]), int(position[1]))
+
+    def _join(self, first: str, second: str) -> str:
+        limit = min(len(first), len(second), self.max_overlap)
+        probe = second[:min(32, limit)]
+        if probe:
+            start = max(0, len(first) - limit)
+            position = first.find(probe, start)
+            while position != -1:
+                if second.startswith(first[position:]):
+                    return first + second[len(first) - position:]
+                position = first.find(probe, position + 1)
+        return f"{first}\n{second}"
+
+    def _render(self, sections: list[tuple[dict, str]]) -> str:
+        parts = []
+        for i, (result, content) in enumerate(sections, 1):
+            source = result["metadata"].get("filename", "Unknown")
+            if "page" in result["metadata"]:
+                source = f"{source}, page {result['metadata']['page']}"
+            score = result.get("score") or 0
+            parts.append(f"[Source {i}: {source} (relevance: {score:.2f})]\n{content}")
+        return "\n\n---\n\n".join(parts)
+
+    def _fit(self, content: str) -> str:
+        if self.max_tokens is None:
+            return content
+        low, high = 0, len(content)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.token_counter(content[:middle]) <= self.max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        return content[:low]
+
+    def _shingles(self, text: str) -> set:
+        words = WORD_RE.findall(text.lower())
+        if len(words) < self.shingle_size:
+            return {tuple(words)}
+        return {tuple(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+
+    @staticmethod
+    def _similarity(first: set, second: set) -> float:
+        if not first or not second:
+            return 0.0
+        return len(first & second) / len(first | second)
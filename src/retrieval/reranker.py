@@ -0,0 +1,135 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Optional
+import hashlib
+import math
+import threading
+import time
+
+
+class Reranker:
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        batch_size: int = 32,
+        cache_size: int = 10_000,
+        budget_seconds: Optional[float] = 0.5,
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.budget_seconds = budget_seconds
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._scores: OrderedDict[bytes, float] = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reranker")
+        self._idle = threading.Semaphore(1)
+        self.reranked = 0
+        self.fallbacks = 0
+        self.busy_skips = 0
+        self.pairs_scored = 0
+        self.cache_hits = 0
+        self.last_latency: Optional[float] = None
+
+    @property
+    def model(self):
+        with self._model_lock:
+            if self._model is None:
+                try:
+                    from sentence_transformers import CrossEncoder
+                except ImportError:
+                    raise ImportError(
+                        "sentence-transformers is required. Install with: pip install sentence-transformers"
+                    )
+                self._model = CrossEncoder(self.model_name)
+            return self._model
+
+    def rerank(self, query: str, results: list[dict], top_n: int) -> list[dict]:
+        if len(results) <= 1:
+            return results[:top_n]
+
+        start = time.perf_counter()
+        keys = [self._key(query, r["content"]) for r in results]
+        scores = self._cached_scores(keys)
+        misses = [i for i, score in enumerate(scores) if score is None]
+
+        if misses:
+            if not self._idle.acquire(blocking=self.budget_seconds is None):
+                self.busy_skips += 1
+                self.fallbacks += 1
+                self.last_latency = time.perf_counter() - start
+                return results[:top_n]
+            future = self._executor.submit(
+                self._score, query, [results[i]["content"] for i in misses], [keys[i] for i in misses]
+            )
+            future.add_done_callback(lambda _: self._idle.release())
+            try:
+                computed = future.result(timeout=self.budget_seconds)
+            except FutureTimeoutError:
+                future.cancel()
+                self.fallbacks += 1
+                self.last_latency = time.perf_counter() - start
+                return results[:top_n]
+            for i, score in zip(misses, computed):
+                scores[i] = score
+
+        ranked = sorted(
+            (
+                {**r, "vector_score": r.get("score"), "rerank_score": score, "score": 1 / (1 + math.exp(-score))}
+                for r, score in zip(results, scores)
+            ),
+            key=lambda r: r["rerank_score"],
+            reverse=True,
+        )
+        self.reranked += 1
+        self.last_latency = time.perf_counter() - start
+        return ranked[:top_n]
+
+    def _score(self, query: str, contents: list[str], keys: list[bytes]) -> list[float]:
+        pairs = [(query, content) for content in contents]
+        predicted = self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+        scores = [float(score) for score in predicted]
+        with self._lock:
+            self.pairs_scored += len(pairs)
+            for key, score in zip(keys, scores):
+                self._scores[key] = score
+                self._scores.move_to_end(key)
+            while len(self._scores) > self.cache_size:
+                self._scores.popitem(last=False)
+        return scores
+
+    def _cached_scores(self, keys: list[bytes]) -> list[Optional[float]]:
+        scores = []
+        with self._lock:
+            for key in keys:
+                score = self._scores.get(key)
+                if score is not None:
+                    self._scores.move_to_end(key)
+                    self.cache_hits += 1
+                scores.append(score)
+        return scores
+
+    def _key(self, query: str, content: str) -> bytes:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(query.encode())
+        digest.update(b"\0")
+        digest.update(content.encode())
+        return digest.digest()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scores.clear()
+
+    def get_stats(self) -> dict:
+        return {
+            "model_name": self.model_name,
+            "budget_seconds": self.budget_seconds,
+            "reranked": self.reranked,
+            "fallbacks": self.fallbacks,
+            "busy_skips": self.busy_skips,
+            "pairs_scored": self.pairs_scored,
+            "cache_hits": self.cache_hits,
+            "cached_pairs": len(self._scores),
+            "last_latency_ms": round(self.last_latency * 1000, 2) if self.last_latency is not None else None,
+        }
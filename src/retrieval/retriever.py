@@ -1,18 +1,56 @@
+from dataclasses import dataclass, field
 from typing import Optional
 
-from src.vectorstore import ChromaStore
+from src.metrics import metrics
+from src.vectorstore import ChromaStore, VectorStore, validate_where
+from .cache import QueryCache
+from .context import ContextBuilder
+from .reranker import Reranker
+
+
+def normalize_filter(filter_metadata: Optional[dict]) -> Optional[dict]:
+    if not filter_metadata:
+        return None
+    if len(filter_metadata) != 1:
+        filter_metadata = {"$and": [{key: value} for key, value in filter_metadata.items()]}
+    validate_where(filter_metadata)
+    return filter_metadata
+
+
+@dataclass
+class RetrievalResult:
+    query: str
+    chunks: list[dict] = field(default_factory=list)
+    context: str = ""
+    sources: list[str] = field(default_factory=list)
+    query_embedding: Optional[list[float]] = None
+    context_tokens: int = 0
 
 
 class Retriever:
     def __init__(
         self,
-        vector_store: Optional[ChromaStore] = None,
+        vector_store: Optional[VectorStore] = None,
         top_k: int = 5,
         score_threshold: Optional[float] = None,
+        cache: Optional[QueryCache] = None,
+        mode: str = "dense",
+        rrf_k: int = 60,
+        candidate_multiplier: int = 4,
+        reranker: Optional[Reranker] = None,
+        context_builder: Optional[ContextBuilder] = None,
     ):
+        if mode not in ("dense", "hybrid"):
+            raise ValueError(f"Unknown retrieval mode: {mode}")
         self.vector_store = vector_store or ChromaStore()
         self.top_k = top_k
         self.score_threshold = score_threshold
+        self.cache = cache
+        self.mode = mode
+        self.rrf_k = rrf_k
+        self.candidate_multiplier = candidate_multiplier
+        self.reranker = reranker
+        self.context_builder = context_builder
 
     def retrieve(
         self,
@@ -20,14 +58,127 @@ class Retriever:
         top_k: Optional[int] = None,
         filter_metadata: Optional[dict] = None,
     ) -> list[dict]:
-        k = top_k or self.top_k
+        with metrics.timer("retrieve"):
+            results, _ = self._search(query, top_k or self.top_k, normalize_filter(filter_metadata))
+        return results
+
+    def retrieve_result(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        filter_metadata: Optional[dict] = None,
+    ) -> RetrievalResult:
+        with metrics.timer("retrieve"):
+            results, query_embedding = self._search(query, top_k or self.top_k, normalize_filter(filter_metadata))
+        return self._make_result(query, results, query_embedding)
+
+    def retrieve_many(
+        self,
+        queries: list[str],
+        top_k: Optional[int] = None,
+        filter_metadata: Optional[dict] = None,
+    ) -> list[list[dict]]:
+        with metrics.timer("retrieve_batch"):
+            searched = self._search_many(queries, top_k or self.top_k, normalize_filter(filter_metadata))
+        return [results for results, _ in searched]
+
+    def retrieve_many_results(
+        self,
+        queries: list[str],
+        top_k: Optional[int] = None,
+        filter_metadata: Optional[dict] = None,
+    ) -> list[RetrievalResult]:
+        with metrics.timer("retrieve_batch"):
+            searched = self._search_many(queries, top_k or self.top_k, normalize_filter(filter_metadata))
+        return [
+            self._make_result(query, results, query_embedding)
+            for query, (results, query_embedding) in zip(queries, searched)
+        ]
+
+    def _make_result(self, query: str, results: list[dict], query_embedding: list[float]) -> RetrievalResult:
+        if self.context_builder is None:
+            return RetrievalResult(
+                query=query,
+                chunks=results,
+                context=self.format_context(results),
+                sources=self.get_sources(results),
+                query_embedding=query_embedding,
+            )
 
-        results = self.vector_store.search(
+        with metrics.timer("context_build"):
+            built = self.context_builder.build(results)
+        return RetrievalResult(
             query=query,
-            n_results=k,
+            chunks=built.chunks,
+            context=built.context,
+            sources=self.get_sources(built.chunks),
+            query_embedding=query_embedding,
+            context_tokens=built.tokens,
+        )
+
+    def _search(
+        self,
+        query: str,
+        k: int,
+        filter_metadata: Optional[dict],
+    ) -> tuple[list[dict], list[float]]:
+        version = self.vector_store.version
+        if self.cache is not None:
+            cached = self.cache.get(QueryCache.make_key(query, k, filter_metadata), version)
+            if cached is not None:
+                return cached
+
+        query_embedding = self.vector_store.embedder.embed(query)
+        results = self.vector_store.search_by_embedding(
+            query_embedding,
+            n_results=self._n_candidates(k),
             where=filter_metadata,
         )
+        return self._finish(query, k, filter_metadata, results, query_embedding, version)
+
+    def _search_many(
+        self,
+        queries: list[str],
+        k: int,
+        filter_metadata: Optional[dict],
+    ) -> list[tuple[list[dict], list[float]]]:
+        output: list[Optional[tuple[list[dict], list[float]]]] = [None] * len(queries)
+        version = self.vector_store.version
+        if self.cache is not None:
+            for i, query in enumerate(queries):
+                output[i] = self.cache.get(QueryCache.make_key(query, k, filter_metadata), version)
+
+        misses = [i for i, cached in enumerate(output) if cached is None]
+        if misses:
+            miss_queries = list(dict.fromkeys(queries[i] for i in misses))
+            embeddings = self.vector_store.embedder.embed_batch(miss_queries)
+            searched = self.vector_store.search_many_by_embedding(
+                embeddings,
+                n_results=self._n_candidates(k),
+                where=filter_metadata,
+            )
+            finished = {
+                query: self._finish(query, k, filter_metadata, results, embedding, version)
+                for query, embedding, results in zip(miss_queries, embeddings, searched)
+            }
+            for i in misses:
+                output[i] = finished[queries[i]]
+        return output
 
+    def _n_candidates(self, k: int) -> int:
+        hybrid = self.mode == "hybrid" and self.vector_store.lexical_index is not None
+        return k * self.candidate_multiplier if hybrid or self.reranker is not None else k
+
+    def _finish(
+        self,
+        query: str,
+        k: int,
+        filter_metadata: Optional[dict],
+        results: list[dict],
+        query_embedding: list[float],
+        version: int,
+    ) -> tuple[list[dict], list[float]]:
+        n_candidates = self._n_candidates(k)
         if self.score_threshold is not None:
             results = [
                 r for r in results
@@ -37,21 +188,58 @@ class Retriever:
         for r in results:
             r["score"] = 1 - r["distance"]
 
-        return results
+        if self.mode == "hybrid" and self.vector_store.lexical_index is not None:
+            with metrics.timer("lexical_search"):
+                lexical = self.vector_store.lexical_search(query, n_results=n_candidates, where=filter_metadata)
+            results = self._fuse(results, lexical, n_candidates if self.reranker is not None else k)
+
+        reranked = True
+        if self.reranker is not None:
+            with metrics.timer("rerank"):
+                results = self.reranker.rerank(query, results, k)
+            reranked = len(results) <= 1 or "rerank_score" in results[0]
+        results = results[:k]
+
+        if self.cache is not None and reranked:
+            cache_key = QueryCache.make_key(query, k, filter_metadata)
+            self.cache.put(cache_key, version, results, query_embedding)
+
+        return results, query_embedding
+
+    def _fuse(self, dense: list[dict], lexical: list[dict], k: int) -> list[dict]:
+        fused: dict[str, dict] = {}
+        for rank, result in enumerate(dense, 1):
+            fused[result["id"]] = {**result, "dense_rank": rank, "rrf_score": 1 / (self.rrf_k + rank)}
+        for rank, result in enumerate(lexical, 1):
+            entry = fused.get(result["id"])
+            if entry is None:
+                entry = fused[result["id"]] = {**result, "distance": None, "rrf_score": 0.0}
+            entry["lexical_rank"] = rank
+            entry["bm25_score"] = result["bm25_score"]
+            entry["rrf_score"] += 1 / (self.rrf_k + rank)
+
+        best_possible = 2 / (self.rrf_k + 1)
+        ranked = sorted(fused.values(), key=lambda r: r["rrf_score"], reverse=True)[:k]
+        for r in ranked:
+            r["score"] = r["rrf_score"] / best_possible
+        return ranked
 
     def retrieve_with_context(
         self,
         query: str,
         top_k: Optional[int] = None,
     ) -> str:
-        results = self.retrieve(query, top_k)
+        return self.retrieve_result(query, top_k).context
 
+    def format_context(self, results: list[dict]) -> str:
         if not results:
             return "No relevant documents found."
 
         context_parts = []
         for i, result in enumerate(results, 1):
             source = result["metadata"].get("filename", "Unknown")
+            if "page" in result["metadata"]:
+                source = f"{source}, page {result['metadata']['page']}"
             content = result["content"]
             score = result.get("score", 0)
 
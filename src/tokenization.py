@@ -0,0 +1,11 @@
+from pathlib import Path
+
+
+def load_tokenizer(model_name: str):
+    try:
+        from transformers import AutoTokenizer
+    except ImportError:
+        raise ImportError("transformers is required for token counting. Install with: pip install transformers")
+    if "/" not in model_name and not Path(model_name).exists():
+        model_name = f"sentence-transformers/{model_name}"
+    return AutoTokenizer.from_pretrained(model_name)
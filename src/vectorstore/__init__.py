@@ -1,3 +1,7 @@
+from .base import VectorStore, validate_where
 from .chroma_store import ChromaStore
+from .matrix_store import MatrixStore
+from .sink import ChunkSink
+from .bm25 import BM25Index
 
-__all__ = ["ChromaStore"]
+__all__ = ["VectorStore", "ChromaStore", "MatrixStore", "ChunkSink", "BM25Index", "validate_where"]
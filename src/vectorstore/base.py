@@ -0,0 +1,167 @@
+from abc import ABC, abstractmethod
+from typing import Iterator, Optional
+import re
+
+from src.chunking.text_splitter import Chunk
+from src.embeddings import Embedder
+from .bm25 import BM25Index
+
+FILTER_KEY_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+FILTER_COMPARISONS = ("$eq", "$ne", "$gt", "$gte", "$lt", "$lte")
+FILTER_SCALARS = (str, int, float, bool)
+
+
+def validate_where(where: dict) -> None:
+    if not isinstance(where, dict) or not where:
+        raise ValueError(f"Filter must be a non-empty object, got {where!r}")
+    for key, value in where.items():
+        if key in ("$and", "$or"):
+            if not isinstance(value, list) or not value:
+                raise ValueError(f"{key} expects a non-empty list of filters")
+            for condition in value:
+                validate_where(condition)
+            continue
+
+        if not isinstance(key, str) or not FILTER_KEY_PATTERN.match(key):
+            raise ValueError(f"Invalid filter key: {key!r}")
+        if not isinstance(value, dict):
+            value = {"$eq": value}
+        if not value:
+            raise ValueError(f"Empty condition for filter key: {key}")
+        for operator, operand in value.items():
+            if operator in FILTER_COMPARISONS:
+                if not isinstance(operand, FILTER_SCALARS):
+                    raise ValueError(f"{operator} on {key} expects a string, number or boolean")
+            elif operator in ("$in", "$nin"):
+                if not isinstance(operand, list) or not operand:
+                    raise ValueError(f"{operator} on {key} expects a non-empty list")
+                if not all(isinstance(item, FILTER_SCALARS) for item in operand):
+                    raise ValueError(f"{operator} on {key} expects a list of strings, numbers or booleans")
+            else:
+                raise ValueError(f"Unsupported filter operator: {operator}")
+
+
+class VectorStore(ABC):
+    LEXICAL_FILTER_OVERSAMPLE = 4
+
+    def __init__(
+        self,
+        embedder: Optional[Embedder] = None,
+        lexical_index: Optional[BM25Index] = None,
+    ):
+        self.embedder = embedder or Embedder()
+        self.lexical_index = lexical_index
+        self.search_calls = 0
+        self.version = 0
+
+    @abstractmethod
+    def add_chunks(self, chunks: list[Chunk]) -> None:
+        ...
+
+    @abstractmethod
+    def search_by_embedding(
+        self,
+        query_embedding: list[float],
+        n_results: int = 5,
+        where: Optional[dict] = None,
+    ) -> list[dict]:
+        ...
+
+    def search_many_by_embedding(
+        self,
+        query_embeddings: list[list[float]],
+        n_results: int = 5,
+        where: Optional[dict] = None,
+    ) -> list[list[dict]]:
+        return [
+            self.search_by_embedding(query_embedding, n_results=n_results, where=where)
+            for query_embedding in query_embeddings
+        ]
+
+    @abstractmethod
+    def get_chunks(self, ids: list[str], where: Optional[dict] = None) -> list[dict]:
+        ...
+
+    @abstractmethod
+    def iter_chunks(self, batch_size: int = 5000) -> Iterator[list[dict]]:
+        ...
+
+    @abstractmethod
+    def delete_chunks(self, ids: list[str]) -> None:
+        ...
+
+    @abstractmethod
+    def delete_document(self, doc_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def search(
+        self,
+        query: str,
+        n_results: int = 5,
+        where: Optional[dict] = None,
+    ) -> list[dict]:
+        query_embedding = self.embedder.embed(query)
+        return self.search_by_embedding(query_embedding, n_results=n_results, where=where)
+
+    def search_many(
+        self,
+        queries: list[str],
+        n_results: int = 5,
+        where: Optional[dict] = None,
+    ) -> list[list[dict]]:
+        if not queries:
+            return []
+        query_embeddings = self.embedder.embed_batch(queries)
+        return self.search_many_by_embedding(query_embeddings, n_results=n_results, where=where)
+
+    def lexical_search(
+        self,
+        query: str,
+        n_results: int = 5,
+        where: Optional[dict] = None,
+    ) -> list[dict]:
+        if self.lexical_index is None:
+            return []
+
+        fetch = n_results if where is None else n_results * self.LEXICAL_FILTER_OVERSAMPLE
+        while True:
+            hits = self.lexical_index.search(query, n_results=fetch)
+            if not hits:
+                return []
+            chunks = {chunk["id"]: chunk for chunk in self.get_chunks([chunk_id for chunk_id, _ in hits], where=where)}
+            if where is None or len(chunks) >= n_results or len(hits) < fetch:
+                break
+            fetch *= self.LEXICAL_FILTER_OVERSAMPLE
+
+        output = []
+        for chunk_id, bm25_score in hits:
+            chunk = chunks.get(chunk_id)
+            if chunk is not None:
+                output.append({**chunk, "bm25_score": bm25_score})
+        return output[:n_results]
+
+    def rebuild_lexical_index(self, batch_size: int = 5000) -> None:
+        if self.lexical_index is None:
+            return
+        self.lexical_index.clear()
+        for batch in self.iter_chunks(batch_size):
+            self.lexical_index.add_many([
+                (chunk["id"], (chunk["metadata"] or {}).get("doc_id", chunk["id"].rsplit("_", 1)[0]), chunk["content"])
+                for chunk in batch
+            ])
+        self.lexical_index.save()
+
+    def get_stats(self) -> dict:
+        return {
+            "count": self.count(),
+            "search_calls": self.search_calls,
+            "lexical_index": self.lexical_index.get_stats() if self.lexical_index is not None else None,
+        }
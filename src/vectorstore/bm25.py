@@ -0,0 +1,319 @@
+from array import array
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Optional
+import json
+import math
+import os
+import re
+import threading
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[A-Za-z0-9_]+")
+SUBTOKEN_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    for word in TOKEN_RE.findall(text):
+        lower = word.lower()
+        tokens.append(lower)
+        if "_" not in word and (word == lower or word.isupper()):
+            continue
+        parts = [part.lower() for piece in word.split("_") for part in SUBTOKEN_RE.findall(piece)]
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+class BM25Index:
+    SNAPSHOT_FILE = "bm25.npz"
+    LOG_FILE = "bm25.log"
+
+    def __init__(
+        self,
+        directory: Optional[str | Path] = None,
+        k1: float = 1.2,
+        b: float = 0.75,
+        snapshot_every: int = 50_000,
+        impact_cache_size: int = 4096,
+        impact_tolerance: float = 0.02,
+    ):
+        self.directory = Path(directory) if directory else None
+        self.k1 = k1
+        self.b = b
+        self.snapshot_every = snapshot_every
+        self.impact_cache_size = impact_cache_size
+        self.impact_tolerance = impact_tolerance
+        self._lock = threading.RLock()
+        self._log_file = None
+        self._reset()
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._load()
+
+    def _reset(self) -> None:
+        self._postings: dict[str, tuple[array, array]] = {}
+        self._impacts: OrderedDict[str, tuple[np.ndarray, np.ndarray, int, float]] = OrderedDict()
+        self._lengths = array("I")
+        self._alive = bytearray()
+        self._chunk_ids: list[Optional[str]] = []
+        self._doc_ids: list[Optional[str]] = []
+        self._docno_by_id: dict[str, int] = {}
+        self._docnos_by_doc: dict[str, set[int]] = {}
+        self._live = 0
+        self._total_length = 0
+        self._logged_ops = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    def add_many(self, items: list[tuple[str, str, str]]) -> None:
+        if not items:
+            return
+        entries = [(chunk_id, doc_id, Counter(tokenize(text))) for chunk_id, doc_id, text in items]
+        with self._lock:
+            for chunk_id, doc_id, term_counts in entries:
+                self._add(chunk_id, doc_id, term_counts)
+            self._append_log([
+                {"op": "add", "id": chunk_id, "doc": doc_id, "tf": dict(term_counts)}
+                for chunk_id, doc_id, term_counts in entries
+            ])
+
+    def delete(self, ids: list[str]) -> None:
+        if not ids:
+            return
+        with self._lock:
+            for chunk_id in ids:
+                self._delete(chunk_id)
+            self._append_log([{"op": "delete", "ids": list(ids)}])
+
+    def delete_document(self, doc_id: str) -> None:
+        with self._lock:
+            ids = [self._chunk_ids[docno] for docno in self._docnos_by_doc.get(doc_id, ())]
+        self.delete(ids)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+            if self.directory is not None:
+                self._close_log()
+                (self.directory / self.SNAPSHOT_FILE).unlink(missing_ok=True)
+                (self.directory / self.LOG_FILE).unlink(missing_ok=True)
+
+    def search(self, query: str, n_results: int = 10) -> list[tuple[str, float]]:
+        terms = set(tokenize(query))
+        with self._lock:
+            if not terms or self._live == 0:
+                return []
+
+            avgdl = self._total_length / self._live
+            scores = np.zeros(len(self._lengths), dtype=np.float32)
+            matched = False
+
+            for term in terms:
+                impact = self._impact(term, avgdl)
+                if impact is None:
+                    continue
+                docnos, weights = impact
+                scores[docnos] += weights
+                matched = True
+
+            if not matched:
+                return []
+
+            candidates = np.flatnonzero(scores)
+            candidates = candidates[np.frombuffer(self._alive, dtype=np.uint8)[candidates].astype(bool)]
+            if len(candidates) > n_results:
+                top = np.argpartition(scores[candidates], -n_results)[-n_results:]
+                candidates = candidates[top]
+            order = candidates[np.argsort(-scores[candidates], kind="stable")]
+            return [(self._chunk_ids[docno], float(scores[docno])) for docno in order.tolist()]
+
+    def _impact(self, term: str, avgdl: float) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        cached = self._impacts.get(term)
+        if cached is not None:
+            docnos, weights, live, cached_avgdl = cached
+            if (
+                abs(live - self._live) <= self.impact_tolerance * self._live
+                and abs(cached_avgdl - avgdl) <= self.impact_tolerance * avgdl
+            ):
+                self._impacts.move_to_end(term)
+                return docnos, weights
+
+        postings = self._postings.get(term)
+        if postings is None:
+            return None
+        docnos = np.frombuffer(postings[0], dtype=np.uint32).copy()
+        tfs = np.frombuffer(postings[1], dtype=np.uint16).astype(np.float32)
+        lengths = np.frombuffer(self._lengths, dtype=np.uint32)[docnos]
+        df = int(np.count_nonzero(np.frombuffer(self._alive, dtype=np.uint8)[docnos]))
+        idf = math.log(1 + (self._live - df + 0.5) / (df + 0.5))
+        norms = self.k1 * (1 - self.b + self.b * lengths / avgdl)
+        weights = (idf * tfs * (self.k1 + 1) / (tfs + norms)).astype(np.float32)
+
+        self._impacts[term] = (docnos, weights, self._live, avgdl)
+        self._impacts.move_to_end(term)
+        while len(self._impacts) > self.impact_cache_size:
+            self._impacts.popitem(last=False)
+        return docnos, weights
+
+    def _add(self, chunk_id: str, doc_id: str, term_counts: Counter) -> None:
+        if chunk_id in self._docno_by_id:
+            self._delete(chunk_id)
+
+        docno = len(self._lengths)
+        length = sum(term_counts.values())
+        self._lengths.append(length)
+        self._alive.append(1)
+        self._chunk_ids.append(chunk_id)
+        self._doc_ids.append(doc_id)
+        self._docno_by_id[chunk_id] = docno
+        self._docnos_by_doc.setdefault(doc_id, set()).add(docno)
+        self._live += 1
+        self._total_length += length
+
+        for term, count in term_counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("I"), array("H"))
+            postings[0].append(docno)
+            postings[1].append(min(count, 65535))
+            self._impacts.pop(term, None)
+
+    def _delete(self, chunk_id: str) -> None:
+        docno = self._docno_by_id.pop(chunk_id, None)
+        if docno is None:
+            return
+        self._alive[docno] = 0
+        self._live -= 1
+        self._total_length -= self._lengths[docno]
+        doc_id = self._doc_ids[docno]
+        docnos = self._docnos_by_doc.get(doc_id)
+        if docnos is not None:
+            docnos.discard(docno)
+            if not docnos:
+                del self._docnos_by_doc[doc_id]
+
+    def _append_log(self, ops: list[dict]) -> None:
+        if self.directory is None:
+            return
+        if self._log_file is None:
+            self._log_file = open(self.directory / self.LOG_FILE, "a", encoding="utf-8")
+        self._log_file.write("".join(json.dumps(op) + "\n" for op in ops))
+        self._log_file.flush()
+        self._logged_ops += len(ops)
+        if self._logged_ops >= self.snapshot_every:
+            self.save()
+
+    def _close_log(self) -> None:
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+
+    def save(self) -> None:
+        if self.directory is None:
+            return
+        with self._lock:
+            alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+            renumber = np.cumsum(alive, dtype=np.int64) - 1
+            live_docnos = np.flatnonzero(alive)
+
+            terms, offsets, doc_parts, tf_parts = [], [0], [], []
+            for term, (docnos, tfs) in self._postings.items():
+                docnos = np.frombuffer(docnos, dtype=np.uint32)
+                keep = alive[docnos]
+                if not keep.any():
+                    continue
+                kept = renumber[docnos[keep]].astype(np.uint32)
+                doc_parts.append(np.diff(kept, prepend=np.uint32(0)).astype(np.uint32))
+                tf_parts.append(np.frombuffer(tfs, dtype=np.uint16)[keep])
+                terms.append(term)
+                offsets.append(offsets[-1] + len(kept))
+                del docnos
+
+            lengths = np.frombuffer(self._lengths, dtype=np.uint32)[live_docnos]
+            tmp_path = self.directory / f"{self.SNAPSHOT_FILE}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez_compressed(
+                    f,
+                    terms=np.array(terms, dtype=str),
+                    offsets=np.array(offsets, dtype=np.int64),
+                    docnos=np.concatenate(doc_parts) if doc_parts else np.zeros(0, dtype=np.uint32),
+                    tfs=np.concatenate(tf_parts) if tf_parts else np.zeros(0, dtype=np.uint16),
+                    lengths=lengths,
+                    chunk_ids=np.array([self._chunk_ids[i] for i in live_docnos.tolist()], dtype=str),
+                    doc_ids=np.array([self._doc_ids[i] for i in live_docnos.tolist()], dtype=str),
+                )
+            os.replace(tmp_path, self.directory / self.SNAPSHOT_FILE)
+
+            self._close_log()
+            (self.directory / self.LOG_FILE).unlink(missing_ok=True)
+            self._logged_ops = 0
+            self._load_snapshot()
+
+    def _load(self) -> None:
+        self._load_snapshot()
+        log_path = self.directory / self.LOG_FILE
+        if not log_path.exists():
+            return
+        offset = 0
+        with open(log_path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("torn entry")
+                    op = json.loads(line)
+                    if op["op"] == "add":
+                        self._add(op["id"], op["doc"], Counter(op["tf"]))
+                    elif op["op"] == "delete":
+                        for chunk_id in op["ids"]:
+                            self._delete(chunk_id)
+                except (ValueError, KeyError, TypeError):
+                    break
+                self._logged_ops += 1
+                offset += len(line)
+        if offset < log_path.stat().st_size:
+            print(f"Warning: truncating corrupt BM25 log entry at byte {offset} in {log_path}")
+            os.truncate(log_path, offset)
+
+    def _load_snapshot(self) -> None:
+        self._reset()
+        snapshot_path = self.directory / self.SNAPSHOT_FILE
+        if not snapshot_path.exists():
+            return
+
+        with np.load(snapshot_path) as data:
+            terms = data["terms"].tolist()
+            offsets = data["offsets"]
+            docnos = data["docnos"]
+            tfs = data["tfs"]
+            lengths = data["lengths"]
+            self._chunk_ids = data["chunk_ids"].tolist()
+            self._doc_ids = data["doc_ids"].tolist()
+
+        self._lengths = array("I", lengths.astype(np.uint32).tobytes())
+        self._alive = bytearray(b"\x01" * len(self._chunk_ids))
+        self._live = len(self._chunk_ids)
+        self._total_length = int(lengths.sum())
+        for docno, (chunk_id, doc_id) in enumerate(zip(self._chunk_ids, self._doc_ids)):
+            self._docno_by_id[chunk_id] = docno
+            self._docnos_by_doc.setdefault(doc_id, set()).add(docno)
+
+        for i, term in enumerate(terms):
+            start, end = offsets[i], offsets[i + 1]
+            term_docnos = array("I")
+            term_docnos.frombytes(np.cumsum(docnos[start:end], dtype=np.uint32).tobytes())
+            term_tfs = array("H")
+            term_tfs.frombytes(tfs[start:end].tobytes())
+            self._postings[term] = (term_docnos, term_tfs)
+
+    def get_stats(self) -> dict:
+        return {
+            "chunks": self._live,
+            "terms": len(self._postings),
+            "tombstones": len(self._lengths) - self._live,
+            "cached_impacts": len(self._impacts),
+            "pending_log_ops": self._logged_ops,
+        }
@@ -1,20 +1,24 @@
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 from src.chunking.text_splitter import Chunk
 from src.embeddings import Embedder
+from src.metrics import metrics
+from .base import VectorStore, validate_where
+from .bm25 import BM25Index
 
 
-class ChromaStore:
+class ChromaStore(VectorStore):
     def __init__(
         self,
         collection_name: str = "documents",
         persist_directory: str = "./chroma_db",
         embedder: Optional[Embedder] = None,
+        lexical_index: Optional[BM25Index] = None,
     ):
+        super().__init__(embedder=embedder, lexical_index=lexical_index)
         self.collection_name = collection_name
         self.persist_directory = persist_directory
-        self.embedder = embedder or Embedder()
         self._client = None
         self._collection = None
 
@@ -48,54 +52,111 @@ class ChromaStore:
         if not chunks:
             return
 
-        ids = [f"{chunk.doc_id}_{chunk.chunk_index}" for chunk in chunks]
+        ids = [chunk.chunk_id for chunk in chunks]
         documents = [chunk.content for chunk in chunks]
         metadatas = [chunk.metadata for chunk in chunks]
 
         embeddings = self.embedder.embed_batch(documents)
 
-        self.collection.add(
-            ids=ids,
-            documents=documents,
-            embeddings=embeddings,
-            metadatas=metadatas,
-        )
+        with metrics.timer("vector_upsert"):
+            self.collection.upsert(
+                ids=ids,
+                documents=documents,
+                embeddings=embeddings,
+                metadatas=metadatas,
+            )
+        if self.lexical_index is not None:
+            self.lexical_index.add_many([(chunk.chunk_id, chunk.doc_id, chunk.content) for chunk in chunks])
+        self.version += 1
 
-    def search(
+    def search_by_embedding(
         self,
-        query: str,
+        query_embedding: list[float],
         n_results: int = 5,
         where: Optional[dict] = None,
     ) -> list[dict]:
-        query_embedding = self.embedder.embed(query)
+        return self.search_many_by_embedding([query_embedding], n_results=n_results, where=where)[0]
 
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results,
-            where=where,
-            include=["documents", "metadatas", "distances"],
-        )
+    def search_many_by_embedding(
+        self,
+        query_embeddings: list[list[float]],
+        n_results: int = 5,
+        where: Optional[dict] = None,
+    ) -> list[list[dict]]:
+        if not query_embeddings:
+            return []
+        if where:
+            validate_where(where)
+        self.search_calls += 1
+
+        with metrics.timer("vector_search"):
+            results = self.collection.query(
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+                where=where,
+                include=["documents", "metadatas", "distances"],
+            )
 
         output = []
-        for i in range(len(results["ids"][0])):
-            output.append({
-                "id": results["ids"][0][i],
-                "content": results["documents"][0][i],
-                "metadata": results["metadatas"][0][i],
-                "distance": results["distances"][0][i],
-            })
+        for q in range(len(query_embeddings)):
+            output.append([
+                {
+                    "id": results["ids"][q][i],
+                    "content": results["documents"][q][i],
+                    "metadata": results["metadatas"][q][i],
+                    "distance": results["distances"][q][i],
+                }
+                for i in range(len(results["ids"][q]))
+            ])
 
         return output
 
+    def get_chunks(self, ids: list[str], where: Optional[dict] = None) -> list[dict]:
+        if not ids:
+            return []
+        if where:
+            validate_where(where)
+        results = self.collection.get(ids=ids, where=where, include=["documents", "metadatas"])
+        return [
+            {"id": chunk_id, "content": document, "metadata": metadata}
+            for chunk_id, document, metadata in zip(results["ids"], results["documents"], results["metadatas"])
+        ]
+
+    def iter_chunks(self, batch_size: int = 5000) -> Iterator[list[dict]]:
+        offset = 0
+        while True:
+            results = self.collection.get(limit=batch_size, offset=offset, include=["documents", "metadatas"])
+            if not results["ids"]:
+                break
+            yield [
+                {"id": chunk_id, "content": document, "metadata": metadata}
+                for chunk_id, document, metadata in zip(results["ids"], results["documents"], results["metadatas"])
+            ]
+            offset += len(results["ids"])
+
+    def delete_chunks(self, ids: list[str]) -> None:
+        if not ids:
+            return
+        self.collection.delete(ids=ids)
+        if self.lexical_index is not None:
+            self.lexical_index.delete(ids)
+        self.version += 1
+
     def delete_document(self, doc_id: str) -> None:
         self.collection.delete(where={"doc_id": doc_id})
+        if self.lexical_index is not None:
+            self.lexical_index.delete_document(doc_id)
+        self.version += 1
+
+    def count(self) -> int:
+        return self.collection.count()
 
     def get_stats(self) -> dict:
-        return {
-            "collection_name": self.collection_name,
-            "count": self.collection.count(),
-        }
+        return {"backend": "chroma", "collection_name": self.collection_name, **super().get_stats()}
 
     def clear(self) -> None:
         self.client.delete_collection(self.collection_name)
         self._collection = None
+        if self.lexical_index is not None:
+            self.lexical_index.clear()
+        self.version += 1
@@ -0,0 +1,516 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+import json
+import sqlite3
+import threading
+
+import numpy as np
+
+from src.chunking.text_splitter import Chunk
+from src.embeddings import Embedder
+from src.metrics import metrics
+from .base import VectorStore, validate_where
+from .bm25 import BM25Index
+
+POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(values: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return POPCOUNT_TABLE[values]
+
+
+@dataclass
+class MatrixView:
+    vectors: np.memmap
+    alive: np.memmap
+    codes: Optional[np.memmap]
+    scales: Optional[np.memmap]
+    size: int
+
+
+class MatrixStore(VectorStore):
+    SQL_BATCH = 900
+    INT8_TILE_ROWS = 512
+    HEADER_FILE = "header.json"
+    VECTORS_FILE = "vectors.bin"
+    ALIVE_FILE = "alive.bin"
+    CODES_FILE = "codes.bin"
+    SCALES_FILE = "scales.bin"
+    CHUNKS_DB = "chunks.sqlite3"
+    RESCORE_MULTIPLIERS = {"none": 1, "int8": 4, "binary": 30}
+    COMPARISONS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+    def __init__(
+        self,
+        collection_name: str = "documents",
+        persist_directory: str = "./chroma_db",
+        embedder: Optional[Embedder] = None,
+        lexical_index: Optional[BM25Index] = None,
+        dtype: str = "float32",
+        initial_capacity: int = 1024,
+        block_size: int = 16_384,
+        quantization: str = "none",
+        rescore_multiplier: Optional[int] = None,
+    ):
+        super().__init__(embedder=embedder, lexical_index=lexical_index)
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported matrix dtype: {dtype}")
+        if quantization not in ("none", "int8", "binary"):
+            raise ValueError(f"Unsupported quantization: {quantization}")
+        self.collection_name = collection_name
+        self.persist_directory = persist_directory
+        self.directory = Path(persist_directory) / "matrix" / collection_name
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.dtype = np.dtype(dtype)
+        self.initial_capacity = initial_capacity
+        self.block_size = block_size
+        self.quantization = quantization
+        self.rescore_multiplier = rescore_multiplier or self.RESCORE_MULTIPLIERS[quantization]
+        self.dimension: Optional[int] = None
+        self.capacity = 0
+        self.size = 0
+        self._vectors: Optional[np.memmap] = None
+        self._alive: Optional[np.memmap] = None
+        self._codes: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._free: list[int] = []
+        self._lock = threading.RLock()
+        self._tiles = threading.local()
+
+        self._conn = sqlite3.connect(self.directory / self.CHUNKS_DB, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS chunks (
+                id TEXT PRIMARY KEY,
+                slot INTEGER NOT NULL UNIQUE,
+                doc_id TEXT NOT NULL,
+                content TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS chunks_doc_id ON chunks (doc_id)")
+        self._conn.commit()
+        self._open_existing()
+
+    def _open_existing(self) -> None:
+        header_path = self.directory / self.HEADER_FILE
+        if not header_path.exists():
+            return
+        header = json.loads(header_path.read_text())
+        if header["dtype"] != self.dtype.name:
+            raise ValueError(
+                f"Matrix store at {self.directory} uses {header['dtype']}, not {self.dtype.name}"
+            )
+        self.dimension = header["dimension"]
+        self.size = header["size"]
+        self._map(header["capacity"])
+        self._free = np.flatnonzero(self._alive[:self.size] == 0).tolist()[::-1]
+        if header.get("quantization", "none") != self.quantization:
+            for start in range(0, self.size, self.block_size):
+                end = min(start + self.block_size, self.size)
+                self._write_codes(slice(start, end), np.asarray(self._vectors[start:end], dtype=np.float32))
+            self._flush_maps()
+            self._write_header()
+
+    def _map(self, capacity: int) -> None:
+        vectors_path = self.directory / self.VECTORS_FILE
+        alive_path = self.directory / self.ALIVE_FILE
+        for path, nbytes in (
+            (vectors_path, capacity * self.dimension * self.dtype.itemsize),
+            (alive_path, capacity),
+        ):
+            with open(path, "ab") as f:
+                if f.tell() < nbytes:
+                    f.truncate(nbytes)
+        self._vectors = np.memmap(vectors_path, dtype=self.dtype, mode="r+", shape=(capacity, self.dimension))
+        self._alive = np.memmap(alive_path, dtype=np.uint8, mode="r+", shape=(capacity,))
+        self.capacity = capacity
+        if self.quantization == "int8":
+            self._codes = self._map_file(self.CODES_FILE, np.int8, (capacity, self.dimension))
+            self._scales = self._map_file(self.SCALES_FILE, np.float32, (capacity,))
+        elif self.quantization == "binary":
+            self._codes = self._map_file(self.CODES_FILE, np.uint8, (capacity, (self.dimension + 7) // 8))
+
+    def _map_file(self, name: str, dtype: type, shape: tuple) -> np.memmap:
+        path = self.directory / name
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        with open(path, "ab") as f:
+            if f.tell() != nbytes:
+                f.truncate(nbytes)
+        return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+    def _write_header(self) -> None:
+        header_path = self.directory / self.HEADER_FILE
+        tmp_path = header_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({
+            "dimension": self.dimension,
+            "dtype": self.dtype.name,
+            "capacity": self.capacity,
+            "size": self.size,
+            "quantization": self.quantization,
+        }))
+        tmp_path.replace(header_path)
+
+    def _allocate(self, count: int) -> list[int]:
+        slots = [self._free.pop() for _ in range(min(count, len(self._free)))]
+        needed = count - len(slots)
+        if needed:
+            if self.size + needed > self.capacity:
+                capacity = max(self.initial_capacity, self.capacity)
+                while capacity < self.size + needed:
+                    capacity *= 2
+                self._flush_maps()
+                self._map(capacity)
+            slots.extend(range(self.size, self.size + needed))
+            self.size += needed
+        return slots
+
+    def _flush_maps(self) -> None:
+        for array in (self._vectors, self._alive, self._codes, self._scales):
+            if array is not None:
+                array.flush()
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return vectors / norms
+
+    def _write_codes(self, index: slice | np.ndarray, vectors: np.ndarray) -> None:
+        if self.quantization == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127
+            scales[scales == 0] = 1
+            self._codes[index] = np.round(vectors / scales[:, np.newaxis]).astype(np.int8)
+            self._scales[index] = scales
+        elif self.quantization == "binary":
+            self._codes[index] = np.packbits(vectors > 0, axis=1)
+
+    def add_chunks(self, chunks: list[Chunk]) -> None:
+        if not chunks:
+            return
+
+        chunks = list({chunk.chunk_id: chunk for chunk in chunks}.values())
+        embeddings = np.asarray(self.embedder.embed_batch([chunk.content for chunk in chunks]), dtype=np.float32)
+        embeddings = self._normalize(embeddings)
+
+        with metrics.timer("vector_upsert"), self._lock:
+            if self.dimension is None:
+                self.dimension = embeddings.shape[1]
+                self._map(self.initial_capacity)
+            elif embeddings.shape[1] != self.dimension:
+                raise ValueError(
+                    f"Embedding dimension {embeddings.shape[1]} does not match store dimension {self.dimension}"
+                )
+
+            ids = [chunk.chunk_id for chunk in chunks]
+            existing = {}
+            for batch in self._batches(ids):
+                existing.update(self._conn.execute(
+                    f"SELECT id, slot FROM chunks WHERE id IN ({', '.join('?' for _ in batch)})", batch
+                ).fetchall())
+            new_slots = iter(self._allocate(sum(1 for chunk_id in ids if chunk_id not in existing)))
+            slots = np.array([existing[chunk_id] if chunk_id in existing else next(new_slots) for chunk_id in ids])
+
+            self._vectors[slots] = embeddings.astype(self.dtype)
+            self._write_codes(slots, embeddings)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (id, slot, doc_id, content, metadata) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (chunk.chunk_id, int(slot), chunk.doc_id, chunk.content, json.dumps(chunk.metadata))
+                    for chunk, slot in zip(chunks, slots)
+                ],
+            )
+            self._alive[slots] = 1
+            self._flush_maps()
+            self._write_header()
+            self._conn.commit()
+
+        if self.lexical_index is not None:
+            self.lexical_index.add_many([(chunk.chunk_id, chunk.doc_id, chunk.content) for chunk in chunks])
+        self.version += 1
+
+    def search_by_embedding(
+        self,
+        query_embedding: list[float],
+        n_results: int = 5,
+        where: Optional[dict] = None,
+    ) -> list[dict]:
+        return self.search_many_by_embedding([query_embedding], n_results=n_results, where=where)[0]
+
+    def search_many_by_embedding(
+        self,
+        query_embeddings: list[list[float]],
+        n_results: int = 5,
+        where: Optional[dict] = None,
+    ) -> list[list[dict]]:
+        if not len(query_embeddings):
+            return []
+        self.search_calls += 1
+        queries = self._normalize(np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32)))
+
+        with metrics.timer("vector_search"):
+            with self._lock:
+                if self.dimension is None or self.size == 0:
+                    return [[] for _ in range(len(queries))]
+                view = MatrixView(self._vectors, self._alive, self._codes, self._scales, self.size)
+
+                candidates = None
+                if where:
+                    clause, params = self._where_sql(where)
+                    candidates = np.array(
+                        [row[0] for row in self._conn.execute(f"SELECT slot FROM chunks WHERE {clause}", params)],
+                        dtype=np.int64,
+                    )
+                    candidates.sort()
+
+            if self.quantization == "none":
+                top_slots, top_scores = self._scan(view, queries, n_results, candidates)
+            else:
+                shortlist, _ = self._scan(view, queries, n_results * self.rescore_multiplier, candidates)
+                top_slots, top_scores = self._rescore(view, queries, shortlist, n_results)
+
+            with self._lock:
+                rows = self._rows_by_slot(np.unique(top_slots[top_slots >= 0]).tolist())
+
+        output = []
+        for slots, scores in zip(top_slots, top_scores):
+            results = []
+            for slot, score in zip(slots.tolist(), scores.tolist()):
+                row = rows.get(slot)
+                if slot < 0 or row is None:
+                    continue
+                results.append({**row, "distance": 1.0 - score})
+            output.append(results)
+        return output
+
+    def _scan(
+        self,
+        view: MatrixView,
+        queries: np.ndarray,
+        k: int,
+        candidates: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        best_slots = np.full((len(queries), 0), -1, dtype=np.int64)
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        prepared = np.packbits(queries > 0, axis=1) if self.quantization == "binary" else queries
+        total = view.size if candidates is None else len(candidates)
+
+        for start in range(0, total, self.block_size):
+            if candidates is None:
+                index = slice(start, min(start + self.block_size, total))
+                offset = start
+                dead = view.alive[index] == 0
+            else:
+                index = candidates[start:start + self.block_size]
+                index = index[index < view.size]
+                index = index[view.alive[index] == 1]
+                if not len(index):
+                    continue
+                offset = index
+                dead = None
+
+            scores = self._block_scores(view, prepared, index)
+            if dead is not None and dead.any():
+                scores[:, dead] = -np.inf
+            best_slots, best_scores = self._merge_top_k(best_slots, best_scores, scores, offset, k)
+        return best_slots, best_scores
+
+    def _block_scores(self, view: MatrixView, prepared: np.ndarray, index: slice | np.ndarray) -> np.ndarray:
+        if self.quantization == "int8":
+            return self._int8_scores(prepared, view.codes[index]) * view.scales[index]
+        if self.quantization == "binary":
+            differing = np.bitwise_xor(prepared[:, np.newaxis, :], view.codes[index][np.newaxis, :, :])
+            return self.dimension - 2 * popcount(differing).sum(axis=2, dtype=np.int32).astype(np.float32)
+        return prepared @ np.asarray(view.vectors[index], dtype=np.float32).T
+
+    def _int8_scores(self, prepared: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        tile = getattr(self._tiles, "buffer", None)
+        if tile is None or tile.shape[1] != codes.shape[1]:
+            tile = self._tiles.buffer = np.empty((self.INT8_TILE_ROWS, codes.shape[1]), dtype=np.float32)
+        scores = np.empty((len(codes), len(prepared)), dtype=np.float32)
+        queries = np.ascontiguousarray(prepared.T)
+        for start in range(0, len(codes), self.INT8_TILE_ROWS):
+            part = codes[start:start + self.INT8_TILE_ROWS]
+            np.copyto(tile[:len(part)], part, casting="unsafe")
+            np.matmul(tile[:len(part)], queries, out=scores[start:start + len(part)])
+        return scores.T
+
+    def _rescore(
+        self,
+        view: MatrixView,
+        queries: np.ndarray,
+        shortlist: np.ndarray,
+        k: int,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        top_slots = np.full((len(queries), k), -1, dtype=np.int64)
+        top_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for i, (query, slots) in enumerate(zip(queries, shortlist)):
+            slots = np.sort(slots[slots >= 0])
+            if not len(slots):
+                continue
+            scores = np.asarray(view.vectors[slots], dtype=np.float32) @ query
+            order = np.argsort(-scores, kind="stable")[:k]
+            top_slots[i, :len(order)] = slots[order]
+            top_scores[i, :len(order)] = scores[order]
+        return top_slots, top_scores
+
+    @staticmethod
+    def _merge_top_k(
+        best_slots: np.ndarray,
+        best_scores: np.ndarray,
+        scores: np.ndarray,
+        slots: int | np.ndarray,
+        k: int,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        if scores.shape[1] > k:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            scores = np.take_along_axis(scores, top, axis=1)
+        else:
+            top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        top_slots = top + slots if isinstance(slots, int) else slots[top]
+
+        merged_slots = np.concatenate([best_slots, top_slots], axis=1)
+        merged_scores = np.concatenate([best_scores, scores], axis=1)
+        order = np.argsort(-merged_scores, axis=1, kind="stable")[:, :k]
+        merged_slots = np.take_along_axis(merged_slots, order, axis=1)
+        merged_scores = np.take_along_axis(merged_scores, order, axis=1)
+        merged_slots[~np.isfinite(merged_scores)] = -1
+        return merged_slots, merged_scores
+
+    def _batches(self, values: list, reserved: int = 0) -> Iterator[list]:
+        size = max(self.SQL_BATCH - reserved, 1)
+        for start in range(0, len(values), size):
+            yield values[start:start + size]
+
+    def _rows_by_slot(self, slots: list[int]) -> dict[int, dict]:
+        rows = {}
+        for batch in self._batches(slots):
+            for chunk_id, slot, content, metadata in self._conn.execute(
+                f"SELECT id, slot, content, metadata FROM chunks WHERE slot IN ({', '.join('?' for _ in batch)})",
+                batch,
+            ):
+                rows[slot] = {"id": chunk_id, "content": content, "metadata": json.loads(metadata)}
+        return rows
+
+    def _where_sql(self, where: dict) -> tuple[str, list]:
+        validate_where(where)
+        clauses, params = [], []
+        for key, value in where.items():
+            if key in ("$and", "$or"):
+                parts = [self._where_sql(condition) for condition in value]
+                clauses.append("(" + f" {key[1:].upper()} ".join(part for part, _ in parts) + ")")
+                for _, part_params in parts:
+                    params.extend(part_params)
+                continue
+
+            if key == "doc_id":
+                column, column_params = "doc_id", []
+            else:
+                column, column_params = "json_extract(metadata, ?)", [f'$."{key}"']
+            if not isinstance(value, dict):
+                value = {"$eq": value}
+            for operator, operand in value.items():
+                if operator in self.COMPARISONS:
+                    clauses.append(f"{column} {self.COMPARISONS[operator]} ?")
+                    params.extend([*column_params, operand])
+                elif operator in ("$in", "$nin"):
+                    negate = "NOT " if operator == "$nin" else ""
+                    clauses.append(f"{column} {negate}IN ({', '.join('?' for _ in operand)})")
+                    params.extend([*column_params, *operand])
+                else:
+                    raise ValueError(f"Unsupported filter operator: {operator}")
+        return " AND ".join(clauses) or "1", params
+
+    def get_chunks(self, ids: list[str], where: Optional[dict] = None) -> list[dict]:
+        if not ids:
+            return []
+        clause, params = self._where_sql(where) if where else ("1", [])
+        rows = []
+        with self._lock:
+            for batch in self._batches(ids, reserved=len(params)):
+                rows.extend(self._conn.execute(
+                    f"SELECT id, content, metadata FROM chunks WHERE id IN ({', '.join('?' for _ in batch)}) AND {clause}",
+                    [*batch, *params],
+                ).fetchall())
+        return [
+            {"id": chunk_id, "content": content, "metadata": json.loads(metadata)}
+            for chunk_id, content, metadata in rows
+        ]
+
+    def iter_chunks(self, batch_size: int = 5000) -> Iterator[list[dict]]:
+        last_slot = -1
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, slot, content, metadata FROM chunks WHERE slot > ? ORDER BY slot LIMIT ?",
+                    (last_slot, batch_size),
+                ).fetchall()
+            if not rows:
+                break
+            yield [
+                {"id": chunk_id, "content": content, "metadata": json.loads(metadata)}
+                for chunk_id, _, content, metadata in rows
+            ]
+            last_slot = rows[-1][1]
+
+    def delete_chunks(self, ids: list[str]) -> None:
+        if not ids:
+            return
+        with self._lock:
+            for batch in self._batches(list(ids)):
+                self._delete_where(f"id IN ({', '.join('?' for _ in batch)})", batch)
+        if self.lexical_index is not None:
+            self.lexical_index.delete(ids)
+        self.version += 1
+
+    def delete_document(self, doc_id: str) -> None:
+        with self._lock:
+            self._delete_where("doc_id = ?", [doc_id])
+        if self.lexical_index is not None:
+            self.lexical_index.delete_document(doc_id)
+        self.version += 1
+
+    def _delete_where(self, clause: str, params: list) -> None:
+        slots = [row[0] for row in self._conn.execute(f"SELECT slot FROM chunks WHERE {clause}", params)]
+        if not slots:
+            return
+        self._conn.execute(f"DELETE FROM chunks WHERE {clause}", params)
+        self._alive[slots] = 0
+        self._alive.flush()
+        self._conn.commit()
+        self._free.extend(sorted(slots, reverse=True))
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.commit()
+            self._vectors = self._alive = self._codes = self._scales = None
+            for name in (self.HEADER_FILE, self.VECTORS_FILE, self.ALIVE_FILE, self.CODES_FILE, self.SCALES_FILE):
+                (self.directory / name).unlink(missing_ok=True)
+            self.dimension = None
+            self.capacity = 0
+            self.size = 0
+            self._free = []
+        if self.lexical_index is not None:
+            self.lexical_index.clear()
+        self.version += 1
+
+    def get_stats(self) -> dict:
+        return {
+            "backend": "matrix",
+            "collection_name": self.collection_name,
+            "dtype": self.dtype.name,
+            "quantization": self.quantization,
+            "dimension": self.dimension,
+            "capacity": self.capacity,
+            "slots": self.size,
+            "free_slots": len(self._free),
+            **super().get_stats(),
+        }
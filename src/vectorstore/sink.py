@@ -0,0 +1,154 @@
+from typing import Callable, Optional
+import threading
+import time
+
+from src.chunking.text_splitter import Chunk
+from .base import VectorStore
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+class ChunkSink:
+    def __init__(
+        self,
+        store: VectorStore,
+        max_chunks: int = 256,
+        max_tokens: Optional[int] = 65_536,
+        max_interval: Optional[float] = 5.0,
+        token_counter: Callable[[str], int] = estimate_tokens,
+        on_write: Optional[Callable[[int], None]] = None,
+    ):
+        self.store = store
+        self.max_chunks = max_chunks
+        self.max_tokens = max_tokens
+        self.max_interval = max_interval
+        self.token_counter = token_counter
+        self.on_write = on_write
+        self.flushes = 0
+        self.chunks_written = 0
+        self._chunks: dict[str, tuple[Chunk, int]] = {}
+        self._deletes: set[str] = set()
+        self._callbacks: list[Callable[[], None]] = []
+        self._tokens = 0
+        self._first_buffered: Optional[float] = None
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+
+    def __enter__(self) -> "ChunkSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.flush()
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def add(self, chunks: list[Chunk], on_flush: Optional[Callable[[], None]] = None) -> None:
+        with self._lock:
+            for chunk in chunks:
+                chunk_id = chunk.chunk_id
+                self._deletes.discard(chunk_id)
+                previous = self._chunks.pop(chunk_id, None)
+                if previous is not None:
+                    self._tokens -= previous[1]
+                tokens = self.token_counter(chunk.content)
+                self._chunks[chunk_id] = (chunk, tokens)
+                self._tokens += tokens
+                self._mark_pending(None)
+                if self._should_flush():
+                    self.flush()
+            self._mark_pending(on_flush)
+            if self._should_flush():
+                self.flush()
+
+    def delete(self, ids: list[str], on_flush: Optional[Callable[[], None]] = None) -> None:
+        with self._lock:
+            for chunk_id in ids:
+                previous = self._chunks.pop(chunk_id, None)
+                if previous is not None:
+                    self._tokens -= previous[1]
+                self._deletes.add(chunk_id)
+            self._mark_pending(on_flush)
+            if self._should_flush():
+                self.flush()
+
+    def flush(self) -> int:
+        with self._lock:
+            chunks = [chunk for chunk, _ in self._chunks.values()]
+            deletes = sorted(self._deletes)
+            callbacks = self._callbacks
+            if not chunks and not deletes and not callbacks:
+                self._first_buffered = None
+                self._cancel_timer()
+                return 0
+
+            self.store.delete_chunks(deletes)
+            self.store.add_chunks(chunks)
+
+            self._chunks = {}
+            self._deletes = set()
+            self._callbacks = []
+            self._tokens = 0
+            self._first_buffered = None
+            self._cancel_timer()
+            self.flushes += 1
+            self.chunks_written += len(chunks)
+            if self.on_write is not None:
+                self.on_write(len(chunks))
+
+            for callback in callbacks:
+                callback()
+            return len(chunks)
+
+    def _mark_pending(self, on_flush: Optional[Callable[[], None]]) -> None:
+        if on_flush is not None:
+            self._callbacks.append(on_flush)
+        if self._first_buffered is None and (self._chunks or self._deletes or self._callbacks):
+            self._first_buffered = time.monotonic()
+            self._schedule(self.max_interval)
+
+    def _schedule(self, delay: Optional[float]) -> None:
+        if delay is None or self._timer is not None:
+            return
+        self._timer = threading.Timer(delay, self._flush_due)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _flush_due(self) -> None:
+        with self._lock:
+            self._timer = None
+            if self._first_buffered is None:
+                return
+            remaining = self.max_interval - (time.monotonic() - self._first_buffered)
+            if remaining > 0:
+                self._schedule(remaining)
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Warning: timed flush of {len(self._chunks)} buffered chunks failed: {e}")
+                self._schedule(self.max_interval)
+
+    def _should_flush(self) -> bool:
+        if len(self._chunks) >= self.max_chunks:
+            return True
+        if self.max_tokens is not None and self._tokens >= self.max_tokens:
+            return True
+        if self.max_interval is not None and self._first_buffered is not None:
+            return time.monotonic() - self._first_buffered >= self.max_interval
+        return False
+
+    def get_stats(self) -> dict:
+        return {
+            "buffered_chunks": len(self._chunks),
+            "buffered_tokens": self._tokens,
+            "flushes": self.flushes,
+            "chunks_written": self.chunks_written,
+        }
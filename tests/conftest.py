@@ -0,0 +1,42 @@
+import hashlib
+import re
+
+import numpy as np
+import pytest
+
+from src.rag_pipeline import RAGPipeline
+
+
+class HashingModel:
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            digest = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=4).digest(), "little")
+            vector[digest % self.dimension] += 1.0 if digest & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, texts, batch_size: int = 32, show_progress_bar: bool = False, convert_to_numpy: bool = True):
+        if isinstance(texts, str):
+            return self._vector(texts)
+        return np.stack([self._vector(text) for text in texts]) if texts else np.zeros((0, self.dimension), np.float32)
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    pipeline = RAGPipeline(
+        persist_directory=str(tmp_path / "store"),
+        vector_backend="matrix",
+        chunk_size=200,
+        chunk_overlap=0,
+        query_cache_size=0,
+        answer_cache_size=0,
+        ingest_workers=1,
+        ingest_flush_interval=None,
+    )
+    pipeline.embedder._model = HashingModel()
+    yield pipeline
+    pipeline.close()
@@ -0,0 +1,73 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from src.retrieval.retriever import normalize_filter
+from src.vectorstore import validate_where
+
+
+@pytest.mark.parametrize("where", [
+    {"filename": "a.txt"},
+    {"page": {"$gte": 2}},
+    {"type": {"$in": ["pdf", "txt"]}},
+    {"$and": [{"filename": "a.txt"}, {"$or": [{"page": 1}, {"page": {"$ne": 3}}]}]},
+])
+def test_valid_filters_pass(where):
+    validate_where(where)
+
+
+@pytest.mark.parametrize("where, message", [
+    ({}, "non-empty object"),
+    ([{"filename": "a.txt"}], "non-empty object"),
+    ({"$and": []}, "non-empty list of filters"),
+    ({"$or": {"filename": "a.txt"}}, "non-empty list of filters"),
+    ({"file name": "a.txt"}, "Invalid filter key"),
+    ({"filename": {}}, "Empty condition"),
+    ({"page": {"$gt": [1]}}, "expects a string, number or boolean"),
+    ({"type": {"$in": []}}, "non-empty list"),
+    ({"type": {"$nin": [{"a": 1}]}}, "list of strings, numbers or booleans"),
+    ({"filename": {"$regex": ".*"}}, "Unsupported filter operator"),
+    ({"$and": [{"filename": {"$like": "a"}}]}, "Unsupported filter operator"),
+])
+def test_invalid_filters_raise(where, message):
+    with pytest.raises(ValueError, match=message):
+        validate_where(where)
+
+
+def test_normalize_filter_combines_keys():
+    assert normalize_filter(None) is None
+    assert normalize_filter({}) is None
+    assert normalize_filter({"filename": "a.txt"}) == {"filename": "a.txt"}
+    assert normalize_filter({"filename": "a.txt", "page": 2}) == {"$and": [{"filename": "a.txt"}, {"page": 2}]}
+    with pytest.raises(ValueError):
+        normalize_filter({"filename": "a.txt", "page": {"$bad": 2}})
+
+
+@pytest.fixture
+def client(pipeline, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from src.api import main
+
+    monkeypatch.setattr(main, "pipeline", pipeline)
+    return TestClient(main.app)
+
+
+def test_retrieve_rejects_invalid_filter_with_400(client):
+    response = client.post("/retrieve", json={"question": "alpha", "filter": {"page": {"$regex": "1"}}})
+    assert response.status_code == 400
+    assert "Unsupported filter operator" in response.json()["detail"]
+
+    response = client.post("/retrieve/batch", json={"questions": ["alpha"], "filter": {"bad key": 1}})
+    assert response.status_code == 400
+    assert "Invalid filter key" in response.json()["detail"]
+
+
+def test_retrieve_applies_valid_filter(client, pipeline, tmp_path):
+    for name in ("a.txt", "b.txt"):
+        path = tmp_path / name
+        path.write_text(f"alpha report stored in {name}")
+        pipeline.ingest_file(str(path))
+
+    response = client.post("/retrieve", json={"question": "alpha report", "filter": {"filename": "b.txt"}})
+    assert response.status_code == 200
+    chunks = response.json()["chunks"]
+    assert chunks and all(chunk["metadata"]["filename"] == "b.txt" for chunk in chunks)
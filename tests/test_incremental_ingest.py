@@ -0,0 +1,108 @@
+import io
+import time
+
+from src.ingestion.jobs import IngestJobQueue
+
+
+def paragraphs(*words: str) -> str:
+    return "\n\n".join(" ".join([word] * 20) for word in words)
+
+
+def stored_ids(pipeline) -> set[str]:
+    return {chunk["id"] for batch in pipeline.vector_store.iter_chunks() for chunk in batch}
+
+
+def test_reingest_unchanged_file_writes_nothing(pipeline, tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text(paragraphs("alpha", "bravo", "charlie"))
+
+    first = pipeline.ingest_file(str(path))
+    assert first["status"] == "added"
+    assert first["chunks_written"] == first["chunks"] == 3
+    calls = pipeline.embedder.embed_calls
+
+    second = pipeline.ingest_file(str(path))
+    assert second["status"] == "unchanged"
+    assert second["chunks_written"] == 0
+    assert pipeline.embedder.embed_calls == calls
+    assert pipeline.vector_store.count() == 3
+
+
+def test_edited_file_rewrites_changed_chunks_and_drops_stale_ones(pipeline, tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text(paragraphs("alpha", "bravo", "charlie"))
+    pipeline.ingest_file(str(path))
+    before = stored_ids(pipeline)
+
+    path.write_text(paragraphs("alpha", "delta"))
+    result = pipeline.ingest_file(str(path))
+    assert result["status"] == "updated"
+    assert result["chunks"] == 2
+    assert result["chunks_written"] == 1
+
+    entry = pipeline.manifest.get(str(path.absolute()))
+    assert stored_ids(pipeline) == set(entry.chunk_ids)
+    assert stored_ids(pipeline) < before
+    contents = [chunk["content"] for chunk in pipeline.vector_store.get_chunks(entry.chunk_ids)]
+    assert not any("charlie" in content or "bravo" in content for content in contents)
+
+
+def test_manifest_survives_restart(pipeline, tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text(paragraphs("alpha", "bravo"))
+    pipeline.ingest_file(str(path))
+    pipeline.close()
+
+    reopened = type(pipeline)(
+        persist_directory=str(tmp_path / "store"),
+        vector_backend="matrix",
+        chunk_size=200,
+        chunk_overlap=0,
+        ingest_workers=1,
+    )
+    reopened.embedder._model = pipeline.embedder._model
+    try:
+        assert reopened.ingest_file(str(path))["status"] == "unchanged"
+        assert reopened.vector_store.count() == 2
+    finally:
+        reopened.close()
+
+
+def test_directory_reingest_removes_deleted_files(pipeline, tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "keep.txt").write_text(paragraphs("alpha"))
+    (docs / "drop.txt").write_text(paragraphs("bravo", "charlie"))
+    assert sorted(r["status"] for r in pipeline.ingest_directory(str(docs))) == ["added", "added"]
+    assert pipeline.vector_store.count() == 3
+
+    (docs / "drop.txt").unlink()
+    results = {r["filename"]: r["status"] for r in pipeline.ingest_directory(str(docs))}
+    assert results == {"keep.txt": "unchanged", "drop.txt": "deleted"}
+    assert pipeline.vector_store.count() == 1
+    assert pipeline.manifest.get(str((docs / "drop.txt").absolute())) is None
+
+
+def wait_for(queue: IngestJobQueue, job_id: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    job = queue.get(job_id)
+    while job.status in ("queued", "running") and time.monotonic() < deadline:
+        time.sleep(0.02)
+        job = queue.get(job_id)
+    return job
+
+
+def test_uploads_with_same_source_update_in_place(pipeline, tmp_path):
+    queue = IngestJobQueue(pipeline, tmp_path / "jobs.sqlite3", tmp_path / "spool", workers=1)
+    try:
+        first = wait_for(queue, queue.submit(io.BytesIO(paragraphs("alpha", "bravo").encode()), "notes.txt").job_id)
+        assert first.status == "completed"
+        assert first.result["status"] == "added"
+
+        second = wait_for(queue, queue.submit(io.BytesIO(paragraphs("alpha").encode()), "notes.txt").job_id)
+        assert second.status == "completed"
+        assert second.result["status"] == "updated"
+        assert pipeline.vector_store.count() == 1
+        assert list((tmp_path / "spool").iterdir()) == []
+    finally:
+        queue.shutdown()
@@ -0,0 +1,48 @@
+from src.retrieval.cache import QueryCache
+
+
+def result(chunk_id: str) -> dict:
+    return {"id": chunk_id, "content": chunk_id, "metadata": {"filename": "a.txt"}, "score": 1.0}
+
+
+def test_hit_returns_copy():
+    cache = QueryCache()
+    key = cache.make_key("what  is alpha", 5)
+    cache.put(key, 0, [result("a")], [0.1])
+    hit, embedding = cache.get(cache.make_key("what is alpha", 5), 0)
+    assert [r["id"] for r in hit] == ["a"]
+    assert embedding == [0.1]
+    hit[0]["metadata"]["filename"] = "changed"
+    assert cache.get(key, 0)[0][0]["metadata"]["filename"] == "a.txt"
+
+
+def test_new_store_version_invalidates_entries():
+    cache = QueryCache()
+    key = cache.make_key("alpha", 5)
+    cache.put(key, 1, [result("a")], [0.1])
+    assert cache.get(key, 2) is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_put_from_stale_version_is_dropped():
+    cache = QueryCache()
+    key = cache.make_key("alpha", 5)
+    assert cache.get(key, 2) is None
+    cache.put(key, 1, [result("old")], [0.1])
+    assert cache.get(key, 2) is None
+    cache.put(key, 2, [result("new")], [0.1])
+    assert [r["id"] for r in cache.get(key, 2)[0]] == ["new"]
+
+
+def test_retriever_does_not_serve_results_from_before_a_write(pipeline, tmp_path):
+    pipeline.retriever.cache = QueryCache()
+    path = tmp_path / "a.txt"
+    path.write_text("alpha report")
+    pipeline.ingest_file(str(path))
+    assert [r["metadata"]["filename"] for r in pipeline.retriever.retrieve("alpha report", top_k=5)] == ["a.txt"]
+
+    other = tmp_path / "b.txt"
+    other.write_text("alpha report again")
+    pipeline.ingest_file(str(other))
+    filenames = {r["metadata"]["filename"] for r in pipeline.retriever.retrieve("alpha report", top_k=5)}
+    assert filenames == {"a.txt", "b.txt"}
@@ -0,0 +1,130 @@
+import time
+
+import pytest
+
+from src.chunking.text_splitter import Chunk
+from src.vectorstore.sink import ChunkSink
+
+
+class RecordingStore:
+    def __init__(self):
+        self.fail = False
+        self.added: list[str] = []
+        self.deleted: list[str] = []
+        self.writes = 0
+
+    def add_chunks(self, chunks: list[Chunk]) -> None:
+        if self.fail:
+            raise RuntimeError("store unavailable")
+        self.writes += 1
+        self.added.extend(chunk.chunk_id for chunk in chunks)
+
+    def delete_chunks(self, ids: list[str]) -> None:
+        self.deleted.extend(ids)
+
+
+def make_chunk(index: int, doc_id: str = "doc", content: str = "") -> Chunk:
+    return Chunk(content=content or f"chunk {index}", metadata={}, chunk_index=index, doc_id=doc_id)
+
+
+def test_flushes_when_max_chunks_reached():
+    store = RecordingStore()
+    sink = ChunkSink(store, max_chunks=3, max_tokens=None, max_interval=None)
+    sink.add([make_chunk(0), make_chunk(1)])
+    assert store.added == []
+    sink.add([make_chunk(2)])
+    assert len(store.added) == 3
+    assert len(sink) == 0
+    assert sink.get_stats()["flushes"] == 1
+
+
+def test_flushes_when_max_tokens_reached():
+    store = RecordingStore()
+    sink = ChunkSink(store, max_chunks=100, max_tokens=10, max_interval=None, token_counter=len)
+    sink.add([make_chunk(0, content="abcde")])
+    assert store.added == []
+    sink.add([make_chunk(1, content="fghij")])
+    assert len(store.added) == 2
+
+
+def test_readded_chunk_replaces_buffered_copy():
+    store = RecordingStore()
+    sink = ChunkSink(store, max_chunks=100, max_tokens=None, max_interval=None, token_counter=len)
+    sink.add([make_chunk(0, content="first")])
+    sink.add([make_chunk(0, content="second!")])
+    assert len(sink) == 1
+    assert sink.get_stats()["buffered_tokens"] == len("second!")
+
+
+def test_delete_cancels_buffered_add():
+    store = RecordingStore()
+    sink = ChunkSink(store, max_chunks=100, max_interval=None)
+    chunk = make_chunk(0)
+    sink.add([chunk])
+    sink.delete([chunk.chunk_id])
+    sink.flush()
+    assert store.added == []
+    assert store.deleted == [chunk.chunk_id]
+
+
+def test_callbacks_run_after_store_write():
+    store = RecordingStore()
+    sink = ChunkSink(store, max_chunks=100, max_interval=None)
+    seen = []
+    sink.add([make_chunk(0)], on_flush=lambda: seen.append(list(store.added)))
+    assert seen == []
+    sink.flush()
+    assert seen == [[make_chunk(0).chunk_id]]
+
+
+def test_failed_flush_keeps_buffer_and_callbacks():
+    store = RecordingStore()
+    sink = ChunkSink(store, max_chunks=100, max_interval=None)
+    done = []
+    sink.add([make_chunk(0, "a")], on_flush=lambda: done.append("a"))
+    sink.add([make_chunk(1, "b"), make_chunk(2, "b")], on_flush=lambda: done.append("b"))
+    sink.delete(["stale"])
+    store.fail = True
+    with pytest.raises(RuntimeError):
+        sink.flush()
+    assert len(sink) == 3
+    assert done == []
+
+    store.fail = False
+    assert sink.flush() == 3
+    assert len(store.added) == 3
+    assert done == ["a", "b"]
+
+
+def test_context_manager_flushes_on_exit():
+    store = RecordingStore()
+    with ChunkSink(store, max_chunks=100, max_interval=None) as sink:
+        sink.add([make_chunk(0)])
+    assert store.added == [make_chunk(0).chunk_id]
+
+
+def test_timer_flushes_idle_buffer():
+    store = RecordingStore()
+    sink = ChunkSink(store, max_chunks=100, max_interval=0.05)
+    done = []
+    sink.add([make_chunk(0)], on_flush=lambda: done.append(True))
+    deadline = time.monotonic() + 2.0
+    while not done and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert done == [True]
+    assert store.added == [make_chunk(0).chunk_id]
+    assert sink._timer is None
+
+
+def test_timer_retries_after_failed_flush():
+    store = RecordingStore()
+    store.fail = True
+    sink = ChunkSink(store, max_chunks=100, max_interval=0.05)
+    sink.add([make_chunk(0)])
+    time.sleep(0.15)
+    assert len(sink) == 1
+    store.fail = False
+    deadline = time.monotonic() + 2.0
+    while len(sink) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.added == [make_chunk(0).chunk_id]
@@ -1,3 +1,4 @@
+import atexit
 import gradio as gr
 from pathlib import Path
 import sys
@@ -62,14 +63,8 @@ theme = gr.themes.Base(
 
 custom_css = ""
 
-pipeline = RAGPipeline(
-    collection_name=settings.chroma_collection,
-    persist_directory=settings.chroma_persist_dir,
-    model=settings.ollama_model,
-    chunk_size=settings.chunk_size,
-    chunk_overlap=settings.chunk_overlap,
-    top_k=settings.top_k,
-)
+pipeline = RAGPipeline.from_settings(settings)
+atexit.register(pipeline.close)
 
 
 def check_status():
@@ -81,8 +76,8 @@ def upload_file(file):
     if file is None:
         return "No file selected"
     try:
-        result = pipeline.ingest_file(file.name)
-        return f"Ingested: {result['filename']}, chunks: {result['chunks']}"
+        result = pipeline.ingest_file(file.name, source=Path(file.name).name)
+        return f"Ingested: {result['filename']}, chunks: {result['chunks']} ({result['status']})"
     except Exception as e:
         return f"Error: {str(e)}"
 